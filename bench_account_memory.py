@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+账号内存占用基准测试
+生成指定数量的模拟账号，分别用旧的 __dict__ 数据类和当前的 __slots__ Account 加载，
+输出每个账号占用的字节数
+
+用法: python bench_account_memory.py [--sizes 10000,100000,1000000]
+"""
+import argparse
+import gc
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+# 添加项目路径到系统路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from windsurf_account_manager import storage
+from windsurf_account_manager.account_store import AccountStore
+from windsurf_account_manager.models import Account
+
+
+@dataclass
+class LegacyAccount:
+    """优化前的账号结构：普通数据类，字段存放在 __dict__ 中"""
+    id: str
+    email: str
+    password: str = ""
+    note: str = ""
+    plan_name: Optional[str] = None
+    plan_tier: Optional[str] = None
+    plan_end: Optional[str] = None
+    used_prompt_credits: Optional[int] = None
+    used_flow_credits: Optional[int] = None
+    api_key: Optional[str] = None
+    last_sync_time: Optional[str] = None
+    has_snapshot: bool = False
+    snapshot_created_at: Optional[str] = None
+
+
+PLAN_NAMES = ["Free", "Pro", "Pro Trial", "Teams", "Enterprise"]
+PLAN_TIERS = ["free", "pro", "teams", "enterprise"]
+
+
+def make_accounts(count: int):
+    rng = random.Random(count)
+    for i in range(count):
+        synced = rng.random() < 0.7
+        yield Account(
+            id=f"{i:08x}-0000-4000-8000-{rng.getrandbits(48):012x}",
+            email=f"user{i}@example.com",
+            password=f"pw{rng.getrandbits(40):x}",
+            note="" if rng.random() < 0.8 else f"note {i}",
+            plan_name=rng.choice(PLAN_NAMES) if synced else None,
+            plan_tier=rng.choice(PLAN_TIERS) if synced else None,
+            plan_end=f"2026-{rng.randint(1, 12):02d}-01T00:00:00+00:00" if synced else None,
+            used_prompt_credits=rng.randint(0, 50000) if synced else None,
+            used_flow_credits=rng.randint(0, 50000) if synced else None,
+            api_key=f"sk-ws-{rng.getrandbits(128):032x}" if synced else None,
+            last_sync_time=f"2025-11-{rng.randint(1, 28):02d}T12:00:00" if synced else None,
+        )
+
+
+def measure(loader):
+    """返回 (加载结果, 常驻字节数, 耗时)"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = loader()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+
+def load_legacy(json_path: Path):
+    """旧版 storage.load_accounts 的加载方式"""
+    with json_path.open("r", encoding="utf-8") as f:
+        raw = json.load(f)
+    return [LegacyAccount(**item) for item in raw]
+
+
+def load_current(temp_dir: Path):
+    """通过 storage.load_accounts 加载（默认 sqlite 后端）"""
+    storage.ACCOUNTS_DB_PATH = temp_dir / "accounts.db"
+    storage.ACCOUNTS_PATH = temp_dir / "accounts.json"
+    storage._store = None
+    accounts = storage.load_accounts()
+    storage.get_account_store().close()
+    storage._store = None
+    return accounts
+
+
+def run(size: int) -> None:
+    with tempfile.TemporaryDirectory() as temp:
+        temp_dir = Path(temp)
+        json_path = temp_dir / "accounts.json"
+        store = AccountStore(temp_dir / "accounts.db")
+        with json_path.open("w", encoding="utf-8") as f:
+            f.write("[")
+            batch = []
+            for index, account in enumerate(make_accounts(size)):
+                f.write(",\n" if index else "\n")
+                json.dump(storage._account_to_dict(account), f, ensure_ascii=False)
+                batch.append(account)
+                if len(batch) >= 10000:
+                    store.upsert_many(batch)
+                    batch.clear()
+            store.upsert_many(batch)
+            f.write("\n]")
+        store.set_meta("migrated_from", "bench")
+        store.close()
+        del batch
+        gc.collect()
+
+        legacy, legacy_bytes, legacy_time = measure(lambda: load_legacy(json_path))
+        assert len(legacy) == size
+        del legacy
+        current, current_bytes, current_time = measure(lambda: load_current(temp_dir))
+        assert len(current) == size
+        del current
+
+    print(
+        f"{size:>9,} 个账号 | 优化前 {legacy_bytes / size:7.1f} 字节/账号 ({legacy_time:6.2f}s)"
+        f" | 优化后 {current_bytes / size:7.1f} 字节/账号 ({current_time:6.2f}s)"
+        f" | 节省 {1 - current_bytes / legacy_bytes:6.1%}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="账号内存占用基准测试")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="逗号分隔的账号数量")
+    args = parser.parse_args()
+
+    print(f"Python {sys.version.split()[0]}，Account 使用 __slots__: {not hasattr(Account('x', 'y'), '__dict__')}")
+    for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+        run(size)
+
+
+if __name__ == "__main__":
+    main()
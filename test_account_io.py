@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+测试账号的流式导入导出（JSON 数组 / JSON Lines / CSV）
+"""
+import io
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目路径到系统路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from windsurf_account_manager import account_io
+from windsurf_account_manager.account_repository import AccountRepository
+from windsurf_account_manager.models import Account
+
+
+def test_incremental_json_array_parser():
+    """小缓冲区下也应正确解析跨块的元素"""
+    items = [{"email": f"u{i}@example.com", "n": i * 1000, "s": "转义\"字符"} for i in range(50)]
+    items += [12345, -1.5e3, True, None, "text", [1, [2]]]
+    text = json.dumps(items, ensure_ascii=False, indent=2)
+    for chunk_size in (1, 3, 7, 64):
+        parsed = list(account_io.iter_json_array(io.StringIO(text), chunk_size=chunk_size))
+        assert parsed == items
+    assert list(account_io.iter_json_array(io.StringIO(" [ ] "))) == []
+
+    for bad in ('{"a": 1}', "[1, 2", "[1 2]", "[1,,2]"):
+        try:
+            list(account_io.iter_json_array(io.StringIO(bad), chunk_size=2))
+        except account_io.ImportFormatError:
+            continue
+        raise AssertionError(f"格式错误未检测到: {bad}")
+
+
+def test_export_and_reimport_all_formats():
+    """各种格式导出后应能完整导回"""
+    accounts = [
+        Account(id="a1", email="a@example.com", password="pw", note="备注,含逗号", used_prompt_credits=5, has_snapshot=True),
+        Account(id="a2", email="b@example.com", plan_name="Pro"),
+    ]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for suffix in (".json", ".jsonl", ".csv"):
+            path = Path(temp_dir) / f"accounts{suffix}"
+            assert account_io.export_accounts(path, iter(accounts)) == 2
+            repo = AccountRepository()
+            result = account_io.import_accounts([path], repo)
+            assert [a.id for a in result.added] == ["a1", "a2"], suffix
+            assert repo.get("a1") == accounts[0], suffix
+            assert repo.get("a2") == accounts[1], suffix
+
+
+def test_multi_file_import_dedupes_and_reports_progress():
+    """多个文件导入时应按规范化邮箱去重并汇报进度"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        first = Path(temp_dir) / "windsurf.json"
+        first.write_text(json.dumps([
+            {"email": "Old@example.com", "password": "x"},
+            {"email": "new1@example.com", "password": "pw"},
+            {"password": "no-email"},
+        ]), encoding="utf-8")
+        second = Path(temp_dir) / "dump.jsonl"
+        lines = [json.dumps({"email": f"user{i}@example.com"}) for i in range(300)]
+        lines += ['{"email": " NEW1@example.com "}', "not json", ""]
+        second.write_text("\n".join(lines), encoding="utf-8")
+
+        repo = AccountRepository([Account(id="old", email="old@example.com")])
+        batches = []
+        repo.subscribe(lambda event, accounts: batches.append(len(accounts)))
+        progress = []
+        result = account_io.import_accounts(
+            [first, second, Path(temp_dir) / "missing.csv"],
+            repo,
+            on_progress=lambda *args: progress.append(args),
+            batch_size=100,
+        )
+
+    assert len(result.added) == 301
+    assert result.duplicates == 2
+    assert result.invalid == 2
+    assert result.files == 2
+    assert len(repo) == 302
+    assert max(batches) == 100
+    # 每个文件读完时进度应达到文件大小
+    assert any(p[0] == 1 and p[2] == p[3] for p in progress)
+
+
+if __name__ == "__main__":
+    test_incremental_json_array_parser()
+    test_export_and_reimport_all_formats()
+    test_multi_file_import_dedupes_and_reports_progress()
+    print("账号导入导出测试通过")
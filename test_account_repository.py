@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+测试账号仓库的索引维护和变更通知
+"""
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目路径到系统路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from windsurf_account_manager import storage
+from windsurf_account_manager.account_repository import AccountRepository
+from windsurf_account_manager.models import Account
+
+
+def test_indexes_follow_updates_and_removals():
+    """修改邮箱、API Key或删除账号后索引应保持一致"""
+    repo = AccountRepository([
+        Account(id="a1", email="A@Example.com"),
+        Account(id="a2", email="b@example.com", api_key="key-2"),
+    ])
+    assert repo.get("a1").email == "A@Example.com"
+    assert repo.get_by_email(" a@example.com ").id == "a1"
+    assert repo.get_by_api_key("key-2").id == "a2"
+
+    acc = repo.get("a2")
+    acc.email = "c@example.com"
+    acc.api_key = "key-3"
+    repo.update(acc)
+    assert repo.get_by_email("b@example.com") is None
+    assert repo.get_by_email("c@example.com") is acc
+    assert repo.get_by_api_key("key-2") is None
+    assert repo.get_by_api_key("key-3") is acc
+
+    repo.remove(["a1"])
+    assert "a1" not in repo
+    assert repo.get_by_email("a@example.com") is None
+    assert [a.id for a in repo] == ["a2"]
+
+
+def test_duplicate_email_index_is_handed_over():
+    """同一邮箱有多个账号时，删除其中一个后索引指向剩余的账号"""
+    repo = AccountRepository([Account(id="a1", email="x@example.com"), Account(id="a2", email="x@example.com")])
+    assert repo.get_by_email("x@example.com").id == "a1"
+    repo.remove(["a1"])
+    assert repo.get_by_email("x@example.com").id == "a2"
+    repo.remove(["a2"])
+    assert not repo.has_email("x@example.com")
+
+
+def test_change_notifications():
+    """每次修改应通知订阅者，取消订阅后不再通知"""
+    repo = AccountRepository()
+    events = []
+    unsubscribe = repo.subscribe(lambda event, accounts: events.append((event, [a.id for a in accounts])))
+
+    repo.add(Account(id="a1", email="a@example.com"))
+    repo.update_many(repo.get_many(["a1", "missing"]))
+    repo.remove(["a1", "missing"])
+    repo.remove(["missing"])
+    unsubscribe()
+    repo.add(Account(id="a2", email="b@example.com"))
+    assert events == [("added", ["a1"]), ("updated", ["a1"]), ("removed", ["a1"])]
+
+
+def test_import_skips_existing_emails():
+    """导入时应通过邮箱索引跳过已存在和重复的账号"""
+    repo = AccountRepository([Account(id="a1", email="a@example.com")])
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "windsurf.json"
+        path.write_text(json.dumps([
+            {"email": "A@example.com", "password": "x"},
+            {"email": "new@example.com", "password": "pw"},
+            {"email": "NEW@example.com", "password": "pw"},
+            "invalid",
+        ]), encoding="utf-8")
+        added = storage.import_from_windsurf_json(path, repo)
+    assert [a.email for a in added] == ["new@example.com"]
+    assert len(repo) == 2
+    assert repo.get_by_email("new@example.com").password == "pw"
+
+
+if __name__ == "__main__":
+    test_indexes_follow_updates_and_removals()
+    test_duplicate_email_index_is_handed_over()
+    test_change_notifications()
+    test_import_skips_existing_emails()
+    print("账号仓库测试通过")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+测试账号三元组搜索索引
+"""
+import sys
+from pathlib import Path
+
+# 添加项目路径到系统路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from windsurf_account_manager.account_repository import AccountRepository
+from windsurf_account_manager.account_search import TrigramIndex
+from windsurf_account_manager.models import Account
+
+
+def _emails(accounts):
+    return [a.email for a in accounts]
+
+
+def test_ranking_and_fuzzy_matching():
+    """完全相同 > 前缀 > 包含 > 模糊，备注和计划名称也参与搜索"""
+    repo = AccountRepository([
+        Account(id="1", email="bob.smith@example.com"),
+        Account(id="2", email="smith@example.com"),
+        Account(id="3", email="alice@example.com", note="smith 的备用号"),
+        Account(id="4", email="smithers@example.com"),
+        Account(id="5", email="carol@example.com", plan_name="Pro Trial"),
+    ])
+    assert _emails(repo.search("smith@example.com"))[:2] == ["smith@example.com", "bob.smith@example.com"]
+    assert _emails(repo.search("SMITH")) == [
+        "smith@example.com", "smithers@example.com", "bob.smith@example.com", "alice@example.com",
+    ]
+    assert _emails(repo.search("pro trial")) == ["carol@example.com"]
+    # 拼写错误时按共享三元组给出模糊结果
+    assert _emails(repo.search("smiters@exampel"))[0] == "smithers@example.com"
+    assert len(repo.search("")) == 5
+    assert repo.search("smith", limit=2) == repo.search("smith")[:2]
+
+
+def test_index_follows_repository_changes():
+    """增删改后搜索结果立即反映变化"""
+    repo = AccountRepository([Account(id="1", email="first@example.com")])
+    assert _emails(repo.search("first")) == ["first@example.com"]
+
+    account = repo.get("1")
+    account.note = "renamed"
+    account.email = "second@example.com"
+    repo.update(account)
+    assert repo.search("first") == []
+    assert _emails(repo.search("renamed")) == ["second@example.com"]
+
+    repo.add(Account(id="2", email="third@example.com"))
+    assert _emails(repo.search("third")) == ["third@example.com"]
+    repo.remove(["1"])
+    assert repo.search("second") == []
+
+    repo.replace_all([Account(id="9", email="fresh@example.com")])
+    repo.build_search_index()
+    assert _emails(repo.search("fresh")) == ["fresh@example.com"]
+
+
+def test_stop_grams_and_compaction_keep_results_correct():
+    """高频三元组转为停用后仍能正确过滤，删除大量文档后重新编号不影响结果"""
+    index = TrigramIndex(stop_min_docs=10, stop_ratio=0.1)
+    for i in range(3000):
+        index.add(f"k{i}", [f"user{i}@example.com", "", ""])
+    assert "exa" in index._stop
+    assert index.search("user2999@example.com")[0] == "k2999"
+    assert len(index.search("example.com")) == 3000
+
+    for i in range(0, 3000, 3):
+        index.remove(f"k{i}")
+    for i in range(1, 3000, 3):
+        index.remove(f"k{i}")
+    assert len(index._keys) <= 2 * len(index)
+    assert index.search("user2999@")[0] == "k2999"
+    assert "k2998" not in index.search("user2998@")
+
+
+if __name__ == "__main__":
+    test_ranking_and_fuzzy_matching()
+    test_index_follows_repository_changes()
+    test_stop_grams_and_compaction_keep_results_correct()
+    print("账号搜索测试通过")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+测试账号列表排序和排序键缓存
+"""
+import sys
+from pathlib import Path
+
+# 添加项目路径到系统路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from windsurf_account_manager import account_sort
+from windsurf_account_manager.account_repository import AccountRepository
+from windsurf_account_manager.account_sort import SortKeyCache
+from windsurf_account_manager.models import Account
+
+
+def _accounts():
+    return [
+        Account(id="1", email="b@example.com", plan_name="Pro", plan_end="2026-03-01T00:00:00Z", used_prompt_credits=10),
+        Account(id="2", email="A@example.com", plan_name="Free", plan_end="2026-01-01T00:00:00+00:00"),
+        Account(id="3", email="c@example.com", plan_name="pro", plan_end=None, used_prompt_credits=500),
+        Account(id="4", email="d@example.com", plan_name="Free", plan_end="2025-12-31T00:00:00+00:00",
+                has_snapshot=True, snapshot_created_at="2025-11-01T08:00:00"),
+    ]
+
+
+def test_typed_keys_and_stable_multi_key_sort():
+    """日期按时间、字符串忽略大小写、缺失值排最后，多键排序稳定"""
+    repo = AccountRepository(_accounts())
+    cache = SortKeyCache(repo)
+
+    ids = lambda accounts: [a.id for a in accounts]
+    assert ids(cache.sort(repo.all(), [("email", False)])) == ["2", "1", "3", "4"]
+    assert ids(cache.sort(repo.all(), [("plan_end", False)])) == ["4", "2", "1", "3"]
+    assert ids(cache.sort(repo.all(), [("plan_end", True)])) == ["1", "2", "4", "3"]
+    assert ids(cache.sort(repo.all(), [("used_prompt_credits", True)])) == ["3", "1", "2", "4"]
+    assert ids(cache.sort(repo.all(), [("snapshot", False)])) == ["4", "1", "2", "3"]
+    # 计划相同的账号按到期时间降序
+    assert ids(cache.sort(repo.all(), [("plan_name", False), ("plan_end", True)])) == ["2", "4", "1", "3"]
+
+
+def test_keys_are_cached_and_refreshed_on_update():
+    """重复排序不重新解析日期，账号更新后排序键随之刷新"""
+    repo = AccountRepository(_accounts())
+    cache = SortKeyCache(repo)
+    cache.sort(repo.all(), [("plan_end", False)])
+
+    calls = []
+    original = account_sort._timestamp_key
+    account_sort._timestamp_key = lambda value: calls.append(value) or original(value)
+    try:
+        cache.sort(repo.all(), [("plan_end", False)])
+        assert calls == []
+
+        account = repo.get("3")
+        account.plan_end = "2020-01-01T00:00:00+00:00"
+        repo.update(account)
+        assert calls == ["2020-01-01T00:00:00+00:00"]
+        assert cache.sort(repo.all(), [("plan_end", False)])[0].id == "3"
+
+        repo.remove(["3"])
+        assert "3" not in cache._keys
+    finally:
+        account_sort._timestamp_key = original
+
+
+if __name__ == "__main__":
+    test_typed_keys_and_stable_multi_key_sort()
+    test_keys_are_cached_and_refreshed_on_update()
+    print("账号排序测试通过")
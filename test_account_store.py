@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+测试 SQLite 账号存储：单行写入、批量事务以及从 accounts.json 迁移
+"""
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目路径到系统路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from windsurf_account_manager import storage
+from windsurf_account_manager.account_store import AccountStore
+from windsurf_account_manager.models import Account
+
+
+def _accounts(count):
+    return [Account(id=f"id-{i}", email=f"user{i}@example.com", password="pw") for i in range(count)]
+
+
+def test_upsert_preserves_order_and_fields():
+    """账号应按保存顺序加载，单行更新不改变顺序"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = AccountStore(Path(temp_dir) / "accounts.db")
+        assert store._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+        accounts = _accounts(5)
+        store.replace_all(accounts)
+        accounts[2].note = "备注"
+        accounts[2].has_snapshot = True
+        store.upsert(accounts[2])
+        store.upsert(Account(id="new", email="new@example.com"))
+
+        loaded = store.load_all()
+        assert [a.id for a in loaded] == [a.id for a in accounts] + ["new"]
+        assert loaded[2] == accounts[2]
+        assert loaded[2].has_snapshot is True
+        assert store.find_by_email("user3@example.com")[0].id == "id-3"
+        store.close()
+
+
+def test_replace_all_only_writes_changed_rows():
+    """整体保存时未变化的行不应被重写，缺失的账号应被删除"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = AccountStore(Path(temp_dir) / "accounts.db")
+        accounts = _accounts(100)
+        store.replace_all(accounts)
+
+        accounts[10].note = "changed"
+        before = store._conn.total_changes
+        store.replace_all(accounts)
+        assert store._conn.total_changes - before == 1
+
+        del accounts[50]
+        store.replace_all(accounts)
+        assert store.count() == 99
+        assert store.get("id-10").note == "changed"
+        assert store.get("id-50") is None
+        store.close()
+
+
+def test_transaction_rolls_back_on_error():
+    """批量事务出错时应整体回滚"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = AccountStore(Path(temp_dir) / "accounts.db")
+        try:
+            with store.transaction():
+                store.upsert_many(_accounts(3))
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        assert store.count() == 0
+        store.close()
+
+
+def test_migrates_from_json_once():
+    """首次打开时应从 accounts.json 迁移，之后不再重复导入"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        json_path = Path(temp_dir) / "accounts.json"
+        db_path = Path(temp_dir) / "accounts.db"
+        json_path.write_text(json.dumps([
+            {"id": "a1", "email": "a@example.com", "password": "pw", "plan_name": "Pro"},
+            {"id": "a2", "email": "b@example.com"},
+        ]), encoding="utf-8")
+
+        store = storage.open_account_store(db_path, json_path)
+        assert [a.id for a in store.load_all()] == ["a1", "a2"]
+        assert store.get("a1").plan_name == "Pro"
+        store.delete(["a2"])
+        store.close()
+
+        store = storage.open_account_store(db_path, json_path)
+        assert [a.id for a in store.load_all()] == ["a1"]
+        store.close()
+
+
+def test_populated_store_records_migration_without_parsing_json():
+    """数据库已有账号但没有迁移记录时，记录迁移来源且不再解析 accounts.json"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        json_path = Path(temp_dir) / "accounts.json"
+        db_path = Path(temp_dir) / "accounts.db"
+        json_path.write_text(json.dumps([{"id": "old", "email": "old@example.com"}]), encoding="utf-8")
+        store = AccountStore(db_path)
+        store.replace_all(_accounts(2))
+        store.close()
+
+        parsed = []
+        original = storage._parse_accounts_json
+        storage._parse_accounts_json = lambda data: parsed.append(data) or original(data)
+        try:
+            store = storage.open_account_store(db_path, json_path)
+            assert store.get_meta("migrated_from") == str(json_path)
+            assert [a.id for a in store.load_all()] == ["id-0", "id-1"]
+            store.close()
+            storage.open_account_store(db_path, json_path).close()
+        finally:
+            storage._parse_accounts_json = original
+        assert parsed == []
+
+
+if __name__ == "__main__":
+    test_upsert_preserves_order_and_fields()
+    test_replace_all_only_writes_changed_rows()
+    test_transaction_rolls_back_on_error()
+    test_migrates_from_json_once()
+    test_populated_store_records_migration_without_parsing_json()
+    print("账号存储测试通过")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+测试 accounts.json 二进制缓存的命中、失效和损坏回退
+"""
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目路径到系统路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from windsurf_account_manager import accounts_cache, storage
+from windsurf_account_manager.models import Account
+
+
+def _write_json(path, accounts):
+    path.write_text(json.dumps([storage._account_to_dict(a) for a in accounts], indent=2), encoding="utf-8")
+
+
+def test_cache_hit_and_invalidation():
+    """未修改时命中缓存，修改 accounts.json 后重新解析"""
+    accounts = [
+        Account(id="a1", email="a@example.com", plan_name="Pro", used_prompt_credits=3, has_snapshot=True),
+        Account(id="a2", email="b@example.com"),
+    ]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "accounts.json"
+        _write_json(path, accounts)
+
+        loaded, hit = accounts_cache.load_accounts_cached(path, storage._parse_accounts_json)
+        assert not hit
+        assert loaded == accounts
+        assert accounts_cache.cache_path_for(path).exists()
+
+        def fail(_data):
+            raise AssertionError("缓存有效时不应解析 JSON")
+
+        loaded, hit = accounts_cache.load_accounts_cached(path, fail)
+        assert hit
+        assert loaded == accounts
+        assert loaded[0].plan_name is accounts[0].plan_name
+
+        accounts[1].note = "changed"
+        _write_json(path, accounts)
+        loaded, hit = accounts_cache.load_accounts_cached(path, storage._parse_accounts_json)
+        assert not hit
+        assert loaded[1].note == "changed"
+
+
+def test_corrupt_cache_falls_back_to_json():
+    """缓存文件损坏时应回退到解析 JSON 并重建缓存"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "accounts.json"
+        _write_json(path, [Account(id="a1", email="a@example.com")])
+        accounts_cache.load_accounts_cached(path, storage._parse_accounts_json)
+
+        cache_path = accounts_cache.cache_path_for(path)
+        blob = cache_path.read_bytes()
+        cache_path.write_bytes(blob[:-5])
+        loaded, hit = accounts_cache.load_accounts_cached(path, storage._parse_accounts_json)
+        assert not hit
+        assert loaded[0].id == "a1"
+        _loaded, hit = accounts_cache.load_accounts_cached(path, storage._parse_accounts_json)
+        assert hit
+
+
+if __name__ == "__main__":
+    test_cache_hit_and_invalidation()
+    test_corrupt_cache_falls_back_to_json()
+    print("账号缓存测试通过")
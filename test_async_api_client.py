@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+测试异步API客户端：并发上限、5xx和超时重试、取消，以及protobuf模式补充计划状态
+"""
+import sys
+import threading
+import time
+import http.server
+from pathlib import Path
+
+import pytest
+
+# 添加项目路径到系统路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+# aiohttp 为可选依赖，未安装时跳过
+pytest.importorskip("aiohttp")
+
+from windsurf_account_manager import protobuf_wire as pw
+from windsurf_account_manager.async_api_client import AsyncApiClient, EventLoopThread
+from windsurf_account_manager.models import Account
+from windsurf_account_manager.token_cache import TokenCache
+
+
+def _start_server(fail_times: int = 0, slow_times: int = 0, delay: float = 0.0, on_request=None):
+    """
+    启动本地测试服务器，按路径返回GetCurrentUser和GetPlanStatus的protobuf响应
+
+    Args:
+        fail_times: 前fail_times次GetCurrentUser返回503
+        slow_times: 前slow_times次GetCurrentUser等待1秒再响应，用于触发读取超时
+        delay: 每个请求的处理耗时（秒）
+        on_request: 收到请求时的回调
+    """
+    end = pw.encode_varint_field(1, 1893456000)  # 2030-01-01T00:00:00Z
+    responses = {
+        "GetCurrentUser": pw.encode_bytes_field(1, pw.encode_string_field(1, "sk-123")),
+        "GetPlanStatus": pw.encode_bytes_field(1, pw.encode_bytes_field(3, end) + pw.encode_varint_field(6, 42)),
+    }
+    state = {"calls": 0, "in_flight": 0, "max_in_flight": 0}
+    lock = threading.Lock()
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            self.rfile.read(length)
+            rpc = self.path.rsplit("/", 1)[-1]
+            with lock:
+                state["in_flight"] += 1
+                state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+                if rpc == "GetCurrentUser":
+                    state["calls"] += 1
+                call = state["calls"]
+            try:
+                if on_request is not None:
+                    on_request(rpc)
+                time.sleep(delay)
+                status = 200 if rpc in responses else 404
+                if rpc == "GetCurrentUser":
+                    if call <= slow_times:
+                        time.sleep(1.0)
+                    elif call <= slow_times + fail_times:
+                        status = 503
+                body = responses.get(rpc, b"") if status == 200 else b"unavailable"
+            finally:
+                with lock:
+                    state["in_flight"] -= 1
+            self.send_response(status)
+            self.send_header("Content-Type", "application/proto")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(http.server.ThreadingHTTPServer):
+        def handle_error(self, request, client_address):
+            # 客户端超时断开后写响应会失败，忽略
+            pass
+
+    server = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+def _make_client(server, **kwargs) -> AsyncApiClient:
+    """创建指向本地服务器的客户端，Auth Token已缓存，跳过Firebase登录"""
+    cache = TokenCache()
+    for i in range(20):
+        cache.store_auth_token(f"a{i}", f"a{i}@example.com", f"tok-{i}")
+    kwargs.setdefault("backoff_base", 0.01)
+    client = AsyncApiClient(token_cache=cache, **kwargs)
+    client.base_url = f"http://127.0.0.1:{server.server_port}"
+    return client
+
+
+def _accounts(count: int):
+    return [Account(id=f"a{i}", email=f"a{i}@example.com", password="pw") for i in range(count)]
+
+
+def test_sync_accounts_limits_concurrency():
+    """同时进行的登录流程不超过concurrency，protobuf模式下补充计划到期时间"""
+    server, state = _start_server(delay=0.05)
+    loop = EventLoopThread()
+    try:
+        client = _make_client(server)
+        accounts = _accounts(12)
+        results = loop.submit(client.sync_accounts(accounts, concurrency=3)).result(timeout=30)
+        assert len(results) == 12 and all(result.success for result in results)
+        assert state["max_in_flight"] == 3
+        assert all(account.plan_end.startswith("2030-01-01") for account in accounts)
+        assert all(account.api_key == "sk-123" and account.used_prompt_credits == 42 for account in accounts)
+        loop.submit(client.close()).result(timeout=5)
+    finally:
+        loop.stop()
+        server.shutdown()
+
+
+def test_retry_on_5xx():
+    """5xx响应应按退避策略重试直到成功"""
+    server, state = _start_server(fail_times=2)
+    loop = EventLoopThread()
+    try:
+        client = _make_client(server, max_retries=3)
+        account = _accounts(1)[0]
+        assert loop.submit(client.login_and_update_account(account)).result(timeout=10)
+        assert state["calls"] == 3
+        stats = client.get_stats()[f"127.0.0.1:{server.server_port}"]
+        assert stats["retries"] == 2 and stats["errors"] == 0
+        loop.submit(client.close()).result(timeout=5)
+    finally:
+        loop.stop()
+        server.shutdown()
+
+
+def test_retry_exhausted_returns_failure():
+    """重试次数用完仍返回5xx时登录失败，并清除缓存的Auth Token"""
+    server, state = _start_server(fail_times=10)
+    loop = EventLoopThread()
+    try:
+        client = _make_client(server, max_retries=1)
+        account = _accounts(1)[0]
+        # 缓存的Auth Token失效后回退到Firebase登录，账号没有可用的Firebase令牌
+        client.sign_in_with_password = _no_firebase
+        assert not loop.submit(client.login_and_update_account(account)).result(timeout=10)
+        assert state["calls"] == 2
+        assert client.token_cache.valid_auth_token(client.token_cache.get(account.id, account.email)) is None
+        loop.submit(client.close()).result(timeout=5)
+    finally:
+        loop.stop()
+        server.shutdown()
+
+
+async def _no_firebase(email, password):
+    return None
+
+
+def test_retry_on_timeout():
+    """读取超时应计为错误并重试"""
+    server, state = _start_server(slow_times=1)
+    loop = EventLoopThread()
+    try:
+        client = _make_client(server, read_timeout=0.2, max_retries=2)
+        account = _accounts(1)[0]
+        assert loop.submit(client.login_and_update_account(account)).result(timeout=10)
+        assert state["calls"] == 2
+        stats = client.get_stats()[f"127.0.0.1:{server.server_port}"]
+        assert stats["errors"] == 1 and stats["retries"] == 1
+        loop.submit(client.close()).result(timeout=5)
+    finally:
+        loop.stop()
+        server.shutdown()
+
+
+def test_cancel_skips_pending_accounts():
+    """取消后尚未开始的账号直接返回已取消，没有密码的账号不发请求"""
+    cancel_event = threading.Event()
+    server, state = _start_server(on_request=lambda rpc: cancel_event.set())
+    loop = EventLoopThread()
+    try:
+        client = _make_client(server)
+        accounts = _accounts(5)
+        accounts.append(Account(id="nopw", email="nopw@example.com"))
+        seen = []
+        results = loop.submit(client.sync_accounts(
+            accounts, concurrency=1, on_result=seen.append, cancel_event=cancel_event
+        )).result(timeout=10)
+        assert len(results) == len(seen) == 6
+        by_id = {result.account_id: result for result in results}
+        assert by_id["nopw"].error == "未保存密码"
+        assert sum(result.success for result in results) == 1
+        assert sum(result.error == "已取消" for result in results) == 4
+        assert state["calls"] == 1
+        loop.submit(client.close()).result(timeout=5)
+    finally:
+        loop.stop()
+        server.shutdown()
+
+
+def test_close_releases_session_and_loop():
+    """关闭时在事件循环中关闭共享的ClientSession，再停止事件循环线程"""
+    server, _state = _start_server()
+    loop = EventLoopThread()
+    try:
+        client = _make_client(server)
+        assert loop.submit(client.login_and_update_account(_accounts(1)[0])).result(timeout=10)
+        session = client._session
+        assert session is not None and not session.closed
+        loop.close(client.close())
+        assert session.closed and client._session is None
+        assert not loop._thread.is_alive()
+        # 未启动的事件循环直接丢弃清理协程
+        EventLoopThread().close(_make_client(server).close())
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_sync_accounts_limits_concurrency()
+    test_retry_on_5xx()
+    test_retry_exhausted_returns_failure()
+    test_retry_on_timeout()
+    test_cancel_skips_pending_accounts()
+    test_close_releases_session_and_loop()
+    print("异步API客户端测试通过")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+测试按键读取和恢复登录状态
+"""
+import json
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目路径到系统路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from windsurf_account_manager.auth_state import STATE_DB, STORAGE_JSON, apply_auth_state, capture_auth_state
+from windsurf_account_manager.auto_backup import AutoBackupManager
+from windsurf_account_manager.config_snapshot import ConfigSnapshot
+
+
+class _PathManager:
+    def __init__(self, path):
+        self.path = path
+
+    def get_active_path(self):
+        return self.path
+
+
+def _make_config(config: Path, account: str) -> sqlite3.Connection:
+    """模拟已登录某个账号的 Windsurf 配置，另有大量与账号无关的编辑器状态"""
+    db_path = config / STATE_DB
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE ItemTable (key TEXT UNIQUE ON CONFLICT REPLACE, value BLOB)")
+    conn.executemany("INSERT INTO ItemTable VALUES (?, ?)", [
+        ("windsurfAuthStatus", json.dumps({"email": account})),
+        ("codeium.apiKey", f"key-{account}"),
+        (f"secret://codeium.{account}", bytes([0, 1, 2, 255])),
+        ("workbench.panel.state", "editor"),
+    ] + [(f"workbench.view.{i}", "x" * 1000) for i in range(2000)])
+    conn.commit()
+    (config / STORAGE_JSON).write_text(json.dumps({
+        "telemetry.machineId": f"machine-{account}",
+        "windowsState": {"lastActiveWindow": "editor"},
+        "theme": "dark",
+    }), encoding="utf-8")
+    return conn
+
+
+def _items(config: Path):
+    conn = sqlite3.connect(str(config / STATE_DB))
+    try:
+        return dict(conn.execute("SELECT key, value FROM ItemTable WHERE key NOT LIKE 'workbench.view.%'"))
+    finally:
+        conn.close()
+
+
+def test_capture_and_apply_only_touch_matching_keys():
+    """只记录匹配的键；恢复时写入这些键、删除其他账号的键，不改动其他状态"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        first = _make_config(tmp / "first", "a@example.com")
+        state = capture_auth_state(tmp / "first")
+        first.close()
+        assert set(state["item_table"]) == {"windsurfAuthStatus", "codeium.apiKey", "secret://codeium.a@example.com"}
+        assert state["storage"] == {"telemetry.machineId": "machine-a@example.com"}
+        assert len(json.dumps(state)) < 2000
+
+        config = tmp / "live"
+        live = _make_config(config, "b@example.com")
+        live.execute("UPDATE ItemTable SET value = 'changed' WHERE key = 'workbench.panel.state'")
+        live.commit()
+        assert apply_auth_state(config, json.loads(json.dumps(state))) == {STATE_DB: 3, STORAGE_JSON: 1}
+
+        items = _items(config)
+        assert items["codeium.apiKey"] == "key-a@example.com"
+        assert items["secret://codeium.a@example.com"] == bytes([0, 1, 2, 255])
+        assert "secret://codeium.b@example.com" not in items
+        assert items["workbench.panel.state"] == "changed"
+        # 已打开的连接能立即看到恢复结果
+        assert live.execute("SELECT value FROM ItemTable WHERE key = 'codeium.apiKey'").fetchone()[0] == "key-a@example.com"
+        live.close()
+
+        storage = json.loads((config / STORAGE_JSON).read_text(encoding="utf-8"))
+        assert list(storage) == ["telemetry.machineId", "windowsState", "theme"]
+        assert storage["telemetry.machineId"] == "machine-a@example.com"
+
+
+def test_auth_snapshot_mode():
+    """按键模式的快照只有几 KB，切换账号时只恢复登录状态；切回完整模式时清理状态文件"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        config = tmp / "Windsurf"
+        _make_config(config, "a@example.com").close()
+        snapshots = ConfigSnapshot(tmp / "data")
+        manager = AutoBackupManager(_PathManager(config), snapshots, tmp / "backups", enabled=False)
+        manager.set_snapshot_mode("auth")
+        AutoBackupManager(_PathManager(config), snapshots, tmp / "backups", enabled=False)
+        assert snapshots.snapshot_mode == "auth"
+
+        custom = {STATE_DB: ["codeium.*"], STORAGE_JSON: []}
+        assert snapshots.create_snapshot("a", config, auth_key_patterns=custom)
+        assert snapshots.create_snapshot("default", config)
+        snapshot_dir = snapshots.get_account_snapshot_dir("default")
+        metadata = snapshots.get_snapshot("default")
+        assert metadata["format"] == "auth" and metadata["keys"] == 4
+        assert (snapshot_dir / "auth_state.json").stat().st_size < 2000
+        assert snapshots.blob_store.stats()["objects"] == 0
+
+        conn = sqlite3.connect(str(config / STATE_DB))
+        conn.execute("UPDATE ItemTable SET value = 'other' WHERE key IN ('codeium.apiKey', 'windsurfAuthStatus')")
+        conn.commit()
+        conn.close()
+        assert snapshots.restore_snapshot("a", config)
+        items = _items(config)
+        # 自定义模式只恢复 codeium.* 键
+        assert items["codeium.apiKey"] == "key-a@example.com" and items["windsurfAuthStatus"] == "other"
+        assert snapshots.last_copy_stats.strategies == {"auth": 1}
+
+        manager.set_snapshot_mode("files")
+        assert snapshots.create_snapshot("default", config)
+        assert not (snapshot_dir / "auth_state.json").exists()
+
+
+if __name__ == "__main__":
+    test_capture_and_apply_only_touch_matching_keys()
+    test_auth_snapshot_mode()
+    print("登录状态按键快照测试通过")
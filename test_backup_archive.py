@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+测试压缩备份归档
+"""
+import concurrent.futures
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目路径到系统路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from windsurf_account_manager import auto_backup, backup_archive
+from windsurf_account_manager.auto_backup import AutoBackupManager
+from windsurf_account_manager.backup_archive import (
+    ARCHIVE_NAME, FALLBACK_CODEC, available_codecs, extract_files, read_index, read_member, resolve_codec,
+    write_archive
+)
+from windsurf_account_manager.config_snapshot import ConfigSnapshot
+from windsurf_account_manager.models import Account
+
+RELPATHS = ["settings.json", "User/globalStorage/state.vscdb", "missing.json"]
+
+
+class _PathManager:
+    def __init__(self, path):
+        self.path = path
+
+    def get_active_path(self):
+        return self.path
+
+
+def _make_config(base: Path) -> Path:
+    config = base / "Windsurf"
+    (config / "User" / "globalStorage").mkdir(parents=True)
+    (config / "settings.json").write_text('{"theme": "dark"}', encoding="utf-8")
+    (config / "User" / "globalStorage" / "state.vscdb").write_bytes(b"ItemTable" * 200_000)
+    return config
+
+
+def test_round_trip_and_random_access():
+    """各压缩算法写入后可单独读取任一文件，解压恢复内容、修改时间和权限"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        config = _make_config(tmp)
+        os.utime(config / "settings.json", ns=(1_600_000_000_000_000_000, 1_600_000_000_000_000_000))
+
+        with concurrent.futures.ThreadPoolExecutor(2) as pool:
+            for codec in available_codecs():
+                archive = tmp / f"{codec}.wsbak"
+                index = write_archive(archive, config, RELPATHS, {"account_id": "a"}, codec, 1, pool)
+                assert index == read_index(archive)
+                assert index["codec"] == codec and index["metadata"] == {"account_id": "a"}
+                assert list(index["files"]) == RELPATHS[:2]
+                # 压缩后远小于原始大小
+                assert archive.stat().st_size < 1_800_000 // 20
+
+                assert read_member(archive, "settings.json") == b'{"theme": "dark"}'
+
+                target = tmp / f"restore_{codec}"
+                assert extract_files(archive, target, ["User/globalStorage/state.vscdb"]) == ["User/globalStorage/state.vscdb"]
+                assert not (target / "settings.json").exists()
+                extract_files(archive, target)
+                assert (target / "settings.json").stat().st_mtime_ns == 1_600_000_000_000_000_000
+                assert (target / "User/globalStorage/state.vscdb").read_bytes() == b"ItemTable" * 200_000
+
+
+def test_corruption_is_detected():
+    """归档截断或内容损坏时报错"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        config = _make_config(tmp)
+        archive = tmp / "a.wsbak"
+        index = write_archive(archive, config, RELPATHS, codec="gzip")
+
+        data = bytearray(archive.read_bytes())
+        entry = index["files"]["User/globalStorage/state.vscdb"]
+        data[entry["offset"] + entry["length"] // 2] ^= 0xFF
+        archive.write_bytes(bytes(data))
+        _expect_error(lambda: read_member(archive, "User/globalStorage/state.vscdb"))
+
+        archive.write_bytes(bytes(data[:-4]))
+        _expect_error(lambda: read_index(archive))
+
+
+def _expect_error(action):
+    try:
+        action()
+    except Exception:
+        return
+    raise AssertionError("损坏的归档未被发现")
+
+
+def test_failed_write_releases_spools():
+    """写入归档失败时关闭所有压缩结果的临时缓冲，并删除临时归档"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        config = _make_config(tmp)
+        for i in range(6):
+            (config / f"extra{i}.json").write_text("x" * 10_000, encoding="utf-8")
+        relpaths = RELPATHS + [f"extra{i}.json" for i in range(6)]
+        spools = []
+        original_stream, original_copy = backup_archive._compress_stream, backup_archive.shutil.copyfileobj
+
+        def record(*args):
+            spool, entry = original_stream(*args)
+            spools.append(spool)
+            return spool, entry
+
+        def fail(*args):
+            raise OSError("磁盘已满")
+
+        backup_archive._compress_stream = record
+        backup_archive.shutil.copyfileobj = fail
+        try:
+            with concurrent.futures.ThreadPoolExecutor(2) as pool:
+                try:
+                    write_archive(tmp / "a.wsbak", config, relpaths, codec="gzip", executor=pool)
+                    assert False, "写入应当失败"
+                except OSError:
+                    pass
+        finally:
+            backup_archive._compress_stream = original_stream
+            backup_archive.shutil.copyfileobj = original_copy
+        assert spools and all(spool.closed for spool in spools)
+        assert list(tmp.glob("*.wsbak*")) == []
+
+
+def test_unavailable_codec_falls_back_to_gzip():
+    """未安装的或未知的压缩算法回退到 gzip"""
+    assert resolve_codec("unknown") == FALLBACK_CODEC == "gzip"
+    assert resolve_codec("zstd") == ("zstd" if "zstd" in available_codecs() else "gzip")
+
+
+def test_archive_backups_and_snapshots():
+    """归档格式的批量备份只压缩一次，列表和恢复直接读取归档，快照同样支持归档"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        config = _make_config(tmp)
+        snapshots = ConfigSnapshot(tmp / "data")
+        manager = AutoBackupManager(_PathManager(config), snapshots, tmp / "backups", enabled=False)
+        manager.set_backup_format("archive", "gzip", 9)
+        manager = AutoBackupManager(_PathManager(config), snapshots, tmp / "backups", enabled=False)
+        # 不保留恢复日志，只检查快照和备份自身的引用
+        snapshots.restore_journal.max_journals = 0
+        assert (snapshots.backup_format, snapshots.compression, snapshots.compression_level) == ("archive", "gzip", 9)
+
+        accounts = [Account(id=str(i), email=f"u{i}@example.com", has_snapshot=True) for i in range(2)]
+        writes = []
+        original_load, original_write = auto_backup.load_accounts, snapshots.write_archive
+        auto_backup.load_accounts = lambda: accounts
+        snapshots.write_archive = lambda *args: writes.append(args) or original_write(*args)
+        try:
+            manager.backup_all_accounts()
+        finally:
+            auto_backup.load_accounts = original_load
+            snapshots.write_archive = original_write
+
+        assert len(writes) == 1
+        assert sorted(p.name for p in manager.backup_dir.iterdir()) == ["0", "1", "auto_backup_config.json"]
+        backup = manager.list_backups("1")[0]
+        assert backup["format"] == "archive" and backup["compression"] == "gzip"
+        assert backup["archive_size"] < 100_000 and "objects" not in backup
+        assert snapshots.blob_store.stats()["objects"] == 0
+
+        (config / "settings.json").write_text("changed", encoding="utf-8")
+        assert manager.restore_backup("1", backup["backup_name"])
+        assert (config / "settings.json").read_text(encoding="utf-8") == '{"theme": "dark"}'
+
+        # 元数据丢失时从归档索引读取
+        (Path(backup["path"]) / "metadata.json").unlink()
+        recovered = manager.list_backups("1")[0]
+        assert recovered["account_id"] == "1" and recovered["files"] == backup["files"]
+        (config / "settings.json").write_text("changed", encoding="utf-8")
+        assert manager.restore_backup("1", backup["backup_name"])
+        assert (config / "settings.json").read_text(encoding="utf-8") == '{"theme": "dark"}'
+
+        # 元数据和归档都不存在时不能报告恢复成功
+        (Path(backup["path"]) / ARCHIVE_NAME).unlink()
+        (config / "settings.json").write_text("changed", encoding="utf-8")
+        assert manager.list_backups("1") == []
+        assert not manager.restore_backup("1", backup["backup_name"])
+        assert (config / "settings.json").read_text(encoding="utf-8") == "changed"
+        (config / "settings.json").write_text('{"theme": "dark"}', encoding="utf-8")
+
+        assert snapshots.create_snapshot("acc", config)
+        snapshot_dir = snapshots.get_account_snapshot_dir("acc")
+        assert (snapshot_dir / ARCHIVE_NAME).exists()
+        (config / "settings.json").unlink()
+        assert snapshots.restore_snapshot("acc", config)
+        assert (config / "settings.json").exists()
+
+        # 快照元数据丢失时同样从归档索引恢复
+        (snapshot_dir / "metadata.json").unlink()
+        (config / "settings.json").write_text("changed", encoding="utf-8")
+        assert snapshots.restore_snapshot("acc", config)
+        assert (config / "settings.json").read_text(encoding="utf-8") == '{"theme": "dark"}'
+
+        # 切回对象存储后重新快照，删除旧归档
+        manager.set_backup_format("objects")
+        assert snapshots.create_snapshot("acc", config)
+        assert not (snapshot_dir / ARCHIVE_NAME).exists()
+        assert snapshots.blob_store.stats()["objects"] == 2
+
+
+if __name__ == "__main__":
+    test_round_trip_and_random_access()
+    test_corruption_is_detected()
+    test_failed_write_releases_spools()
+    test_unavailable_codec_falls_back_to_gzip()
+    test_archive_backups_and_snapshots()
+    print("备份归档测试通过")
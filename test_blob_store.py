@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+测试内容寻址对象存储、快照和自动备份的去重
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目路径到系统路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from windsurf_account_manager import auto_backup, blob_store
+from windsurf_account_manager.auto_backup import AutoBackupManager
+from windsurf_account_manager.blob_store import BlobStore, capture_files, manifest_digests
+from windsurf_account_manager.config_snapshot import ConfigSnapshot
+from windsurf_account_manager.models import Account
+
+
+class _PathManager:
+    def __init__(self, path):
+        self.path = path
+
+    def get_active_path(self):
+        return self.path
+
+
+def _make_config(base: Path) -> Path:
+    config = base / "Windsurf"
+    (config / "User" / "globalStorage").mkdir(parents=True)
+    (config / "settings.json").write_text('{"theme": "dark"}', encoding="utf-8")
+    (config / "User" / "globalStorage" / "state.vscdb").write_bytes(b"\x00" * 4096)
+    return config
+
+
+def test_same_content_stored_once():
+    """相同内容只保存一个对象，引用计数归零后删除"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        store = BlobStore(tmp / "objects")
+        (tmp / "a").write_bytes(b"same")
+        (tmp / "b").write_bytes(b"same")
+
+        first, size = store.put_file(tmp / "a")
+        second, _ = store.put_file(tmp / "b")
+        assert first == second and size == 4
+        assert store.refcount(first) == 2
+        assert store.stats() == {"objects": 1, "bytes": 4}
+        assert list((tmp / "objects" / "tmp").iterdir()) == []
+
+        assert store.decref([first]) == 0 and store.exists(first)
+        assert store.decref([first]) == 1 and not store.exists(first)
+
+        # 引用计数持久化
+        digest = store.put_bytes(b"kept")
+        assert BlobStore(tmp / "objects").refcount(digest) == 1
+
+
+def test_capture_writes_refs_once():
+    """一次读取多个文件只写入一次引用计数，写入后重新加载一致"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        base = tmp / "config"
+        base.mkdir()
+        relpaths = [f"file{i}.json" for i in range(20)]
+        for i, relpath in enumerate(relpaths):
+            (base / relpath).write_text(str(i), encoding="utf-8")
+        store = BlobStore(tmp / "objects")
+        writes = []
+        original = store._write_refs
+        store._write_refs = lambda: writes.append(1) or original()
+
+        manifest = capture_files(store, base, relpaths)
+        assert len(writes) == 1
+        capture_files(store, base, relpaths, manifest)
+        assert len(writes) == 2
+        with store.batch():
+            store.decref(manifest_digests(manifest))
+            store.decref(manifest_digests(manifest))
+        assert len(writes) == 3
+        assert BlobStore(tmp / "objects").stats()["objects"] == 0
+
+
+def test_snapshot_round_trip_and_delete():
+    """快照保存清单，恢复内容和修改时间，删除后释放对象"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        config = _make_config(tmp)
+        settings = config / "settings.json"
+        os.utime(settings, ns=(1_600_000_000_000_000_000, 1_600_000_000_000_000_000))
+
+        snapshots = ConfigSnapshot(tmp / "data")
+        # 不保留恢复日志，只检查快照和备份自身的引用
+        snapshots.restore_journal.max_journals = 0
+        assert snapshots.create_snapshot("acc", config)
+        assert snapshots.create_snapshot("other", config)
+        metadata = snapshots.get_snapshot("acc")
+        assert set(metadata["files"]) == {"settings.json", "User/globalStorage/state.vscdb"}
+        assert not (tmp / "data" / "snapshots" / "acc" / "settings.json").exists()
+        assert snapshots.blob_store.stats()["objects"] == 2
+
+        settings.write_text("changed", encoding="utf-8")
+        assert snapshots.restore_snapshot("acc", config)
+        assert settings.read_text(encoding="utf-8") == '{"theme": "dark"}'
+        assert settings.stat().st_mtime_ns == 1_600_000_000_000_000_000
+
+        digests = manifest_digests(metadata["objects"])
+        assert snapshots.delete_snapshot("acc")
+        assert all(snapshots.blob_store.refcount(d) == 1 for d in digests)
+        assert snapshots.delete_snapshot("other")
+        assert snapshots.blob_store.stats()["objects"] == 0
+
+
+def test_backup_sweep_captures_once():
+    """批量备份只读取一次配置，各账号备份引用同一批对象"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        config = _make_config(tmp)
+        snapshots = ConfigSnapshot(tmp / "data")
+        # 不保留恢复日志，只检查快照和备份自身的引用
+        snapshots.restore_journal.max_journals = 0
+        manager = AutoBackupManager(_PathManager(config), snapshots, tmp / "backups", enabled=False)
+
+        accounts = [Account(id=str(i), email=f"u{i}@example.com", has_snapshot=True) for i in range(3)]
+        captures = []
+        original_load, original_capture = auto_backup.load_accounts, auto_backup.capture_files
+        auto_backup.load_accounts = lambda: accounts
+        auto_backup.capture_files = lambda *args: captures.append(args) or original_capture(*args)
+        try:
+            manager.backup_all_accounts()
+        finally:
+            auto_backup.load_accounts, auto_backup.capture_files = original_load, original_capture
+
+        assert len(captures) == 1
+        store = snapshots.blob_store
+        backups = manager.list_backups("0")
+        assert len(backups) == 1
+        digests = manifest_digests(backups[0]["objects"])
+        assert all(store.refcount(d) == 3 for d in digests)
+
+        (config / "settings.json").write_text("changed", encoding="utf-8")
+        assert manager.restore_backup("0", backups[0]["backup_name"])
+        assert (config / "settings.json").read_text(encoding="utf-8") == '{"theme": "dark"}'
+
+        assert manager.delete_backup("0", backups[0]["backup_name"])
+        assert all(store.refcount(d) == 2 for d in digests)
+
+
+def test_incremental_capture_skips_unchanged_files():
+    """stat 未变化的文件不读取；只改修改时间时只计算哈希；内容变化时才存入新对象"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        config = _make_config(tmp)
+        store = BlobStore(tmp / "objects")
+        relpaths = ["settings.json", "User/globalStorage/state.vscdb", "missing.json"]
+        first = capture_files(store, config, relpaths)
+
+        hashed, stored = [], []
+        original_hash, original_put = blob_store.hash_file, store.put_file
+        blob_store.hash_file = lambda path: hashed.append(path.name) or original_hash(path)
+        store.put_file = lambda path: stored.append(path.name) or original_put(path)
+        try:
+            second = capture_files(store, config, relpaths, first)
+            assert second == first and hashed == [] and stored == []
+            assert all(store.refcount(d) == 2 for d in manifest_digests(first))
+
+            state = config / "User" / "globalStorage" / "state.vscdb"
+            os.utime(state, ns=(1_600_000_000_000_000_000, 1_600_000_000_000_000_000))
+            third = capture_files(store, config, relpaths, second)
+            assert hashed == ["state.vscdb"] and stored == []
+            assert third["User/globalStorage/state.vscdb"]["digest"] == first["User/globalStorage/state.vscdb"]["digest"]
+            assert third["User/globalStorage/state.vscdb"]["mtime_ns"] == 1_600_000_000_000_000_000
+
+            (config / "settings.json").write_text('{"theme": "light!"}', encoding="utf-8")
+            fourth = capture_files(store, config, relpaths, third)
+            assert stored == ["settings.json"]
+            assert fourth["settings.json"]["digest"] != first["settings.json"]["digest"]
+        finally:
+            blob_store.hash_file = original_hash
+
+        # 上一次清单引用的对象已被删除时重新存入
+        store.decref(manifest_digests(first) * 4)
+        fifth = capture_files(store, config, relpaths, first)
+        assert all(store.exists(d) for d in manifest_digests(fifth))
+
+
+def test_no_change_backup_sweep_reads_nothing():
+    """配置未变化时再次批量备份不读取文件内容，新备份引用原有对象"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        config = _make_config(tmp)
+        snapshots = ConfigSnapshot(tmp / "data")
+        manager = AutoBackupManager(_PathManager(config), snapshots, tmp / "backups", enabled=False)
+        accounts = [Account(id=str(i), email=f"u{i}@example.com", has_snapshot=True) for i in range(3)]
+
+        original_load = auto_backup.load_accounts
+        auto_backup.load_accounts = lambda: accounts
+        try:
+            manager.backup_all_accounts()
+            # 新的管理器没有内存缓存，从磁盘上的最新备份读取清单
+            manager = AutoBackupManager(_PathManager(config), snapshots, tmp / "backups", enabled=False)
+            stored = []
+            original_put = snapshots.blob_store.put_file
+            snapshots.blob_store.put_file = lambda path: stored.append(path) or original_put(path)
+            manager.backup_all_accounts()
+            manager.backup_all_accounts()
+        finally:
+            auto_backup.load_accounts = original_load
+
+        assert stored == []
+        backups = manager.list_backups("0")
+        assert len(backups) == 3 and len({b["backup_name"] for b in backups}) == 3
+        digests = manifest_digests(backups[0]["objects"])
+        assert all(snapshots.blob_store.refcount(d) == 9 for d in digests)
+        assert snapshots.blob_store.stats()["objects"] == 2
+
+
+if __name__ == "__main__":
+    test_same_content_stored_once()
+    test_capture_writes_refs_once()
+    test_snapshot_round_trip_and_delete()
+    test_backup_sweep_captures_once()
+    test_incremental_capture_skips_unchanged_files()
+    test_no_change_backup_sweep_reads_nothing()
+    print("对象存储测试通过")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+测试批量同步引擎的并发流水线和结果回调
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+# 添加项目路径到系统路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from windsurf_account_manager.api_client import ApiClient
+from windsurf_account_manager.bulk_sync import BulkSyncEngine
+from windsurf_account_manager.models import Account
+
+
+class FakeClient(ApiClient):
+    """不发起网络请求的API客户端，每个阶段固定耗时"""
+
+    def __init__(self, delay: float = 0.02) -> None:
+        super().__init__()
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def _enter(self):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+
+    def sign_in_with_password(self, email, password):
+        self._enter()
+        if password == "bad":
+            return None
+        return {"idToken": f"id-{email}", "refreshToken": f"refresh-{email}", "expiresIn": "3600"}
+
+    def get_auth_token(self, firebase_id_token):
+        self._enter()
+        return f"auth-{firebase_id_token}"
+
+    def get_current_user(self, auth_token):
+        self._enter()
+        return {
+            "user": {"api_key": f"key-{auth_token}"},
+            "plan_info": {"plan_name": "Pro"},
+            "plan_status": {"plan_end": "2030-01-01T00:00:00Z", "used_prompt_credits": 1, "used_flow_credits": 2},
+        }
+
+
+def test_bulk_sync_concurrency_and_results():
+    """所有账号都应返回结果，且并发数不超过max_workers"""
+    accounts = [Account(id=str(i), email=f"user{i}@example.com", password="pw") for i in range(40)]
+    accounts.append(Account(id="bad", email="bad@example.com", password="bad"))
+    accounts.append(Account(id="nopw", email="nopw@example.com"))
+
+    client = FakeClient()
+    engine = BulkSyncEngine(client, max_workers=8)
+    streamed = []
+
+    started = time.perf_counter()
+    results = engine.sync(accounts, on_result=streamed.append)
+    elapsed = time.perf_counter() - started
+
+    assert len(results) == len(accounts)
+    assert streamed == results
+    assert client.max_in_flight <= 8
+    # 顺序执行需要 40 * 3 * 0.02 = 2.4 秒
+    assert elapsed < 1.5
+
+    by_id = {r.account_id: r for r in results}
+    assert by_id["bad"].success is False
+    assert by_id["nopw"].error == "未保存密码"
+    assert all(by_id[str(i)].success for i in range(40))
+    assert accounts[0].plan_name == "Pro"
+    assert accounts[0].api_key == "key-auth-id-user0@example.com"
+
+
+def test_bulk_resync_uses_cached_auth_token():
+    """再次同步时应直接使用缓存的Auth Token，只请求GetCurrentUser"""
+    accounts = [Account(id=str(i), email=f"user{i}@example.com", password="pw") for i in range(5)]
+    client = FakeClient(delay=0)
+    engine = BulkSyncEngine(client, max_workers=4)
+    engine.sync(accounts)
+
+    calls = []
+    original = client.get_current_user
+    client.sign_in_with_password = lambda *a: calls.append("sign_in")
+    client.get_auth_token = lambda *a: calls.append("auth")
+    client.get_current_user = lambda token: calls.append("user") or original(token)
+
+    results = engine.sync(accounts)
+    assert all(r.success for r in results)
+    assert calls == ["user"] * 5
+
+
+if __name__ == "__main__":
+    test_bulk_sync_concurrency_and_results()
+    test_bulk_resync_uses_cached_auth_token()
+    print("批量同步测试通过")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+测试并行文件复制引擎
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# 添加项目路径到系统路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from windsurf_account_manager.blob_store import BlobStore, capture_files
+from windsurf_account_manager.config_snapshot import ConfigSnapshot
+from windsurf_account_manager.copy_engine import CopyEngine
+
+
+def test_copy_preserves_metadata_and_aggregates_stats():
+    """复制保留修改时间和权限，统计汇总字节数和文件数"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        pairs = []
+        for i in range(5):
+            src = tmp / "src" / f"f{i}"
+            src.parent.mkdir(exist_ok=True)
+            src.write_bytes(os.urandom(100_000 + i))
+            os.chmod(src, 0o640)
+            os.utime(src, ns=(1_600_000_000_000_000_000 + i, 1_600_000_000_000_000_000 + i))
+            pairs.append((src, tmp / "dst" / "nested" / f"f{i}"))
+
+        engine = CopyEngine(max_workers=3, buffer_size=64 * 1024)
+        stats = engine.copy_files(pairs).to_dict()
+        engine.close()
+        assert stats["files"] == 5 and stats["bytes"] == 500_010 and stats["errors"] == 0
+        assert stats["max_seconds"] >= stats["avg_seconds"] >= stats["min_seconds"] > 0
+        for src, dst in pairs:
+            assert dst.read_bytes() == src.read_bytes()
+            assert dst.stat().st_mtime_ns == src.stat().st_mtime_ns
+            assert dst.stat().st_mode & 0o777 == 0o640
+
+
+def test_tasks_overlap_and_errors_wait_for_all():
+    """任务并发执行；失败时等待其余任务结束后再抛出"""
+    engine = CopyEngine(max_workers=4)
+    running, peak, finished = [0], [0], []
+    lock = threading.Lock()
+
+    def task(i):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+            finished.append(i)
+        if i == 0:
+            raise OSError("磁盘已满")
+        return 1
+
+    try:
+        engine.run([lambda i=i: task(i) for i in range(4)])
+    except OSError:
+        pass
+    else:
+        raise AssertionError("复制失败未被报告")
+    assert peak[0] > 1 and sorted(finished) == [0, 1, 2, 3]
+    assert engine.map(lambda x: x * 2, [3, 1, 2]) == [6, 2, 4]
+    engine.close()
+
+
+def test_parallel_capture_and_multi_path_restore():
+    """并行读取的清单与顺序读取一致，快照可一次恢复到多个配置路径"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        config = tmp / "Windsurf"
+        relpaths = [f"User/file{i}.json" for i in range(6)]
+        for relpath in relpaths:
+            (config / relpath).parent.mkdir(parents=True, exist_ok=True)
+            (config / relpath).write_text(relpath, encoding="utf-8")
+
+        store = BlobStore(tmp / "objects")
+        assert capture_files(store, config, relpaths, engine=CopyEngine(3)) == capture_files(store, config, relpaths)
+
+        snapshots = ConfigSnapshot(tmp / "data")
+        snapshots.config_files = relpaths
+        assert snapshots.create_snapshot("acc", config)
+        targets = [tmp / "a" / "Windsurf", tmp / "b" / "Windsurf"]
+        assert snapshots.restore_snapshot_to_paths("acc", targets)
+        for target in targets:
+            assert all((target / relpath).read_text(encoding="utf-8") == relpath for relpath in relpaths)
+        assert snapshots.last_copy_stats.files == 12
+
+
+if __name__ == "__main__":
+    test_copy_preserves_metadata_and_aggregates_stats()
+    test_tasks_overlap_and_errors_wait_for_all()
+    test_parallel_capture_and_multi_path_restore()
+    print("复制引擎测试通过")
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+测试文件复制策略的选择和回退
+"""
+import errno
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目路径到系统路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from windsurf_account_manager import copy_strategies
+from windsurf_account_manager.blob_store import BlobStore
+from windsurf_account_manager.copy_engine import CopyEngine
+from windsurf_account_manager.copy_strategies import (
+    DEFAULT_STRATEGIES, STRATEGY_BUFFERED, STRATEGY_COPY_FILE_RANGE, STRATEGY_HARDLINK, STRATEGY_REFLINK,
+    STRATEGY_SENDFILE, fast_copy, reset_unsupported
+)
+
+
+def _source(tmp: Path) -> Path:
+    src = tmp / "state.vscdb"
+    src.write_bytes(os.urandom(3 * 1024 * 1024 + 17))
+    os.utime(src, ns=(1_600_000_000_000_000_000, 1_600_000_000_000_000_000))
+    return src
+
+
+def test_every_strategy_copies_identically():
+    """每种策略单独使用时（不支持的除外）内容和元数据都与源文件一致"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        src = _source(tmp)
+        reset_unsupported()
+        used = set()
+        for strategy in DEFAULT_STRATEGIES:
+            dst = tmp / f"copy_{strategy}"
+            try:
+                size, taken = fast_copy(src, dst, 256 * 1024, strategies=(strategy,))
+            except OSError as e:
+                assert e.errno == errno.ENOTSUP and strategy != STRATEGY_BUFFERED
+                continue
+            used.add(taken)
+            assert taken == strategy and size == src.stat().st_size
+            assert dst.read_bytes() == src.read_bytes()
+            assert dst.stat().st_mtime_ns == src.stat().st_mtime_ns
+        assert STRATEGY_BUFFERED in used
+
+
+def test_unsupported_strategy_falls_back_and_is_remembered():
+    """策略报告不支持时清空目标、回退到下一个，并且之后不再尝试"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        src = _source(tmp)
+        reset_unsupported()
+        calls = []
+
+        def failing(fsrc, fdst, buffer_size):
+            calls.append(1)
+            fdst.write(b"partial")
+            raise OSError(errno.EXDEV, "跨设备")
+
+        original = copy_strategies._COPIERS[STRATEGY_REFLINK]
+        copy_strategies._COPIERS[STRATEGY_REFLINK] = failing
+        try:
+            for name in ("a", "b"):
+                size, taken = fast_copy(src, tmp / name)
+                assert taken != STRATEGY_REFLINK and (tmp / name).read_bytes() == src.read_bytes()
+            assert calls == [1]
+        finally:
+            copy_strategies._COPIERS[STRATEGY_REFLINK] = original
+            reset_unsupported()
+
+
+def test_kernel_copy_returning_zero_falls_back():
+    """内核复制在文件开头返回 0 时回退到缓冲区复制，不留下空的目标文件，也不记录为不支持"""
+    if not hasattr(os, "copy_file_range") or not hasattr(os, "sendfile"):
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        src = _source(tmp)
+        reset_unsupported()
+        original_range, original_sendfile = os.copy_file_range, os.sendfile
+        os.copy_file_range = lambda *args: 0
+        os.sendfile = lambda *args: 0
+        try:
+            strategies = (STRATEGY_COPY_FILE_RANGE, STRATEGY_SENDFILE, STRATEGY_BUFFERED)
+            size, taken = fast_copy(src, tmp / "copy", strategies=strategies)
+            assert taken == STRATEGY_BUFFERED and size == src.stat().st_size
+            assert (tmp / "copy").read_bytes() == src.read_bytes()
+            assert copy_strategies._unsupported == set()
+        finally:
+            os.copy_file_range, os.sendfile = original_range, original_sendfile
+
+        # 空文件同样可以复制
+        (tmp / "empty").write_bytes(b"")
+        assert fast_copy(tmp / "empty", tmp / "empty_copy")[0] == 0
+        assert (tmp / "empty_copy").read_bytes() == b""
+
+
+def test_unsupported_is_keyed_on_both_devices():
+    """不支持的记录同时区分源和目标设备"""
+    reset_unsupported()
+    try:
+        copy_strategies._mark_unsupported(STRATEGY_COPY_FILE_RANGE, (1, 2))
+        assert copy_strategies._is_unsupported(STRATEGY_COPY_FILE_RANGE, (1, 2))
+        assert not copy_strategies._is_unsupported(STRATEGY_COPY_FILE_RANGE, (2, 2))
+    finally:
+        reset_unsupported()
+
+
+def test_hardlink_mode_and_reported_strategies():
+    """硬链接模式共享同一个 inode，复制引擎统计各策略的使用次数"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        src = _source(tmp)
+        dst = tmp / "backups" / "files.wsbak"
+        dst.parent.mkdir()
+        dst.write_bytes(b"old")
+        size, taken = fast_copy(src, dst, allow_hardlink=True)
+        assert taken == STRATEGY_HARDLINK and dst.stat().st_ino == src.stat().st_ino
+
+        engine = CopyEngine(2)
+        stats = engine.copy_files([(src, tmp / "x"), (src, tmp / "y")]).to_dict()
+        engine.close()
+        assert sum(stats["strategies"].values()) == 2 and STRATEGY_HARDLINK not in stats["strategies"]
+
+        # 对象存储恢复到配置目录时绝不使用硬链接
+        store = BlobStore(tmp / "objects")
+        digest, _ = store.put_file(src)
+        assert store.copy_to(digest, tmp / "restored") != STRATEGY_HARDLINK
+        assert (tmp / "restored").stat().st_ino != store.path_for(digest).stat().st_ino
+
+
+if __name__ == "__main__":
+    test_every_strategy_copies_identically()
+    test_unsupported_strategy_falls_back_and_is_remembered()
+    test_kernel_copy_returning_zero_falls_back()
+    test_unsupported_is_keyed_on_both_devices()
+    test_hardlink_mode_and_reported_strategies()
+    print("复制策略测试通过")
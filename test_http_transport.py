@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+测试HTTP传输层的重试退避和耗时统计
+"""
+import sys
+import threading
+import http.server
+from pathlib import Path
+
+# 添加项目路径到系统路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from windsurf_account_manager.http_transport import HttpTransport, RetryPolicy
+
+
+def _start_server(fail_times: int):
+    """启动本地测试服务器，前fail_times次请求返回503"""
+    calls = {"count": 0}
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            calls["count"] += 1
+            length = int(self.headers.get("Content-Length", 0))
+            self.rfile.read(length)
+            body = b'{"ok": true}'
+            self.send_response(503 if calls["count"] <= fail_times else 200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, calls
+
+
+def test_retry_on_5xx():
+    """5xx响应应按退避策略重试直到成功"""
+    server, calls = _start_server(fail_times=2)
+    try:
+        transport = HttpTransport(backoff_base=0.01, max_retries=3)
+        url = f"http://127.0.0.1:{server.server_port}/rpc"
+        response = transport.post(url, json={})
+        assert response.status_code == 200
+        assert calls["count"] == 3
+
+        stats = transport.get_stats()[f"http://127.0.0.1:{server.server_port}"]
+        assert stats["count"] == 3
+        assert stats["retries"] == 2
+        transport.close()
+    finally:
+        server.shutdown()
+
+
+def test_retry_exhausted_returns_last_response():
+    """重试次数用尽后返回最后一次的5xx响应"""
+    server, calls = _start_server(fail_times=10)
+    try:
+        transport = HttpTransport(backoff_base=0.01, max_retries=1)
+        url = f"http://127.0.0.1:{server.server_port}/rpc"
+        response = transport.post(url, json={})
+        assert response.status_code == 503
+        assert calls["count"] == 2
+        transport.close()
+    finally:
+        server.shutdown()
+
+
+def test_retry_policy():
+    """只重试5xx和连接错误，重试次数用完后不再重试，退避时间不超过上限"""
+    policy = RetryPolicy(max_retries=2, backoff_base=1.0, backoff_max=3.0)
+    assert policy.should_retry(0, 503)
+    assert policy.should_retry(1)
+    assert not policy.should_retry(0, 404)
+    assert not policy.should_retry(2, 503)
+    assert not policy.should_retry(2)
+    for attempt in range(6):
+        assert 0 <= policy.delay(attempt) <= min(3.0, 2 ** attempt)
+
+
+if __name__ == "__main__":
+    test_retry_on_5xx()
+    test_retry_exhausted_returns_last_response()
+    test_retry_policy()
+    print("HTTP传输层测试通过")
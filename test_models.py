@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+测试数据模型的 __slots__ 布局和字符串驻留
+"""
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目路径到系统路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from windsurf_account_manager import mcp_rules
+from windsurf_account_manager.models import Account, McpServerConfig, RuleConfig
+
+
+def test_account_has_no_instance_dict_and_interns_plan():
+    """账号不应有 __dict__，相同的计划名称应共享同一个字符串对象"""
+    first = Account(id="a1", email="a@example.com", plan_name="".join(["Pro", " Trial"]))
+    second = Account(id="a2", email="b@example.com", plan_name="".join(["Pro ", "Trial"]))
+    if sys.version_info >= (3, 10):
+        assert not hasattr(first, "__dict__")
+        try:
+            first.unknown = 1
+        except AttributeError:
+            pass
+        else:
+            raise AssertionError("__slots__ 账号不应允许新增属性")
+    assert first.plan_name is second.plan_name
+
+
+def test_mcp_and_rules_round_trip():
+    """MCP 和 Rules 配置保存后应能原样加载"""
+    servers = [McpServerConfig(id="s1", name="fs", command="npx", args=["-y"], env={"A": "1"})]
+    rules = [RuleConfig(id="r1", prompt="保持简洁")]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        mcp_path = Path(temp_dir) / "mcp.json"
+        rules_path = Path(temp_dir) / "rules.json"
+        mcp_rules.save_mcp_config(mcp_path, servers)
+        mcp_rules.save_rules(rules_path, rules)
+        assert json.loads(mcp_path.read_text(encoding="utf-8"))[0]["env"] == {"A": "1"}
+        assert mcp_rules.load_mcp_config(mcp_path) == servers
+        assert mcp_rules.load_rules(rules_path) == rules
+
+
+if __name__ == "__main__":
+    test_account_has_no_instance_dict_and_interns_plan()
+    test_mcp_and_rules_round_trip()
+    print("数据模型测试通过")
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+测试 .proto 解析器和 __slots__ 消息类生成
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目路径到系统路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from windsurf_account_manager import proto_codegen
+from windsurf_account_manager import protobuf_wire as pw
+
+SAMPLE_PROTO = '''
+syntax = "proto3";
+package demo.v1;
+
+import "google/protobuf/timestamp.proto";
+
+// 注释应被忽略
+enum Tier {
+  TIER_UNSPECIFIED = 0;
+  TIER_PRO = 2;
+}
+
+message Item {
+  string name = 1 [json_name = "name"];
+  repeated int64 counts = 2;
+  Tier tier = 3;
+  map<string, Item> children = 4;
+  optional bool enabled = 5;
+  oneof choice {
+    string text = 6;
+    sint32 delta = 7;
+  }
+  google.protobuf.Timestamp created_at = 8;
+  reserved 9, 10;
+  double ratio = 11;
+  message Inner { bytes data = 1; }
+  Inner inner = 12;
+}
+'''
+
+
+def _load_sample(temp_dir, extra=""):
+    proto_path = Path(temp_dir) / "demo.proto"
+    proto_path.write_text(SAMPLE_PROTO + extra, encoding="utf-8")
+    return proto_codegen.load_proto_module([proto_path], cache_dir=Path(temp_dir) / "cache")
+
+
+def test_generated_classes_round_trip():
+    """生成的消息类应使用__slots__，并能往返编解码"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        module = _load_sample(temp_dir)
+        Item = module.Item
+        assert not hasattr(Item(), "__dict__")
+        assert module.Tier.TIER_PRO == 2
+
+        item = Item(
+            name="root",
+            counts=[1, -5, 300],
+            tier=module.Tier.TIER_PRO,
+            children={"a": Item(name="child")},
+            enabled=False,
+            delta=-3,
+            created_at=module.Timestamp(seconds=1893456000),
+            ratio=0.25,
+            inner=module.Item_Inner(data=b"\x00\x01"),
+        )
+        data = item.encode()
+        decoded = Item.decode(data)
+        assert decoded == item
+        # optional 和 oneof 字段即使是默认值也要保留"已设置"状态
+        assert decoded.enabled is False
+        assert decoded.text is None
+        assert decoded.children["a"].name == "child"
+
+        # 与手写的线格式编码保持一致，repeated 数值字段使用 packed 编码
+        fields = {num: value for num, _wt, value in pw.iter_fields(data)}
+        assert pw.decode_string(fields[1]) == "root"
+        assert [pw.to_int64(v) for v in pw.decode_packed_varints(fields[2])] == [1, -5, 300]
+
+
+def test_cached_module_is_reused():
+    """proto未变化时应直接复用缓存模块"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # 追加注释使源文件哈希不同于其他用例
+        first = _load_sample(temp_dir, "// cache test\n")
+        cached = list((Path(temp_dir) / "cache").glob("*.py"))
+        assert len(cached) == 1
+        assert _load_sample(temp_dir, "// cache test\n") is first
+
+        # 新进程中磁盘缓存存在时只读取源码计算哈希，不再解析
+        sys.modules.pop(first.__name__)
+        parsed = []
+        original = proto_codegen.parse_proto
+        proto_codegen.parse_proto = lambda *args: parsed.append(args) or original(*args)
+        try:
+            reloaded = _load_sample(temp_dir, "// cache test\n")
+        finally:
+            proto_codegen.parse_proto = original
+        assert parsed == [] and reloaded is not first and reloaded.__name__ == first.__name__
+
+
+def test_bundled_get_current_user_response():
+    """项目自带的proto应能生成GetCurrentUserResponse并解码真实线格式数据"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        module = proto_codegen.load_bundled_messages(cache_dir=Path(temp_dir))
+        response_cls = module.MESSAGES["exa.seat_management_pb.GetCurrentUserResponse"]
+
+        user = pw.encode_string_field(1, "sk-123") + pw.encode_string_field(3, "a@example.com")
+        plan_info = pw.encode_varint_field(1, 2) + pw.encode_string_field(2, "Pro")
+        data = (
+            pw.encode_bytes_field(1, user)
+            + pw.encode_string_field(2, "admin")
+            + pw.encode_bytes_field(6, plan_info)
+            + pw.encode_varint_field(999, 7)  # 未知字段应被跳过
+        )
+        response = response_cls.decode(data)
+        assert response.user.api_key == "sk-123"
+        assert response.user.email == "a@example.com"
+        assert response.plan_info.plan_name == "Pro"
+        assert response.roles == ["admin"]
+        assert response.team is None
+
+
+def test_syntax_error_reports_location():
+    """无法解析的语句应抛出ProtoSyntaxError"""
+    try:
+        proto_codegen.parse_proto("message A { string a = ; }")
+    except proto_codegen.ProtoSyntaxError:
+        return
+    raise AssertionError("语法错误未报错")
+
+
+if __name__ == "__main__":
+    test_generated_classes_round_trip()
+    test_cached_module_is_reused()
+    test_bundled_get_current_user_response()
+    test_syntax_error_reports_location()
+    print("proto代码生成测试通过")
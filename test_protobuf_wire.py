@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+测试纯Python protobuf线格式编解码
+"""
+import sys
+import threading
+import http.server
+from pathlib import Path
+
+# 添加项目路径到系统路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from windsurf_account_manager import protobuf_wire as pw
+
+
+def test_varint_and_zigzag():
+    """varint、负数补码和zigzag应能往返编解码"""
+    for value in (0, 1, 127, 128, 300, 2 ** 32, 2 ** 63 - 1):
+        decoded, pos = pw.decode_varint(memoryview(pw.encode_varint(value)), 0)
+        assert decoded == value
+    # int64 负数占10个字节
+    encoded = pw.encode_varint(-1)
+    assert len(encoded) == 10
+    assert pw.to_int64(pw.decode_varint(memoryview(encoded), 0)[0]) == -1
+    for value in (0, -1, 1, -64, 2 ** 40, -(2 ** 40)):
+        assert pw.zigzag_decode(pw.zigzag_encode(value)) == value
+    assert pw.zigzag_encode(-1) == 1
+    assert pw.zigzag_encode(1) == 2
+
+
+def test_packed_and_fixed_fields():
+    """packed repeated和fixed字段应能正确解码"""
+    data = (
+        pw.encode_packed_varints(1, [1, 300, 70000])
+        + pw.encode_packed_fixed32(2, [7, 0xFFFFFFFF])
+        + pw.encode_packed_fixed64(3, [2 ** 40])
+        + pw.encode_fixed32_field(4, 5)
+        + pw.encode_double_field(5, 1.5)
+    )
+    fields = {num: value for num, _wt, value in pw.iter_fields(data)}
+    assert pw.decode_packed_varints(fields[1]) == [1, 300, 70000]
+    assert pw.decode_packed_fixed32(fields[2]) == [7, 0xFFFFFFFF]
+    assert pw.decode_packed_fixed64(fields[3]) == [2 ** 40]
+    assert fields[4] == 5
+    assert pw.decode_double(fields[5]) == 1.5
+
+
+def test_get_current_user_request_encoding():
+    """GetCurrentUserRequest应按字段号编码，默认值不输出"""
+    data = pw.encode_get_current_user_request("tok")
+    assert data == b"\x0a\x03tok\x10\x01\x18\x01\x20\x01"
+    assert pw.encode_get_one_time_auth_token_request("abc") == b"\x0a\x03abc"
+
+
+def _build_current_user_response() -> bytes:
+    timestamp = pw.encode_varint_field(1, 1893456000)  # 2030-01-01T00:00:00Z
+    user = (
+        pw.encode_string_field(1, "sk-123")
+        + pw.encode_string_field(3, "a@example.com")
+        + pw.encode_bytes_field(27, timestamp)
+        + pw.encode_varint_field(28, 1500)
+        + pw.encode_varint_field(29, 20)
+    )
+    plan_info = pw.encode_varint_field(1, 2) + pw.encode_string_field(2, "Pro")
+    team = pw.encode_string_field(1, "x" * 1000)
+    return (
+        pw.encode_bytes_field(1, user)
+        + pw.encode_string_field(2, "admin")
+        + pw.encode_bytes_field(4, team)
+        + pw.encode_bytes_field(6, plan_info)
+    )
+
+
+def test_decode_get_current_user_response():
+    """GetCurrentUserResponse应解码出账号管理需要的字段"""
+    data = _build_current_user_response()
+    result = pw.decode_get_current_user_response(memoryview(data))
+    assert result["user"]["api_key"] == "sk-123"
+    assert result["user"]["used_prompt_credits"] == 1500
+    assert result["user"]["used_flow_credits"] == 20
+    assert result["user"]["windsurf_pro_trial_end_time"].startswith("2030-01-01T00:00:00")
+    assert result["plan_info"] == {"teams_tier": 2, "plan_name": "Pro"}
+    assert result["roles"] == ["admin"]
+
+
+def test_decode_plan_status():
+    """PlanStatus应解码出计划到期时间和额度"""
+    end = pw.encode_varint_field(1, 1893456000)
+    data = (
+        pw.encode_bytes_field(1, pw.encode_string_field(2, "Trial"))
+        + pw.encode_bytes_field(3, end)
+        + pw.encode_varint_field(5, 3)
+        + pw.encode_varint_field(6, 42)
+    )
+    result = pw.decode_plan_status(data)
+    assert result["plan_info"]["plan_name"] == "Trial"
+    assert result["plan_end"].startswith("2030-01-01")
+    assert result["used_flow_credits"] == 3
+    assert result["used_prompt_credits"] == 42
+
+
+def test_get_plan_status_response_encoding():
+    """GetPlanStatus请求只包含auth_token，响应的额度字段缺失时为0"""
+    assert pw.encode_get_plan_status_request("tok") == b"\x0a\x03tok"
+    end = pw.encode_varint_field(1, 1893456000)
+    result = pw.decode_get_plan_status_response(pw.encode_bytes_field(1, pw.encode_bytes_field(3, end)))
+    assert result["plan_status"]["plan_end"].startswith("2030-01-01")
+    assert result["plan_status"]["used_prompt_credits"] == 0
+    assert pw.decode_get_plan_status_response(b"") == {}
+
+
+def _start_proto_server():
+    """启动本地测试服务器，按路径返回GetCurrentUser和GetPlanStatus的protobuf响应"""
+    end = pw.encode_varint_field(1, 1893456000)
+    plan_status = pw.encode_bytes_field(3, end) + pw.encode_varint_field(6, 42)
+    responses = {
+        "GetCurrentUser": _build_current_user_response(),
+        "GetPlanStatus": pw.encode_bytes_field(1, plan_status),
+    }
+    calls = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            self.rfile.read(length)
+            rpc = self.path.rsplit("/", 1)[-1]
+            calls.append((rpc, self.headers.get("Content-Type")))
+            body = responses.get(rpc, b"")
+            self.send_response(200 if rpc in responses else 404)
+            self.send_header("Content-Type", "application/proto")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, calls
+
+
+def test_protobuf_login_fills_plan_end():
+    """protobuf模式登录时通过GetPlanStatus补充计划到期时间"""
+    from windsurf_account_manager.api_client import ApiClient
+    from windsurf_account_manager.models import Account
+    from windsurf_account_manager.token_cache import TokenCache
+
+    server, calls = _start_proto_server()
+    try:
+        cache = TokenCache()
+        cache.store_auth_token("a1", "a@example.com", "tok")
+        client = ApiClient(token_cache=cache)
+        assert client.use_protobuf
+        client.base_url = f"http://127.0.0.1:{server.server_port}"
+
+        account = Account(id="a1", email="a@example.com")
+        assert client.login_and_update_account(account)
+        assert [rpc for rpc, _ in calls] == ["GetCurrentUser", "GetPlanStatus"]
+        assert all(content_type == "application/proto" for _, content_type in calls)
+        assert account.api_key == "sk-123"
+        assert account.plan_name == "Pro"
+        assert account.plan_end.startswith("2030-01-01")
+        assert account.used_prompt_credits == 42
+        client.close()
+    finally:
+        server.shutdown()
+
+
+def test_lazy_view_decodes_only_accessed_fields():
+    """惰性视图只解码被访问的子消息，结果与完整解码一致"""
+    data = _build_current_user_response()
+    view = pw.view_get_current_user_response(data)
+    assert "team" not in view
+    assert view._cache == {}
+
+    user = view["user"]
+    assert list(view._cache) == ["user"]
+    assert user["api_key"] == "sk-123"
+    assert list(user._cache) == ["api_key"]
+    # 缺失的额度字段按proto3默认值返回0
+    assert "used_prompt_credits" in user
+    assert "name" not in user
+    assert user.get("name") is None
+
+    assert pw.materialize(view) == pw.decode_get_current_user_response(data)
+
+
+def test_apply_lazy_view_to_account():
+    """apply_user_data应能直接使用惰性视图更新账号"""
+    from windsurf_account_manager.api_client import apply_user_data
+    from windsurf_account_manager.models import Account
+
+    account = Account(id="a1", email="a@example.com")
+    assert apply_user_data(account, pw.view_get_current_user_response(_build_current_user_response()))
+    assert account.api_key == "sk-123"
+    assert account.plan_name == "Pro"
+    assert account.used_prompt_credits == 1500
+
+
+def test_length_delimited_fields_are_views():
+    """长度分隔字段应为原缓冲区的视图，不复制数据"""
+    data = bytearray(pw.encode_string_field(1, "hello"))
+    (_num, _wt, value), = list(pw.iter_fields(data))
+    assert isinstance(value, memoryview)
+    data[2] = ord("j")
+    assert bytes(value) == b"jello"
+
+
+def test_truncated_data_raises():
+    """截断的数据应抛出DecodeError"""
+    try:
+        list(pw.iter_fields(b"\x0a\x05ab"))
+    except pw.DecodeError:
+        return
+    raise AssertionError("截断数据未报错")
+
+
+if __name__ == "__main__":
+    test_varint_and_zigzag()
+    test_packed_and_fixed_fields()
+    test_get_current_user_request_encoding()
+    test_decode_get_current_user_response()
+    test_decode_plan_status()
+    test_get_plan_status_response_encoding()
+    test_protobuf_login_fills_plan_end()
+    test_lazy_view_decodes_only_accessed_fields()
+    test_apply_lazy_view_to_account()
+    test_length_delimited_fields_are_views()
+    test_truncated_data_raises()
+    print("protobuf编解码测试通过")
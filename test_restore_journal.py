@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+测试恢复日志：只记录即将被覆盖的文件，失败时自动回滚，按数量保留，中断的恢复在下次启动时继续完成或回滚
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目路径到系统路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from windsurf_account_manager import restore_journal
+from windsurf_account_manager.auto_backup import AutoBackupManager
+from windsurf_account_manager.config_snapshot import ConfigSnapshot
+from windsurf_account_manager.restore_journal import (
+    STATE_COMMITTED, STATE_COMMITTING, STATE_PREPARED, STATE_ROLLED_BACK, StagedFiles
+)
+
+
+class _PathManager:
+    def __init__(self, path):
+        self.path = path
+
+    def get_active_path(self):
+        return self.path
+
+
+def _make_config(base: Path) -> Path:
+    """配置目录中除了要恢复的文件，还有体积很大的缓存"""
+    config = base / "Windsurf"
+    (config / "User" / "globalStorage").mkdir(parents=True)
+    (config / "Cache").mkdir()
+    (config / "settings.json").write_text('{"theme": "dark"}', encoding="utf-8")
+    (config / "User" / "globalStorage" / "storage.json").write_text('{"a": 1}', encoding="utf-8")
+    (config / "Cache" / "data.bin").write_bytes(os.urandom(4 * 1024 * 1024))
+    return config
+
+
+def test_journal_records_only_overwritten_files():
+    """恢复只记录快照中的文件，不复制整个配置目录；按日志可以撤销恢复"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        config = _make_config(tmp)
+        snapshots = ConfigSnapshot(tmp / "data")
+        assert snapshots.create_snapshot("acc", config)
+
+        (config / "settings.json").write_text('{"theme": "light"}', encoding="utf-8")
+        (config / "User" / "globalStorage" / "storage.json").unlink()
+        assert snapshots.restore_snapshot("acc", config)
+        assert not list(tmp.glob("Windsurf_backup_*"))
+
+        journals = snapshots.restore_journal.list_journals()
+        assert len(journals) == 1 and journals[0]["state"] == STATE_COMMITTED
+        record = journals[0]["targets"][0]
+        assert list(record["objects"]) == ["settings.json"]
+        assert record["absent"] == ["User/globalStorage/storage.json"]
+        assert snapshots.blob_store.stats()["bytes"] < 1024
+
+        # 撤销这次恢复
+        snapshots.restore_journal.rollback(snapshots.restore_journal.root / journals[0]["journal_name"])
+        assert (config / "settings.json").read_text(encoding="utf-8") == '{"theme": "light"}'
+        assert not (config / "User" / "globalStorage" / "storage.json").exists()
+        assert snapshots.restore_journal.list_journals()[0]["state"] == STATE_ROLLED_BACK
+
+
+def test_failed_restore_rolls_back():
+    """部分文件恢复失败时，已经恢复的文件回滚到恢复前的内容"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        config = _make_config(tmp)
+        snapshots = ConfigSnapshot(tmp / "data")
+        manager = AutoBackupManager(_PathManager(config), snapshots, tmp / "backups", enabled=False)
+        assert manager.create_backup("acc", "a@example.com")
+        backup = manager.list_backups("acc")[0]
+
+        (config / "settings.json").write_text('{"theme": "light"}', encoding="utf-8")
+        (config / "User" / "globalStorage" / "storage.json").write_text('{"a": 2}', encoding="utf-8")
+        # 备份中 storage.json 的对象丢失
+        snapshots.blob_store.path_for(backup["objects"]["User/globalStorage/storage.json"]["digest"]).unlink()
+
+        assert not manager.restore_backup("acc", backup["backup_name"])
+        assert _staged_files(config) == []
+        assert (config / "settings.json").read_text(encoding="utf-8") == '{"theme": "light"}'
+        assert (config / "User" / "globalStorage" / "storage.json").read_text(encoding="utf-8") == '{"a": 2}'
+        assert snapshots.restore_journal.list_journals()[0]["state"] == STATE_ROLLED_BACK
+
+
+def test_journal_retention():
+    """只保留最近的若干份日志，清理时释放对象引用；保留数量随自动备份配置保存"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        config = _make_config(tmp)
+        snapshots = ConfigSnapshot(tmp / "data")
+        snapshots.restore_journal.max_journals = 2
+        AutoBackupManager(_PathManager(config), snapshots, tmp / "backups", enabled=False)
+        assert AutoBackupManager(
+            _PathManager(config), ConfigSnapshot(tmp / "data"), tmp / "backups", enabled=False
+        ).snapshot_manager.restore_journal.max_journals == 2
+
+        assert snapshots.create_snapshot("acc", config)
+        for i in range(4):
+            (config / "settings.json").write_text(f'{{"round": {i}}}', encoding="utf-8")
+            assert snapshots.restore_snapshot("acc", config)
+        journals = snapshots.restore_journal.list_journals()
+        assert len(journals) == 2
+        # 快照的 2 个对象和保留的 2 份日志各自的 settings.json
+        assert snapshots.blob_store.stats()["objects"] == 4
+
+
+def test_journal_retention_after_rollback():
+    """回滚同样按保留数量清理旧日志并释放对象引用"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        config = _make_config(tmp)
+        snapshots = ConfigSnapshot(tmp / "data")
+        manager = AutoBackupManager(_PathManager(config), snapshots, tmp / "backups", enabled=False)
+        snapshots.restore_journal.max_journals = 2
+        assert manager.create_backup("acc", "a@example.com")
+        backup = manager.list_backups("acc")[0]
+        # 备份中 storage.json 的对象丢失，每次恢复都会失败并回滚
+        snapshots.blob_store.path_for(backup["objects"]["User/globalStorage/storage.json"]["digest"]).unlink()
+        (config / "User" / "globalStorage" / "storage.json").write_text('{"a": 2}', encoding="utf-8")
+
+        for i in range(4):
+            (config / "settings.json").write_text(f'{{"round": {i}}}', encoding="utf-8")
+            assert not manager.restore_backup("acc", backup["backup_name"])
+            assert (config / "settings.json").read_text(encoding="utf-8") == f'{{"round": {i}}}'
+        journals = snapshots.restore_journal.list_journals()
+        assert len(journals) == 2
+        assert all(journal["state"] == STATE_ROLLED_BACK for journal in journals)
+        # 备份的 settings.json、日志共用的 storage.json 和保留的 2 份日志各自的 settings.json
+        assert snapshots.blob_store.stats()["objects"] == 4
+
+
+class _Crash(BaseException):
+    """模拟程序在恢复过程中退出"""
+
+
+def _make_database(config: Path, value: str) -> Path:
+    db_path = config / "User" / "globalStorage" / "state.vscdb"
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("CREATE TABLE IF NOT EXISTS ItemTable (key TEXT UNIQUE ON CONFLICT REPLACE, value BLOB)")
+    conn.execute("INSERT INTO ItemTable VALUES ('codeium.apiKey', ?)", (value,))
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def _api_key(db_path: Path) -> str:
+    conn = sqlite3.connect(str(db_path))
+    try:
+        return conn.execute("SELECT value FROM ItemTable WHERE key = 'codeium.apiKey'").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _staged_files(config: Path):
+    return list(config.rglob(f"*{restore_journal.STAGED_SUFFIX}"))
+
+
+def test_crash_after_commit_marker_rolls_forward():
+    """写入提交标记后退出，下次启动继续完成剩余的替换"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        config = _make_config(tmp)
+        snapshots = ConfigSnapshot(tmp / "data")
+        assert snapshots.create_snapshot("acc", config)
+        (config / "settings.json").write_text('{"theme": "light"}', encoding="utf-8")
+        (config / "User" / "globalStorage" / "storage.json").write_text('{"a": 2}', encoding="utf-8")
+
+        original = restore_journal.replace_staged
+
+        def replace_first(pairs):
+            original(list(pairs)[:1])
+            raise _Crash()
+
+        restore_journal.replace_staged = replace_first
+        try:
+            snapshots.restore_snapshot("acc", config)
+            assert False, "恢复应当中断"
+        except _Crash:
+            pass
+        finally:
+            restore_journal.replace_staged = original
+        journal = snapshots.restore_journal.list_journals()[0]
+        assert journal["state"] == STATE_COMMITTING and len(journal["staged"]) == 2
+        assert len(_staged_files(config)) == 1
+
+        # 其他恢复清理旧日志时不能删除未完成替换的日志
+        snapshots.restore_journal.max_journals = 0
+        snapshots.restore_journal.prune()
+        assert snapshots.restore_journal.list_journals()[0]["state"] == STATE_COMMITTING
+
+        # 下次启动
+        assert ConfigSnapshot(tmp / "data").recover_interrupted_restores() == 1
+        assert (config / "settings.json").read_text(encoding="utf-8") == '{"theme": "dark"}'
+        assert (config / "User" / "globalStorage" / "storage.json").read_text(encoding="utf-8") == '{"a": 1}'
+        assert _staged_files(config) == []
+        assert snapshots.restore_journal.list_journals()[0]["state"] == STATE_COMMITTED
+        assert snapshots.recover_interrupted_restores() == 0
+
+
+def test_crash_before_commit_marker_rolls_back():
+    """写入提交标记前退出，下次启动删除暂存文件，并回滚已经直接写入的数据库"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        config = _make_config(tmp)
+        db_path = _make_database(config, "key-a")
+        snapshots = ConfigSnapshot(tmp / "data")
+        assert snapshots.create_snapshot("acc", config)
+        (config / "settings.json").write_text('{"theme": "light"}', encoding="utf-8")
+        _make_database(config, "key-b")
+
+        original = StagedFiles.sync
+
+        def crash(self):
+            raise _Crash()
+
+        StagedFiles.sync = crash
+        try:
+            snapshots.restore_snapshot("acc", config)
+            assert False, "恢复应当中断"
+        except _Crash:
+            pass
+        finally:
+            StagedFiles.sync = original
+        assert snapshots.restore_journal.list_journals()[0]["state"] == STATE_PREPARED
+        # 数据库已通过在线备份 API 写入，普通文件还在暂存文件中
+        assert _api_key(db_path) == "key-a"
+        assert (config / "settings.json").read_text(encoding="utf-8") == '{"theme": "light"}'
+        assert len(_staged_files(config)) == 2
+
+        assert ConfigSnapshot(tmp / "data").recover_interrupted_restores() == 1
+        assert _api_key(db_path) == "key-b"
+        assert (config / "settings.json").read_text(encoding="utf-8") == '{"theme": "light"}'
+        assert _staged_files(config) == []
+        assert snapshots.restore_journal.list_journals()[0]["state"] == STATE_ROLLED_BACK
+
+
+if __name__ == "__main__":
+    test_journal_records_only_overwritten_files()
+    test_failed_restore_rolls_back()
+    test_journal_retention()
+    test_journal_retention_after_rollback()
+    test_crash_after_commit_marker_rolls_forward()
+    test_crash_before_commit_marker_rolls_back()
+    print("恢复日志测试通过")
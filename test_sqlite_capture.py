@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+测试 state.vscdb 的 SQLite 在线备份读取和恢复
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# 添加项目路径到系统路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from windsurf_account_manager.backup_archive import extract_files, write_archive
+from windsurf_account_manager.blob_store import BlobStore, capture_files, restore_files
+from windsurf_account_manager.sqlite_capture import capture_database, restore_database
+
+DB = "User/globalStorage/state.vscdb"
+
+
+def _live_database(config: Path) -> sqlite3.Connection:
+    """模拟运行中的 Windsurf：WAL 模式，已提交的修改仍在 -wal 中，连接保持打开"""
+    path = config / DB
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA wal_autocheckpoint=0")
+    conn.execute("CREATE TABLE ItemTable (key TEXT UNIQUE ON CONFLICT REPLACE, value BLOB)")
+    conn.executemany("INSERT INTO ItemTable VALUES (?, ?)", [(f"key{i}", os.urandom(200)) for i in range(2000)])
+    conn.commit()
+    return conn
+
+
+def _keys(path: Path):
+    conn = sqlite3.connect(str(path))
+    try:
+        assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+        return {row[0] for row in conn.execute("SELECT key FROM ItemTable")}
+    finally:
+        conn.close()
+
+
+def test_capture_includes_wal_and_is_self_contained():
+    """读取结果包含仍在 -wal 中的修改，副本是不依赖 -wal 的单个文件；压缩模式更小"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        live = _live_database(tmp / "Windsurf")
+        live.execute("INSERT INTO ItemTable VALUES ('codeium.auth', 'token')")
+        live.commit()
+        assert (tmp / "Windsurf" / (DB + "-wal")).stat().st_size > 0
+
+        captured = tmp / "captured.vscdb"
+        capture_database(tmp / "Windsurf" / DB, captured, pages=16)
+        assert not Path(str(captured) + "-wal").exists()
+        assert "codeium.auth" in _keys(captured)
+
+        live.execute("DELETE FROM ItemTable WHERE key != 'codeium.auth'")
+        live.commit()
+        plain, compact = tmp / "plain.vscdb", tmp / "compact.vscdb"
+        capture_database(tmp / "Windsurf" / DB, plain)
+        capture_database(tmp / "Windsurf" / DB, compact, compact=True)
+        assert _keys(compact) == {"codeium.auth"}
+        assert compact.stat().st_size < plain.stat().st_size / 10
+        live.close()
+
+
+def test_capture_while_writer_is_active():
+    """读取期间另一个连接持续写入，读取仍能完成且结果完整"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        live = _live_database(tmp / "Windsurf")
+        stop = threading.Event()
+
+        def writer():
+            i = 0
+            while not stop.is_set():
+                live.execute("INSERT INTO ItemTable VALUES (?, ?)", (f"new{i}", os.urandom(200)))
+                live.commit()
+                i += 1
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            captured = tmp / "captured.vscdb"
+            capture_database(tmp / "Windsurf" / DB, captured, pages=4, pause=0)
+        finally:
+            stop.set()
+            thread.join()
+            live.close()
+        assert {f"key{i}" for i in range(2000)} <= _keys(captured)
+
+
+def test_store_round_trip_into_live_database():
+    """对象存储和归档都通过备份 API 恢复到正在使用的数据库；只有 -wal 变化也会被增量备份发现"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        config = tmp / "Windsurf"
+        live = _live_database(config)
+        store = BlobStore(tmp / "objects")
+        first = capture_files(store, config, [DB])
+        assert "source" in first[DB]
+
+        live.execute("INSERT INTO ItemTable VALUES ('later', 'x')")
+        live.commit()
+        second = capture_files(store, config, [DB], first)
+        assert second[DB]["digest"] != first[DB]["digest"]
+
+        archive = tmp / "files.wsbak"
+        write_archive(archive, config, [DB], codec="gzip")
+
+        reader = sqlite3.connect(str(config / DB))
+        restore_files(store, first, config)
+        assert "later" not in {row[0] for row in reader.execute("SELECT key FROM ItemTable")}
+        extract_files(archive, config)
+        assert "later" in {row[0] for row in reader.execute("SELECT key FROM ItemTable")}
+        reader.close()
+        live.close()
+        assert "later" in _keys(config / DB)
+
+        # 目标文件损坏时替换为完整的数据库
+        (config / DB).write_bytes(b"garbage")
+        for suffix in ("-wal", "-shm"):
+            Path(str(config / DB) + suffix).unlink(missing_ok=True)
+        restore_database(store.path_for(first[DB]["digest"]), config / DB)
+        assert "key0" in _keys(config / DB)
+
+
+if __name__ == "__main__":
+    test_capture_includes_wal_and_is_self_contained()
+    test_capture_while_writer_is_active()
+    test_store_round_trip_into_live_database()
+    print("SQLite 读取测试通过")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+测试令牌缓存的过期判断、磁盘持久化以及Refresh Token刷新流程
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目路径到系统路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from windsurf_account_manager.api_client import ApiClient
+from windsurf_account_manager.models import Account
+from windsurf_account_manager.token_cache import TokenCache
+
+
+def test_expiry_and_persistence():
+    """过期令牌不应返回，缓存应能从磁盘恢复"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "tokens.json"
+        cache = TokenCache(path, skew_seconds=10)
+        cache.store_firebase_tokens("a1", "a@example.com", "id-1", "refresh-1", expires_in=3600)
+        cache.store_firebase_tokens("a2", "b@example.com", "id-2", "refresh-2", expires_in=5)
+        cache.save()
+
+        reloaded = TokenCache(path, skew_seconds=10)
+        assert reloaded.valid_id_token(reloaded.get("a1", "a@example.com")) == "id-1"
+        # 剩余有效期小于skew，视为过期
+        assert reloaded.valid_id_token(reloaded.get("a2", "b@example.com")) is None
+        # 邮箱不一致时视为不同账号
+        assert reloaded.get("a1", "other@example.com") is None
+
+
+class RefreshingClient(ApiClient):
+    """记录调用顺序的API客户端"""
+
+    def __init__(self, cache):
+        super().__init__(token_cache=cache)
+        self.calls = []
+
+    def sign_in_with_password(self, email, password):
+        self.calls.append("sign_in")
+        return {"idToken": "id-new", "refreshToken": "refresh-new", "expiresIn": "3600"}
+
+    def refresh_firebase_id_token(self, refresh_token):
+        self.calls.append(f"refresh:{refresh_token}")
+        return {"id_token": "id-refreshed", "refresh_token": "refresh-2", "expires_in": "3600"}
+
+    def get_auth_token(self, firebase_id_token):
+        self.calls.append(f"auth:{firebase_id_token}")
+        return "auth-1"
+
+    def get_current_user(self, auth_token):
+        self.calls.append(f"user:{auth_token}")
+        return {"plan_info": {"plan_name": "Pro"}}
+
+
+def test_stale_id_token_is_refreshed():
+    """ID Token过期时应通过Refresh Token刷新而不是重新密码登录"""
+    cache = TokenCache()
+    account = Account(id="a1", email="a@example.com", password="pw")
+    cache.store_firebase_tokens(account.id, account.email, "id-old", "refresh-1", expires_in=0)
+
+    client = RefreshingClient(cache)
+    assert client.login_and_update_account(account)
+    assert client.calls == ["refresh:refresh-1", "auth:id-refreshed", "user:auth-1"]
+
+    # 再次同步只需要一次GetCurrentUser
+    client.calls.clear()
+    assert client.login_and_update_account(account)
+    assert client.calls == ["user:auth-1"]
+
+
+if __name__ == "__main__":
+    test_expiry_and_persistence()
+    test_stale_id_token_is_refreshed()
+    print("令牌缓存测试通过")
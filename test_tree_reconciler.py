@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+测试 Treeview 按 key 增量刷新的差异计算
+"""
+import sys
+from pathlib import Path
+
+# 添加项目路径到系统路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from windsurf_account_manager.tree_reconciler import diff_rows
+
+
+def _apply(order, state, plan):
+    """模拟 TreeReconciler.apply 对状态的修改"""
+    for iid in plan.deletes:
+        del state[iid]
+    state.update(plan.updates)
+    state.update(plan.inserts)
+    return list(plan.order), state
+
+
+def test_single_update_touches_one_row():
+    """只修改一个账号时只产生一次更新"""
+    rows = [(f"id{i}", (f"user{i}@example.com", "Free"), ()) for i in range(1000)]
+    plan = diff_rows([], {}, rows)
+    assert len(plan.inserts) == 1000 and not plan.reorder
+    order, state = _apply([], {}, plan)
+
+    rows[500] = ("id500", ("user500@example.com", "Pro"), ("active_account",))
+    plan = diff_rows(order, state, rows)
+    assert plan.updates == [("id500", (("user500@example.com", "Pro"), ("active_account",)))]
+    assert not plan.deletes and not plan.inserts and not plan.reorder
+
+    order, state = _apply(order, state, plan)
+    assert diff_rows(order, state, rows).is_empty()
+
+
+def test_delete_insert_and_reorder():
+    """删除和追加不需要重排，顺序变化时整体重排一次"""
+    state = {iid: ((iid,), ()) for iid in "abcd"}
+    order = list("abcd")
+
+    plan = diff_rows(order, state, [(iid, (iid,), ()) for iid in "abde"])
+    assert plan.deletes == ["c"]
+    assert [iid for iid, _ in plan.inserts] == ["e"]
+    assert not plan.reorder
+
+    plan = diff_rows(order, state, [(iid, (iid,), ()) for iid in "dcxa"])
+    assert plan.deletes == ["b"]
+    assert plan.reorder and plan.order == list("dcxa")
+
+    plan = diff_rows(order, state, [("a", ("a",), ()), ("a", ("dup",), ())])
+    assert plan.order == ["a"] and not plan.updates
+
+
+if __name__ == "__main__":
+    test_single_update_touches_one_row()
+    test_delete_insert_and_reorder()
+    print("Treeview 增量刷新测试通过")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+测试虚拟列表的视口计算
+"""
+import sys
+from pathlib import Path
+
+# 添加项目路径到系统路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from windsurf_account_manager.virtual_tree import ViewportModel
+
+
+def _rows(count):
+    return [(f"id{i}", (f"user{i}@example.com",), ()) for i in range(count)]
+
+
+def test_window_only_covers_viewport_and_overscan():
+    """10 万行时只需创建视口加预加载范围内的行"""
+    model = ViewportModel(overscan=5)
+    model.set_visible(20)
+    model.set_rows(_rows(100_000))
+    assert model.window() == (0, 25)
+
+    model.scroll_to_fraction(0.5)
+    start, end = model.window()
+    assert model.offset == 50_000
+    assert (start, end) == (49_995, 50_025)
+    first, last = model.fractions()
+    assert first == 0.5 and last == 50_020 / 100_000
+
+    model.scroll_by(10**9)
+    assert model.offset == 100_000 - 20
+    assert model.window()[1] == 100_000
+
+
+def test_ensure_visible_and_shrinking_rows():
+    """定位到行时只在必要时滚动，行数减少后偏移量被收紧"""
+    model = ViewportModel(overscan=2)
+    model.set_visible(10)
+    model.set_rows(_rows(1000))
+    model.ensure_visible(5)
+    assert model.offset == 0
+    model.ensure_visible(500)
+    assert model.offset == 491
+    model.ensure_visible(100)
+    assert model.offset == 100
+
+    model.set_rows(_rows(50))
+    assert model.offset == 40
+    assert model.positions["id49"] == 49
+
+    model.set_rows(_rows(3))
+    assert model.offset == 0
+    assert model.fractions() == (0.0, 1.0)
+    assert model.window() == (0, 3)
+
+
+def test_range_uses_logical_rows():
+    """Shift 范围选择按全部行计算，包括视口外的行，起点在后时同样有效"""
+    model = ViewportModel(overscan=2)
+    model.set_visible(10)
+    model.set_rows(_rows(1000))
+    assert model.range_ids("id5", "id500") == [f"id{i}" for i in range(5, 501)]
+    assert model.range_ids("id500", "id5") == model.range_ids("id5", "id500")
+    assert model.range_ids("id7", "id7") == ["id7"]
+
+
+if __name__ == "__main__":
+    test_window_only_covers_viewport_and_overscan()
+    test_ensure_visible_and_shrinking_rows()
+    test_range_uses_logical_rows()
+    print("虚拟列表测试通过")
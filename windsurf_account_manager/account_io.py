@@ -0,0 +1,307 @@
+"""
+账号流式导入导出
+支持 JSON 数组、JSON Lines 和 CSV，逐条读写，内存占用与文件大小无关
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO
+from uuid import uuid4
+
+from .account_repository import AccountRepository, normalize_email
+from .models import Account
+
+FORMAT_JSON = "json"
+FORMAT_JSONL = "jsonl"
+FORMAT_CSV = "csv"
+
+ACCOUNT_FIELDS = tuple(f.name for f in fields(Account))
+_INT_FIELDS = {"used_prompt_credits", "used_flow_credits"}
+_BOOL_FIELDS = {"has_snapshot"}
+
+CHUNK_SIZE = 64 * 1024
+_DELIMITERS = frozenset(" \t\r\n,]")
+
+# on_progress(当前文件序号, 文件总数, 已读取字节数, 当前文件总字节数, 已新增账号数)
+ProgressCallback = Callable[[int, int, int, int, int], None]
+
+
+class ImportFormatError(ValueError):
+    """导入文件格式错误"""
+
+
+def detect_format(path: Path) -> str:
+    """根据扩展名判断格式，.json 文件再根据首个字符区分数组和逐行对象"""
+    suffix = path.suffix.lower()
+    if suffix in (".jsonl", ".ndjson"):
+        return FORMAT_JSONL
+    if suffix == ".csv":
+        return FORMAT_CSV
+    if path.exists():
+        with path.open("r", encoding="utf-8-sig") as f:
+            while True:
+                ch = f.read(1)
+                if not ch or not ch.isspace():
+                    break
+        if ch == "{":
+            return FORMAT_JSONL
+    return FORMAT_JSON
+
+
+class _ProgressReader(io.RawIOBase):
+    """统计已读取字节数的文件包装"""
+
+    def __init__(self, raw: BinaryIO, on_read: Optional[Callable[[int], None]] = None) -> None:
+        self._raw = raw
+        self._on_read = on_read
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        n = self._raw.readinto(buffer)
+        if n:
+            self.bytes_read += n
+            if self._on_read is not None:
+                self._on_read(self.bytes_read)
+        return n or 0
+
+    def close(self) -> None:
+        self._raw.close()
+        super().close()
+
+
+def iter_json_array(fp: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """
+    增量解析顶层 JSON 数组，逐个返回元素
+    缓冲区只保留尚未解析的部分
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        chunk = fp.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buf = buf[pos:] + chunk
+        pos = 0
+        return True
+
+    def skip_ws() -> Optional[str]:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if not fill():
+                return None
+
+    if skip_ws() != "[":
+        raise ImportFormatError("JSON 文件顶层不是数组")
+    pos += 1
+
+    expect_value = True
+    while True:
+        ch = skip_ws()
+        if ch is None:
+            raise ImportFormatError("JSON 数组未正常结束")
+        if ch == "]":
+            return
+        if ch == ",":
+            if expect_value:
+                raise ImportFormatError("JSON 数组中存在多余的逗号")
+            pos += 1
+            expect_value = True
+            continue
+        if not expect_value:
+            raise ImportFormatError("JSON 数组元素之间缺少逗号")
+
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if fill():
+                    continue
+                raise ImportFormatError("JSON 数组元素格式错误") from None
+            # 数字等标量可能在缓冲区末尾被截断（如 "-1." 会被解析为 -1），
+            # 只有后面紧跟分隔符时才能确定已经完整
+            if ch not in "{[\"" and not eof and (end >= len(buf) or buf[end] not in _DELIMITERS):
+                if fill():
+                    continue
+            break
+        pos = end
+        expect_value = False
+        yield value
+
+
+def iter_jsonl(fp: TextIO) -> Iterator[Any]:
+    """逐行解析 JSON Lines，空行忽略，无法解析的行返回 None"""
+    for line in fp:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            yield None
+
+
+def iter_csv(fp: TextIO) -> Iterator[Dict[str, Any]]:
+    """逐行解析 CSV，首行为列名"""
+    for row in csv.DictReader(fp):
+        yield {k.strip(): v for k, v in row.items() if k}
+
+
+def iter_records(path: Path, fmt: Optional[str] = None,
+                 on_bytes: Optional[Callable[[int], None]] = None) -> Iterator[Any]:
+    """按格式流式读取文件中的记录"""
+    fmt = fmt or detect_format(path)
+    reader = _ProgressReader(path.open("rb"), on_bytes)
+    newline = "" if fmt == FORMAT_CSV else None
+    with io.TextIOWrapper(io.BufferedReader(reader, CHUNK_SIZE), encoding="utf-8-sig", newline=newline) as fp:
+        if fmt == FORMAT_CSV:
+            yield from iter_csv(fp)
+        elif fmt == FORMAT_JSONL:
+            yield from iter_jsonl(fp)
+        else:
+            yield from iter_json_array(fp)
+
+
+def _convert(name: str, value: Any) -> Any:
+    if value == "" and name not in ("password", "note"):
+        return None
+    if name in _INT_FIELDS and value is not None:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+    if name in _BOOL_FIELDS:
+        if isinstance(value, str):
+            return value.strip().lower() in ("1", "true", "yes")
+        return bool(value)
+    return value
+
+
+def record_to_account(record: Dict[str, Any], account_id: Optional[str] = None) -> Account:
+    """将导入记录转换为账号，未知字段忽略"""
+    data = {name: _convert(name, record[name]) for name in ACCOUNT_FIELDS if name in record}
+    data["id"] = account_id or str(uuid4())
+    data["email"] = str(record["email"]).strip()
+    data["password"] = data.get("password") or ""
+    data["note"] = data.get("note") or ""
+    data.setdefault("has_snapshot", False)
+    return Account(**data)
+
+
+@dataclass
+class ImportResult:
+    added: List[Account] = field(default_factory=list)
+    duplicates: int = 0
+    invalid: int = 0
+    files: int = 0
+
+
+def import_accounts(
+    paths: Sequence[Path],
+    repository: AccountRepository,
+    on_progress: Optional[ProgressCallback] = None,
+    batch_size: int = 1000,
+) -> ImportResult:
+    """
+    从多个文件流式导入账号
+
+    邮箱统一规范化后去重，已存在于仓库或在本次导入中出现过的邮箱都会跳过。
+    新账号按批加入仓库，每批触发一次变更通知。
+    """
+    result = ImportResult()
+    seen = set()
+    seen_ids = set()
+    batch: List[Account] = []
+
+    def flush() -> None:
+        if batch:
+            result.added.extend(repository.add_many(batch))
+            batch.clear()
+
+    for index, path in enumerate(paths):
+        path = Path(path)
+        if not path.exists():
+            print(f"导入文件不存在: {path}")
+            continue
+        total = path.stat().st_size
+        report = None
+        if on_progress is not None:
+            def report(done: int, index: int = index, total: int = total) -> None:
+                on_progress(index, len(paths), done, total, len(result.added) + len(batch))
+
+        for record in iter_records(path, on_bytes=report):
+            if not isinstance(record, dict) or not record.get("email"):
+                result.invalid += 1
+                continue
+            email = normalize_email(record["email"])
+            if email in seen or repository.has_email(email):
+                result.duplicates += 1
+                continue
+            seen.add(email)
+            record_id = record.get("id")
+            # 保留导出文件中的 id，除非与已有账号或本批次中的账号冲突
+            account_id = record_id if record_id and record_id not in repository and record_id not in seen_ids else None
+            account = record_to_account(record, account_id)
+            seen_ids.add(account.id)
+            batch.append(account)
+            if len(batch) >= batch_size:
+                flush()
+        result.files += 1
+    flush()
+    return result
+
+
+def _account_record(account: Account) -> Dict[str, Any]:
+    return {name: getattr(account, name) for name in ACCOUNT_FIELDS}
+
+
+def export_accounts(path: Path, accounts: Iterable[Account], fmt: Optional[str] = None) -> int:
+    """
+    流式导出账号，逐条写入，返回导出的数量
+    格式默认由扩展名决定
+    """
+    path = Path(path)
+    if fmt is None:
+        suffix = path.suffix.lower()
+        fmt = {".jsonl": FORMAT_JSONL, ".ndjson": FORMAT_JSONL, ".csv": FORMAT_CSV}.get(suffix, FORMAT_JSON)
+
+    count = 0
+    temp_path = path.with_name(path.name + ".tmp")
+    with temp_path.open("w", encoding="utf-8", newline="" if fmt == FORMAT_CSV else None) as f:
+        if fmt == FORMAT_CSV:
+            writer = csv.DictWriter(f, fieldnames=ACCOUNT_FIELDS)
+            writer.writeheader()
+            for account in accounts:
+                writer.writerow(_account_record(account))
+                count += 1
+        elif fmt == FORMAT_JSONL:
+            for account in accounts:
+                f.write(json.dumps(_account_record(account), ensure_ascii=False))
+                f.write("\n")
+                count += 1
+        else:
+            f.write("[")
+            for account in accounts:
+                f.write(",\n  " if count else "\n  ")
+                f.write(json.dumps(_account_record(account), ensure_ascii=False))
+                count += 1
+            f.write("\n]\n" if count else "]\n")
+    temp_path.replace(path)
+    return count
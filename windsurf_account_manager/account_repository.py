@@ -0,0 +1,234 @@
+"""
+内存中的账号仓库
+维护 id / email / api_key 索引，所有查找均为 O(1)，并在账号变化时通知订阅者；
+首次搜索时建立三元组搜索索引，之后随账号变化增量维护
+"""
+from __future__ import annotations
+
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from .account_search import TrigramIndex, account_texts
+from .models import Account
+
+# 变更事件类型
+EVENT_ADDED = "added"
+EVENT_UPDATED = "updated"
+EVENT_REMOVED = "removed"
+EVENT_RESET = "reset"
+
+Listener = Callable[[str, List[Account]], None]
+
+
+def normalize_email(email: Optional[str]) -> str:
+    """邮箱比较时忽略大小写和首尾空白"""
+    return (email or "").strip().lower()
+
+
+class AccountRepository:
+    """账号集合，保持插入顺序"""
+
+    def __init__(self, accounts: Optional[Iterable[Account]] = None) -> None:
+        self._lock = threading.RLock()
+        self._by_id: Dict[str, Account] = {}
+        self._by_email: Dict[str, Account] = {}
+        self._by_api_key: Dict[str, Account] = {}
+        # 同一邮箱的账号数量，只有存在重复时删除才需要查找接替者
+        self._email_counts: Dict[str, int] = {}
+        # 记录索引时使用的键，账号字段被修改后据此移除旧索引
+        self._indexed_keys: Dict[str, tuple] = {}
+        # 搜索索引在首次搜索时建立（或由 build_search_index 在后台预先建立）
+        self._search_index: Optional[TrigramIndex] = None
+        # 每次修改递增，用于判断后台建立的索引是否已过期
+        self._version = 0
+        self._listeners: List[Listener] = []
+        for account in accounts or ():
+            self._index(account)
+
+    # 订阅
+
+    def subscribe(self, listener: Listener) -> Callable[[], None]:
+        """
+        订阅变更通知，返回取消订阅的函数
+
+        listener(event, accounts) 在修改方的线程中同步调用
+        """
+        self._listeners.append(listener)
+
+        def unsubscribe() -> None:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+        return unsubscribe
+
+    def _notify(self, event: str, accounts: List[Account]) -> None:
+        if not accounts and event != EVENT_RESET:
+            return
+        for listener in list(self._listeners):
+            try:
+                listener(event, accounts)
+            except Exception as e:
+                print(f"账号变更通知处理失败: {e}")
+
+    # 索引维护
+
+    def _index(self, account: Account) -> None:
+        self._version += 1
+        self._unindex_keys(account.id)
+        self._by_id[account.id] = account
+        email = normalize_email(account.email)
+        if email:
+            self._by_email.setdefault(email, account)
+            self._email_counts[email] = self._email_counts.get(email, 0) + 1
+        if account.api_key:
+            self._by_api_key.setdefault(account.api_key, account)
+        self._indexed_keys[account.id] = (email, account.api_key)
+        if self._search_index is not None:
+            self._search_index.add(account.id, account_texts(account))
+
+    def _unindex_keys(self, account_id: str) -> None:
+        keys = self._indexed_keys.pop(account_id, None)
+        if keys is None:
+            return
+        email, api_key = keys
+        if email:
+            remaining = self._email_counts.get(email, 1) - 1
+            if remaining:
+                self._email_counts[email] = remaining
+            else:
+                self._email_counts.pop(email, None)
+            current = self._by_email.get(email)
+            if current is not None and current.id == account_id:
+                del self._by_email[email]
+                if remaining:
+                    # 同一邮箱的其他账号接替索引
+                    for other in self._by_id.values():
+                        if other.id != account_id and self._indexed_keys.get(other.id, ("",))[0] == email:
+                            self._by_email[email] = other
+                            break
+        if api_key and self._by_api_key.get(api_key) is not None and self._by_api_key[api_key].id == account_id:
+            del self._by_api_key[api_key]
+
+    # 查询
+
+    def all(self) -> List[Account]:
+        """按插入顺序返回全部账号"""
+        with self._lock:
+            return list(self._by_id.values())
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return list(self._by_id)
+
+    def get(self, account_id: Optional[str]) -> Optional[Account]:
+        return self._by_id.get(account_id) if account_id else None
+
+    def get_by_email(self, email: Optional[str]) -> Optional[Account]:
+        return self._by_email.get(normalize_email(email))
+
+    def get_by_api_key(self, api_key: Optional[str]) -> Optional[Account]:
+        return self._by_api_key.get(api_key) if api_key else None
+
+    def get_many(self, account_ids: Iterable[str]) -> List[Account]:
+        """按给定顺序返回存在的账号"""
+        by_id = self._by_id
+        return [by_id[i] for i in account_ids if i in by_id]
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Account]:
+        """按邮箱、备注、计划名称搜索，结果按相关度排序，查询为空时返回全部账号"""
+        with self._lock:
+            if self._search_index is None:
+                self._search_index = self._new_search_index(self._by_id.values())
+            return self.get_many(self._search_index.search(query, limit))
+
+    def build_search_index(self) -> None:
+        """
+        预先建立搜索索引，可在后台线程调用
+
+        建立期间不持有锁；如果期间账号发生了变化，放弃结果，留待首次搜索时重建
+        """
+        with self._lock:
+            if self._search_index is not None:
+                return
+            accounts = list(self._by_id.values())
+            version = self._version
+        index = self._new_search_index(accounts)
+        with self._lock:
+            if self._search_index is None and self._version == version:
+                self._search_index = index
+
+    @staticmethod
+    def _new_search_index(accounts: Iterable[Account]) -> TrigramIndex:
+        index = TrigramIndex()
+        for account in accounts:
+            index.add(account.id, account_texts(account))
+        return index
+
+    def has_email(self, email: Optional[str]) -> bool:
+        return normalize_email(email) in self._by_email
+
+    def __contains__(self, account_id: object) -> bool:
+        return account_id in self._by_id
+
+    def __iter__(self) -> Iterator[Account]:
+        return iter(self.all())
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    # 修改
+
+    def add(self, account: Account) -> None:
+        self.add_many([account])
+
+    def add_many(self, accounts: Iterable[Account]) -> List[Account]:
+        """添加账号，已存在的 id 会被覆盖，返回实际添加的账号"""
+        with self._lock:
+            added = list(accounts)
+            for account in added:
+                self._index(account)
+        self._notify(EVENT_ADDED, added)
+        return added
+
+    def update(self, account: Account) -> None:
+        """账号字段被修改后调用，刷新索引并通知订阅者"""
+        self.update_many([account])
+
+    def update_many(self, accounts: Iterable[Account]) -> None:
+        with self._lock:
+            updated = [a for a in accounts if a.id in self._by_id]
+            for account in updated:
+                self._index(account)
+        self._notify(EVENT_UPDATED, updated)
+
+    def remove(self, account_ids: Iterable[str]) -> List[Account]:
+        """删除账号，返回被删除的账号"""
+        with self._lock:
+            removed = []
+            for account_id in account_ids:
+                account = self._by_id.get(account_id)
+                if account is None:
+                    continue
+                self._version += 1
+                self._unindex_keys(account_id)
+                del self._by_id[account_id]
+                if self._search_index is not None:
+                    self._search_index.remove(account_id)
+                removed.append(account)
+        self._notify(EVENT_REMOVED, removed)
+        return removed
+
+    def replace_all(self, accounts: Iterable[Account]) -> None:
+        """整体替换账号列表"""
+        with self._lock:
+            self._by_id.clear()
+            self._by_email.clear()
+            self._by_api_key.clear()
+            self._email_counts.clear()
+            self._indexed_keys.clear()
+            self._search_index = None
+            self._version += 1
+            for account in accounts:
+                self._index(account)
+            current = list(self._by_id.values())
+        self._notify(EVENT_RESET, current)
@@ -0,0 +1,243 @@
+"""
+账号搜索索引
+对邮箱、备注和计划名称建立三元组倒排索引，支持增量更新、按相关度排序和模糊匹配
+"""
+from __future__ import annotations
+
+import math
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .models import Account
+
+SEARCH_FIELDS = ("email", "note", "plan_name")
+
+# 各字段之间的分隔符，查询中不会出现，保证匹配不会跨字段
+_FIELD_SEP = "\x00"
+
+
+def account_texts(account: Account) -> List[str]:
+    """账号参与搜索的文本，邮箱在前"""
+    return [getattr(account, name) or "" for name in SEARCH_FIELDS]
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """
+    三元组倒排索引
+
+    文档按添加顺序占用整数槽位，倒排表保存槽位号，结果按槽位排序即为添加顺序。
+    出现在过多文档中的三元组（如邮箱域名）区分度很低，转为停用三元组不再维护倒排表，
+    查询时只由子串校验过滤，这样既节省内存也避免对巨大集合求交集。
+
+    排序: 邮箱完全相同 > 邮箱前缀（按邮箱排序）> 任意字段包含（按添加顺序）> 模糊匹配。
+    前两级通过有序邮箱列表二分查找得到，包含级按添加顺序扫描，凑够 limit 即可停止。
+    """
+
+    def __init__(self, stop_ratio: float = 0.25, stop_min_docs: int = 2000,
+                 fuzzy_limit: int = 20, min_similarity: float = 0.4, fuzzy_posting_cap: int = 5000) -> None:
+        self.stop_ratio = stop_ratio
+        self.stop_min_docs = stop_min_docs
+        # 直接命中少于 fuzzy_limit 时才进行模糊匹配
+        self.fuzzy_limit = fuzzy_limit
+        self.min_similarity = min_similarity
+        # 模糊匹配时跳过过长的倒排表
+        self.fuzzy_posting_cap = fuzzy_posting_cap
+
+        self._keys: List[Optional[str]] = []
+        self._texts: List[Optional[str]] = []
+        self._emails: List[Optional[str]] = []
+        self._slots: Dict[str, int] = {}
+        # 按邮箱排序的 (邮箱, 槽位)，修改后在下次查询时重建
+        self._sorted_emails: Optional[List[str]] = None
+        self._sorted_slots: List[int] = []
+        self._postings: Dict[str, Set[int]] = {}
+        self._stop: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._slots
+
+    # 维护
+
+    def add(self, key: str, texts: Sequence[str]) -> None:
+        """添加或更新文档，文本未变化时不做任何事"""
+        email = texts[0].casefold()
+        text = _FIELD_SEP.join(t.casefold() for t in texts)
+        slot = self._slots.get(key)
+        if slot is not None:
+            if self._texts[slot] == text:
+                return
+            self._unindex(slot)
+        else:
+            slot = len(self._keys)
+            self._slots[key] = slot
+            self._keys.append(key)
+            self._texts.append(None)
+            self._emails.append(None)
+        self._texts[slot] = text
+        if self._emails[slot] != email:
+            self._emails[slot] = email
+            self._sorted_emails = None
+
+        postings = self._postings
+        stop = self._stop
+        limit = max(self.stop_min_docs, int(len(self._slots) * self.stop_ratio))
+        for gram in trigrams(text):
+            if gram in stop or _FIELD_SEP in gram:
+                continue
+            posting = postings.get(gram)
+            if posting is None:
+                postings[gram] = {slot}
+            elif len(posting) >= limit:
+                del postings[gram]
+                stop.add(gram)
+            else:
+                posting.add(slot)
+
+    def remove(self, key: str) -> None:
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            return
+        self._unindex(slot)
+        self._keys[slot] = None
+        self._texts[slot] = None
+        self._emails[slot] = None
+        self._sorted_emails = None
+        # 空槽位过多时重新编号
+        if len(self._keys) > 1000 and len(self._slots) * 2 < len(self._keys):
+            self._rebuild()
+
+    def clear(self) -> None:
+        self._keys.clear()
+        self._texts.clear()
+        self._emails.clear()
+        self._slots.clear()
+        self._sorted_emails = None
+        self._sorted_slots = []
+        self._postings.clear()
+        self._stop.clear()
+
+    def _unindex(self, slot: int) -> None:
+        text = self._texts[slot]
+        if text is None:
+            return
+        postings = self._postings
+        for gram in trigrams(text):
+            posting = postings.get(gram)
+            if posting is not None:
+                posting.discard(slot)
+                if not posting:
+                    del postings[gram]
+
+    def _rebuild(self) -> None:
+        docs = [(key, text) for key, text in zip(self._keys, self._texts) if key is not None]
+        self.clear()
+        for key, text in docs:
+            self.add(key, text.split(_FIELD_SEP))
+
+    # 查询
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[str]:
+        """
+        返回匹配的 key，按相关度排序
+
+        Args:
+            query: 查询文本，忽略大小写；为空时按添加顺序返回全部 key
+            limit: 最多返回的数量，包含级凑够后即停止扫描
+        """
+        q = query.strip().casefold()
+        keys = self._keys
+        if not q:
+            result = [key for key in keys if key is not None]
+            return result if limit is None else result[:limit]
+        cap = limit if limit is not None else len(keys)
+
+        exact, prefix = self._prefix_matches(q, cap)
+        slots = exact + prefix
+        grams = trigrams(q)
+        remaining = cap - len(slots)
+        if remaining > 0:
+            candidates = self._candidates(grams)
+            if candidates is not None:
+                texts = self._texts
+                for slot in candidates:
+                    text = texts[slot]
+                    # 位置 0 即邮箱前缀，已在前面的级别中
+                    if text is not None and text.find(q) > 0:
+                        slots.append(slot)
+                        remaining -= 1
+                        if not remaining:
+                            break
+
+        if len(slots) < self.fuzzy_limit and len(grams) >= 2:
+            slots.extend(self._fuzzy(grams, set(slots)))
+        if limit is not None:
+            slots = slots[:limit]
+        return [keys[slot] for slot in slots]
+
+    def _prefix_matches(self, q: str, cap: int) -> Tuple[List[int], List[int]]:
+        """二分查找邮箱等于查询和以查询开头的槽位"""
+        if self._sorted_emails is None:
+            pairs = sorted((email, slot) for slot, email in enumerate(self._emails) if email is not None)
+            self._sorted_emails = [email for email, _slot in pairs]
+            self._sorted_slots = [slot for _email, slot in pairs]
+        emails = self._sorted_emails
+        slots = self._sorted_slots
+        exact: List[int] = []
+        prefix: List[int] = []
+        index = bisect_left(emails, q)
+        while index < len(emails) and len(exact) + len(prefix) < cap:
+            email = emails[index]
+            if not email.startswith(q):
+                break
+            (exact if len(email) == len(q) else prefix).append(slots[index])
+            index += 1
+        return exact, prefix
+
+    def _candidates(self, grams: Set[str]) -> Optional[Iterable[int]]:
+        """
+        按添加顺序返回可能命中的槽位；查询包含从未出现过的三元组时返回 None
+        所有三元组都是停用三元组（或查询不足三个字符）时返回全部槽位
+        """
+        postings = []
+        for gram in grams:
+            if gram in self._stop:
+                continue
+            posting = self._postings.get(gram)
+            if posting is None:
+                return None
+            postings.append(posting)
+        if not postings:
+            return range(len(self._keys))
+        postings.sort(key=len)
+        result = postings[0]
+        for posting in postings[1:]:
+            result = result & posting
+            if not result:
+                return None
+        return sorted(result)
+
+    def _fuzzy(self, grams: Set[str], exclude: Set[int]) -> List[int]:
+        """与查询共享足够多三元组的文档，按共享数量降序"""
+        counts: Counter = Counter()
+        usable = 0
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if gram in self._stop or (posting is not None and len(posting) > self.fuzzy_posting_cap):
+                continue
+            usable += 1
+            if posting:
+                counts.update(posting)
+        if not usable:
+            return []
+        need = max(2, math.ceil(usable * self.min_similarity))
+        matches = [(-count, slot) for slot, count in counts.items() if count >= need and slot not in exclude]
+        matches.sort()
+        return [slot for _count, slot in matches]
@@ -0,0 +1,113 @@
+"""
+账号列表排序
+每个账号的排序键（casefold 后的字符串、时间戳、额度整数）只在账号变化时计算一次并缓存，
+重新排序时不再解析日期
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .account_repository import AccountRepository, EVENT_REMOVED, EVENT_RESET
+from .models import Account
+
+# 可排序的列，与账号列表的列名一致，额外支持按额度排序
+SORT_COLUMNS = (
+    "email", "note", "plan_name", "plan_end", "snapshot",
+    "used_prompt_credits", "used_flow_credits",
+)
+_COLUMN_INDEX = {name: index for index, name in enumerate(SORT_COLUMNS)}
+
+SortKeys = Tuple[Any, ...]
+SortSpec = Sequence[Tuple[str, bool]]
+
+
+def _text_key(value: Optional[str]) -> Optional[str]:
+    return value.casefold() if value else None
+
+
+def _timestamp_key(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+def compute_sort_keys(account: Account) -> SortKeys:
+    """按 SORT_COLUMNS 顺序计算账号的排序键，缺失值为 None"""
+    return (
+        _text_key(account.email),
+        _text_key(account.note),
+        _text_key(account.plan_name),
+        _timestamp_key(account.plan_end),
+        _timestamp_key(account.snapshot_created_at) if account.has_snapshot else None,
+        account.used_prompt_credits,
+        account.used_flow_credits,
+    )
+
+
+class SortKeyCache:
+    """
+    账号排序键缓存
+
+    订阅账号仓库的变更，新增和更新的账号重新计算，删除的账号移除；
+    未缓存的账号在首次排序时计算
+    """
+
+    def __init__(self, repository: Optional[AccountRepository] = None) -> None:
+        self._keys: Dict[str, SortKeys] = {}
+        self._unsubscribe: Optional[Callable[[], None]] = None
+        if repository is not None:
+            self._unsubscribe = repository.subscribe(self._on_change)
+
+    def close(self) -> None:
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    def _on_change(self, event: str, accounts: List[Account]) -> None:
+        if event == EVENT_RESET:
+            self._keys.clear()
+        elif event == EVENT_REMOVED:
+            for account in accounts:
+                self._keys.pop(account.id, None)
+        else:
+            for account in accounts:
+                self._keys[account.id] = compute_sort_keys(account)
+
+    def get(self, account: Account) -> SortKeys:
+        keys = self._keys.get(account.id)
+        if keys is None:
+            keys = self._keys[account.id] = compute_sort_keys(account)
+        return keys
+
+    def sort(self, accounts: Iterable[Account], spec: SortSpec) -> List[Account]:
+        """
+        稳定的多键排序，缺失值无论升降序都排在最后
+
+        Args:
+            accounts: 待排序的账号
+            spec: [(列名, 是否降序), ...]，靠前的为主排序键
+        """
+        accounts = list(accounts)
+        cache = self._keys
+        rows = []
+        for account in accounts:
+            keys = cache.get(account.id)
+            if keys is None:
+                keys = cache[account.id] = compute_sort_keys(account)
+            rows.append(keys)
+
+        # 对下标排序，键函数为列表的 __getitem__，避免逐项调用 Python 函数；
+        # 从次要键到主键依次进行稳定排序
+        order = list(range(len(accounts)))
+        for column, descending in reversed(spec):
+            index = _COLUMN_INDEX[column]
+            values = [keys[index] for keys in rows]
+            present = [i for i in order if values[i] is not None]
+            missing = [i for i in order if values[i] is None]
+            present.sort(key=values.__getitem__, reverse=descending)
+            order = present + missing
+        return [accounts[i] for i in order]
@@ -0,0 +1,214 @@
+"""
+基于 SQLite 的账号存储
+使用 WAL 模式，单个账号的修改只写一行，不再整体重写 accounts.json
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import fields
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .models import Account
+
+SCHEMA_VERSION = 1
+
+# 列顺序与 Account 字段一致
+COLUMNS: Tuple[str, ...] = tuple(f.name for f in fields(Account))
+_UPDATE_COLUMNS = tuple(c for c in COLUMNS if c != "id")
+
+_CREATE_SQL = f"""
+CREATE TABLE IF NOT EXISTS accounts (
+    id TEXT PRIMARY KEY,
+    email TEXT NOT NULL,
+    password TEXT NOT NULL DEFAULT '',
+    note TEXT NOT NULL DEFAULT '',
+    plan_name TEXT,
+    plan_tier TEXT,
+    plan_end TEXT,
+    used_prompt_credits INTEGER,
+    used_flow_credits INTEGER,
+    api_key TEXT,
+    last_sync_time TEXT,
+    has_snapshot INTEGER NOT NULL DEFAULT 0,
+    snapshot_created_at TEXT,
+    position INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_accounts_email ON accounts(email);
+CREATE INDEX IF NOT EXISTS idx_accounts_plan_end ON accounts(plan_end);
+CREATE INDEX IF NOT EXISTS idx_accounts_has_snapshot ON accounts(has_snapshot);
+CREATE INDEX IF NOT EXISTS idx_accounts_position ON accounts(position);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_COLUMN_LIST = ", ".join(COLUMNS)
+_PLACEHOLDERS = ", ".join("?" for _ in COLUMNS)
+
+# 只有内容变化时才真正更新，未变化的行不产生写入
+_UPSERT_SQL = (
+    f"INSERT INTO accounts ({_COLUMN_LIST}, position) VALUES ({_PLACEHOLDERS}, "
+    f"COALESCE(?, (SELECT IFNULL(MAX(position), -1) + 1 FROM accounts))) "
+    f"ON CONFLICT(id) DO UPDATE SET "
+    + ", ".join(f"{c} = excluded.{c}" for c in _UPDATE_COLUMNS)
+    + ", position = COALESCE(?, accounts.position) WHERE "
+    + " OR ".join(f"accounts.{c} IS NOT excluded.{c}" for c in _UPDATE_COLUMNS)
+    + " OR (? IS NOT NULL AND accounts.position IS NOT ?)"
+)
+
+
+def _to_row(account: Account) -> Tuple[Any, ...]:
+    row = tuple(getattr(account, c) for c in COLUMNS)
+    # has_snapshot 以整数存储，保证 IS NOT 比较结果稳定
+    index = COLUMNS.index("has_snapshot")
+    return row[:index] + (int(bool(row[index])),) + row[index + 1:]
+
+
+def _from_row(row: Tuple[Any, ...]) -> Account:
+    data = dict(zip(COLUMNS, row))
+    data["has_snapshot"] = bool(data["has_snapshot"])
+    return Account(**data)
+
+
+class AccountStore:
+    """账号的 SQLite 存储，所有方法线程安全"""
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._depth = 0
+        # isolation_level=None 表示自动提交，批量写入通过 transaction() 显式开启事务
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_CREATE_SQL)
+        if self.get_meta("schema_version") is None:
+            self.set_meta("schema_version", str(SCHEMA_VERSION))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """批量写入事务，可嵌套，只有最外层提交"""
+        with self._lock:
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield self._conn
+                finally:
+                    self._depth -= 1
+                return
+
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._depth = 1
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            else:
+                self._conn.execute("COMMIT")
+            finally:
+                self._depth = 0
+
+    # 元数据
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value),
+            )
+
+    # 查询
+
+    def load_all(self) -> List[Account]:
+        """按原有顺序加载全部账号"""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {_COLUMN_LIST} FROM accounts ORDER BY position").fetchall()
+        return [_from_row(row) for row in rows]
+
+    def get(self, account_id: str) -> Optional[Account]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMN_LIST} FROM accounts WHERE id = ?", (account_id,)
+            ).fetchone()
+        return _from_row(row) if row else None
+
+    def find_by_email(self, email: str) -> List[Account]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_COLUMN_LIST} FROM accounts WHERE email = ? ORDER BY position", (email,)
+            ).fetchall()
+        return [_from_row(row) for row in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM accounts").fetchone()[0]
+
+    # 写入
+
+    def upsert(self, account: Account) -> None:
+        """插入或更新单个账号，新账号排在末尾"""
+        self.upsert_many([account])
+
+    def upsert_many(self, accounts: Iterable[Account], positions: Optional[Dict[str, int]] = None) -> None:
+        """在一个事务中批量插入或更新账号"""
+        params = []
+        for account in accounts:
+            position = positions.get(account.id) if positions else None
+            params.append(_to_row(account) + (position, position, position, position))
+        if not params:
+            return
+        with self.transaction() as conn:
+            conn.executemany(_UPSERT_SQL, params)
+
+    def delete(self, account_ids: Iterable[str]) -> int:
+        """删除账号，返回删除的行数"""
+        ids = [(account_id,) for account_id in account_ids]
+        if not ids:
+            return 0
+        with self.transaction() as conn:
+            before = conn.total_changes
+            conn.executemany("DELETE FROM accounts WHERE id = ?", ids)
+            return conn.total_changes - before
+
+    def replace_all(self, accounts: List[Account]) -> None:
+        """
+        使存储内容与给定列表一致
+        未变化的行不会被重写，列表中不存在的账号会被删除
+        """
+        positions = {account.id: index for index, account in enumerate(accounts)}
+        with self.transaction() as conn:
+            existing = {row[0] for row in conn.execute("SELECT id FROM accounts")}
+            self.delete(existing - positions.keys())
+            self.upsert_many(accounts, positions)
+
+    def migrate_from(self, accounts: List[Account], source: str) -> bool:
+        """
+        从旧存储一次性导入账号
+        已迁移过或数据库中已有账号时不导入；后者同样记录迁移来源，之后不再读取旧存储
+        """
+        with self.transaction():
+            if self.get_meta("migrated_from") is not None:
+                return False
+            if self.count():
+                self.set_meta("migrated_from", source)
+                return False
+            self.replace_all(accounts)
+            self.set_meta("migrated_from", source)
+        return True
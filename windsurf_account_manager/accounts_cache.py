@@ -0,0 +1,100 @@
+"""
+accounts.json 的二进制缓存
+缓存文件与 accounts.json 放在同一目录，以源文件的修改时间、大小和哈希校验，
+命中时一次读取后直接构造账号，不再解析 JSON。
+只用于 WINDSURF_ACCOUNT_BACKEND=json 模式；默认的 SQLite 存储直接按行构造账号，不经过 JSON 解析
+"""
+from __future__ import annotations
+
+import hashlib
+import marshal
+import os
+import struct
+import sys
+from dataclasses import fields
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from .models import Account
+
+MAGIC = b"WSAC"
+FORMAT_VERSION = 1
+
+# 字段顺序与 Account 定义一致，用于按位置构造
+ACCOUNT_FIELDS = tuple(f.name for f in fields(Account))
+
+# 魔数、格式版本、Python 主次版本（marshal 格式随版本变化）、修改时间、大小、哈希
+_HEADER = struct.Struct("<4sHBBqQ32s")
+
+
+def cache_path_for(json_path: Path) -> Path:
+    return json_path.with_name(json_path.name + ".cache")
+
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=32).digest()
+
+
+def _header(stat: os.stat_result, digest: bytes) -> bytes:
+    return _HEADER.pack(
+        MAGIC, FORMAT_VERSION, sys.version_info[0], sys.version_info[1],
+        stat.st_mtime_ns, stat.st_size, digest,
+    )
+
+
+def read_cache(cache_path: Path, stat: os.stat_result, digest: bytes) -> Optional[List[Account]]:
+    """读取缓存，过期或损坏时返回 None"""
+    try:
+        blob = cache_path.read_bytes()
+    except OSError:
+        return None
+    if len(blob) < _HEADER.size or blob[:_HEADER.size] != _header(stat, digest):
+        return None
+    try:
+        columns, rows = marshal.loads(blob[_HEADER.size:])
+    except (EOFError, ValueError, TypeError):
+        return None
+    if tuple(columns) != ACCOUNT_FIELDS:
+        return None
+    try:
+        return [Account(*row) for row in rows]
+    except TypeError:
+        return None
+
+
+def write_cache(cache_path: Path, stat: os.stat_result, digest: bytes, accounts: List[Account]) -> None:
+    """原子地写入缓存"""
+    rows = [tuple(getattr(a, name) for name in ACCOUNT_FIELDS) for a in accounts]
+    payload = _header(stat, digest) + marshal.dumps((ACCOUNT_FIELDS, rows))
+    temp_path = cache_path.with_name(cache_path.name + ".tmp")
+    temp_path.write_bytes(payload)
+    os.replace(temp_path, cache_path)
+
+
+def load_accounts_cached(json_path: Path, parse: Callable[[bytes], List[Account]]) -> Tuple[List[Account], bool]:
+    """
+    加载 accounts.json，优先使用二进制缓存
+
+    Args:
+        json_path: accounts.json 路径
+        parse: 缓存失效时解析 JSON 原始字节的函数
+
+    Returns:
+        (账号列表, 是否命中缓存)。未命中时会重建缓存
+    """
+    with json_path.open("rb") as f:
+        stat = os.fstat(f.fileno())
+        data = f.read()
+    digest = _digest(data)
+    cache_path = cache_path_for(json_path)
+
+    accounts = read_cache(cache_path, stat, digest)
+    if accounts is not None:
+        return accounts, True
+
+    accounts = parse(data)
+    try:
+        write_cache(cache_path, stat, digest, accounts)
+    except OSError as e:
+        print(f"写入账号缓存失败: {e}")
+    return accounts, False
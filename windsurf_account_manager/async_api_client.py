@@ -0,0 +1,288 @@
+"""
+异步API客户端模块
+基于 aiohttp 的共享连接池，在单个事件循环线程上并发执行大量账号同步
+"""
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+from typing import Any, Callable, Coroutine, Dict, List, Mapping, Optional, Tuple
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp 为可选依赖，缺失时界面回退到线程池同步
+    aiohttp = None
+
+from .api_client import ApiFlow, ApiRequest, BaseApiClient
+from .bulk_sync import SyncResult
+from .http_transport import LatencyStats, RetryPolicy
+from .models import Account
+from .token_cache import TokenCache
+
+
+def is_available() -> bool:
+    """aiohttp 是否已安装"""
+    return aiohttp is not None
+
+
+class AsyncApiClient(BaseApiClient):
+    """与 ApiClient 接口一致的异步客户端，请求构造、响应解析和登录流程与 ApiClient 共用"""
+
+    def __init__(
+        self,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 20.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        limit: int = 200,
+        limit_per_host: int = 100,
+        token_cache: Optional[TokenCache] = None,
+        use_protobuf: bool = True,
+    ) -> None:
+        """
+        初始化异步客户端
+
+        Args:
+            connect_timeout: 建立连接超时（秒）
+            read_timeout: 读取响应超时（秒）
+            max_retries: 5xx或连接错误时的最大重试次数
+            backoff_base: 指数退避的基础等待时间（秒）
+            backoff_max: 单次退避的最长等待时间（秒）
+            limit: 连接池总连接数上限
+            limit_per_host: 每个主机的连接数上限
+            token_cache: 令牌缓存，可与同步客户端共享
+            use_protobuf: SeatManagementService 接口是否使用 application/proto
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncApiClient 需要安装 aiohttp: pip install aiohttp")
+
+        super().__init__(token_cache, use_protobuf)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retry_policy = RetryPolicy(max_retries, backoff_base, backoff_max)
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+
+        self._session: Optional["aiohttp.ClientSession"] = None
+        # 统计在事件循环线程中更新，在界面线程中读取
+        self._stats: Dict[str, LatencyStats] = {}
+        self._stats_lock = threading.Lock()
+
+    async def _get_session(self) -> "aiohttp.ClientSession":
+        """获取共享的ClientSession，首次调用时在当前事件循环中创建"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=300,
+            )
+            timeout = aiohttp.ClientTimeout(
+                sock_connect=self.connect_timeout,
+                sock_read=self.read_timeout,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._session
+
+    async def _post(self, url: str, **kwargs: Any) -> Tuple[int, bytes]:
+        """
+        发送POST请求，5xx和连接错误时按指数退避重试
+
+        Returns:
+            (状态码, 响应体)
+        """
+        session = await self._get_session()
+        host = url.split("/", 3)[2]
+        with self._stats_lock:
+            stats = self._stats.setdefault(host, LatencyStats())
+
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                async with session.post(url, **kwargs) as response:
+                    body = await response.read()
+                    status = response.status
+                with self._stats_lock:
+                    stats.record(time.perf_counter() - started)
+                if not self.retry_policy.should_retry(attempt, status):
+                    return status, body
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                with self._stats_lock:
+                    stats.record(time.perf_counter() - started)
+                    stats.errors += 1
+                if not self.retry_policy.should_retry(attempt):
+                    raise
+
+            with self._stats_lock:
+                stats.retries += 1
+            await asyncio.sleep(self.retry_policy.delay(attempt))
+            attempt += 1
+
+    async def _call(self, request: ApiRequest) -> Any:
+        """发送请求并解析响应，失败或出错时返回None"""
+        try:
+            status, body = await self._post(request.url, **request.kwargs)
+            return request.finish(status, body)
+        except Exception as e:
+            print(f"{request.error}: {e}")
+            return None
+
+    async def _drive(self, flow: ApiFlow) -> Any:
+        """依次等待登录流程中的每一步，返回流程的结果"""
+        result = None
+        while True:
+            try:
+                step = flow.send(result)
+            except StopIteration as stop:
+                return stop.value
+            result = await getattr(self, step[0])(*step[1:])
+
+    async def sign_in_with_password(self, email: str, password: str) -> Optional[Dict[str, Any]]:
+        """使用邮箱密码登录Firebase，返回包含idToken、refreshToken和expiresIn的完整响应"""
+        return await self._call(self.sign_in_with_password_request(email, password))
+
+    async def get_firebase_id_token(self, email: str, password: str) -> Optional[str]:
+        """使用邮箱密码获取Firebase ID Token"""
+        data = await self.sign_in_with_password(email, password)
+        return data.get("idToken") if data else None
+
+    async def refresh_firebase_id_token(self, refresh_token: str) -> Optional[Dict[str, Any]]:
+        """通过securetoken接口用Refresh Token换取新的ID Token"""
+        return await self._call(self.refresh_firebase_id_token_request(refresh_token))
+
+    async def get_cached_firebase_id_token(self, account: Account) -> Optional[str]:
+        """获取账号的Firebase ID Token，依次尝试缓存、Refresh Token和密码登录"""
+        return await self._drive(self.firebase_id_token_flow(account))
+
+    async def get_auth_token_for_account(self, account: Account, firebase_id_token: str) -> Optional[str]:
+        """获取Auth Token并写入缓存"""
+        return await self._drive(self.auth_token_flow(account, firebase_id_token))
+
+    async def get_auth_token(self, firebase_id_token: str) -> Optional[str]:
+        """使用Firebase ID Token获取Windsurf Auth Token"""
+        return await self._call(self.get_auth_token_request(firebase_id_token))
+
+    async def get_current_user(self, auth_token: str) -> Optional[Mapping[str, Any]]:
+        """使用Auth Token获取用户信息，protobuf模式下同时获取计划状态"""
+        return await self._drive(self.current_user_flow(auth_token))
+
+    async def get_plan_status(self, auth_token: str) -> Optional[Dict[str, Any]]:
+        """使用Auth Token获取计划状态（到期时间和额度）"""
+        return await self._call(self.get_plan_status_request(auth_token))
+
+    async def get_current_period_usage(self, bearer_token: str) -> Optional[Dict[str, Any]]:
+        """使用Bearer Token获取使用量信息"""
+        return await self._call(self.get_current_period_usage_request(bearer_token))
+
+    async def login_and_update_account(self, account: Account) -> bool:
+        """完整的登录流程并更新账号信息"""
+        return await self._drive(self.login_flow(account))
+
+    async def sync_accounts(
+        self,
+        accounts: List[Account],
+        concurrency: int = 100,
+        on_result: Optional[Callable[[SyncResult], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> List[SyncResult]:
+        """
+        以有限并发同步多个账号，结果按完成顺序返回
+
+        Args:
+            accounts: 需要同步的账号
+            concurrency: 同时进行的登录流程数量
+            on_result: 每个账号完成时的回调（在事件循环线程中执行）
+            cancel_event: 被设置后尚未开始的账号直接以取消结果返回
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def run_one(account: Account) -> SyncResult:
+            started = time.perf_counter()
+            if not account.password:
+                return SyncResult(account.id, account.email, False, "未保存密码")
+            async with semaphore:
+                if cancel_event is not None and cancel_event.is_set():
+                    return SyncResult(account.id, account.email, False, "已取消")
+                try:
+                    success = await self.login_and_update_account(account)
+                    error = None if success else "登录失败"
+                except Exception as e:
+                    success, error = False, f"同步出错: {e}"
+            return SyncResult(account.id, account.email, success, error, time.perf_counter() - started)
+
+        results: List[SyncResult] = []
+        for next_done in asyncio.as_completed([run_one(a) for a in accounts]):
+            result = await next_done
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+        return results
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取各主机的请求耗时统计"""
+        with self._stats_lock:
+            return {host: stats.to_dict() for host, stats in self._stats.items()}
+
+    async def close(self) -> None:
+        """关闭共享的ClientSession"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+class EventLoopThread:
+    """在后台线程中运行的事件循环，供Tk界面提交协程"""
+
+    def __init__(self) -> None:
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    def _run(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self._ready.set()
+        self.loop.run_forever()
+        self.loop.close()
+
+    def start(self) -> None:
+        """启动事件循环线程"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def submit(self, coro: Coroutine[Any, Any, Any]) -> "concurrent.futures.Future[Any]":
+        """提交协程到事件循环，返回线程安全的Future"""
+        self.start()
+        assert self.loop is not None
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def close(self, *cleanups: Coroutine[Any, Any, Any], timeout: float = 5.0) -> None:
+        """
+        在事件循环中依次执行清理协程（例如 AsyncApiClient.close），再停止事件循环线程
+
+        事件循环未启动时直接丢弃清理协程
+        """
+        running = self._thread is not None and self._thread.is_alive() and self.loop is not None
+        for cleanup in cleanups:
+            if not running:
+                cleanup.close()
+                continue
+            try:
+                self.submit(cleanup).result(timeout=timeout)
+            except Exception as e:
+                print(f"关闭异步客户端失败: {e}")
+        self.stop()
+
+    def stop(self) -> None:
+        """停止事件循环线程"""
+        if not self._thread or not self._thread.is_alive() or self.loop is None:
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
@@ -0,0 +1,174 @@
+"""
+按键读取和恢复登录状态
+切换账号只需要 state.vscdb 的 ItemTable 和 User/globalStorage/storage.json 中与登录、设备标识相关的键。
+按可配置的通配符模式只记录这些键（几 KB），恢复时对数据库执行一次事务内的 upsert，
+对 storage.json 只修改匹配的键，不影响编辑器的其他状态
+"""
+from __future__ import annotations
+
+import base64
+import fnmatch
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+# 按键快照的元数据格式和保存登录状态的文件名
+FORMAT_AUTH = "auth"
+AUTH_STATE_NAME = "auth_state.json"
+
+STATE_DB = "User/globalStorage/state.vscdb"
+STORAGE_JSON = "User/globalStorage/storage.json"
+
+# 默认记录的键，使用大小写敏感的通配符（与 SQLite GLOB 一致）
+DEFAULT_AUTH_KEY_PATTERNS: Dict[str, List[str]] = {
+    STATE_DB: [
+        "windsurfAuthStatus",
+        "codeium.*",
+        "windsurf.*",
+        "secret://*codeium*",
+        "secret://*windsurf*",
+        "telemetry.*",
+        "storage.serviceMachineId",
+    ],
+    STORAGE_JSON: [
+        "telemetry.*",
+        "storage.serviceMachineId",
+        "codeium.*",
+        "windsurf.*",
+    ],
+}
+
+BUSY_TIMEOUT_SECONDS = 30.0
+
+
+def _glob_clause(patterns: List[str]) -> str:
+    return " OR ".join(["key GLOB ?"] * len(patterns))
+
+
+def _matches(key: str, patterns: Iterable[str]) -> bool:
+    return any(fnmatch.fnmatchcase(key, pattern) for pattern in patterns)
+
+
+def _encode_value(value: Any) -> Any:
+    """ItemTable 的值可能是文本或二进制，二进制用 base64 保存到 JSON"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"b64": base64.b64encode(bytes(value)).decode("ascii")}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "b64" in value:
+        return base64.b64decode(value["b64"])
+    return value
+
+
+def read_item_table(db_path: Path, patterns: List[str]) -> Dict[str, Any]:
+    """读取 ItemTable 中匹配模式的键；数据库不存在时返回空字典"""
+    if not patterns or not db_path.exists():
+        return {}
+    uri = db_path.resolve().as_uri() + "?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, timeout=BUSY_TIMEOUT_SECONDS)
+    try:
+        rows = conn.execute(
+            f"SELECT key, value FROM ItemTable WHERE {_glob_clause(patterns)}", patterns
+        ).fetchall()
+    except sqlite3.OperationalError as e:
+        # 新建的配置目录中可能还没有 ItemTable
+        if "no such table" in str(e):
+            return {}
+        raise
+    finally:
+        conn.close()
+    return {key: _encode_value(value) for key, value in rows}
+
+
+def write_item_table(db_path: Path, items: Dict[str, Any], patterns: List[str]) -> int:
+    """
+    在一个事务中把 items 写入 ItemTable，并删除匹配模式但不在 items 中的键（其他账号遗留的登录信息），
+    返回写入的键数量
+    """
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path), timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("CREATE TABLE IF NOT EXISTS ItemTable (key TEXT UNIQUE ON CONFLICT REPLACE, value BLOB)")
+            if patterns:
+                stale = [
+                    (key,) for (key,) in conn.execute(
+                        f"SELECT key FROM ItemTable WHERE {_glob_clause(patterns)}", patterns
+                    )
+                    if key not in items
+                ]
+                conn.executemany("DELETE FROM ItemTable WHERE key = ?", stale)
+            conn.executemany(
+                "INSERT OR REPLACE INTO ItemTable (key, value) VALUES (?, ?)",
+                [(key, _decode_value(value)) for key, value in items.items()]
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+    return len(items)
+
+
+def read_storage_json(path: Path, patterns: List[str]) -> Dict[str, Any]:
+    """读取 storage.json 中匹配模式的顶层键"""
+    if not patterns or not path.exists():
+        return {}
+    with path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {key: value for key, value in data.items() if _matches(key, patterns)}
+
+
+def patch_storage_json(path: Path, values: Dict[str, Any], patterns: List[str]) -> int:
+    """
+    只修改 storage.json 中匹配模式的键：设置 values 中的键，删除匹配但不在 values 中的键，
+    其余键和顺序保持不变；原子写入，返回设置的键数量
+    """
+    if not values and not path.exists():
+        return 0
+    data: Dict[str, Any] = {}
+    if path.exists():
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    for key in [key for key in data if _matches(key, patterns) and key not in values]:
+        del data[key]
+    data.update(values)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(path.name + ".tmp")
+    with temp_path.open("w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=4)
+    os.replace(temp_path, path)
+    return len(values)
+
+
+def capture_auth_state(config_path: Path, patterns: Optional[Dict[str, List[str]]] = None) -> Dict[str, Any]:
+    """
+    读取配置目录中的登录状态
+
+    Returns:
+        {"patterns": 使用的模式, "item_table": {键: 值}, "storage": {键: 值}}
+    """
+    patterns = patterns or DEFAULT_AUTH_KEY_PATTERNS
+    return {
+        "patterns": patterns,
+        "item_table": read_item_table(config_path / STATE_DB, patterns.get(STATE_DB, [])),
+        "storage": read_storage_json(config_path / STORAGE_JSON, patterns.get(STORAGE_JSON, [])),
+    }
+
+
+def apply_auth_state(config_path: Path, state: Dict[str, Any]) -> Dict[str, int]:
+    """按记录时使用的模式把登录状态写回配置目录，返回各文件写入的键数量"""
+    patterns = state.get("patterns") or DEFAULT_AUTH_KEY_PATTERNS
+    return {
+        STATE_DB: write_item_table(config_path / STATE_DB, state.get("item_table", {}), patterns.get(STATE_DB, [])),
+        STORAGE_JSON: patch_storage_json(
+            config_path / STORAGE_JSON, state.get("storage", {}), patterns.get(STORAGE_JSON, [])
+        ),
+    }
@@ -11,9 +11,17 @@ import time
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Callable
+from uuid import uuid4
 
 from .config_path_manager import ConfigPathManager
-from .config_snapshot import ConfigSnapshot
+from .config_snapshot import SNAPSHOT_MODES, ConfigSnapshot, write_metadata
+from .copy_strategies import fast_copy
+from .blob_store import HASH_NAME, capture_files, manifest_digests
+from .backup_archive import (
+    ARCHIVE_NAME, BACKUP_FORMATS, DEFAULT_CODEC, FORMAT_ARCHIVE, FORMAT_OBJECTS,
+    read_index, resolve_codec
+)
+from .restore_journal import DEFAULT_MAX_JOURNALS
 from .storage import load_accounts, save_accounts
 from .models import Account
 
@@ -28,7 +36,8 @@ class AutoBackupManager:
         backup_dir: Optional[Path] = None,
         enabled: bool = True,
         backup_interval_hours: int = 24,
-        max_backups: int = 7
+        max_backups: int = 7,
+        hardlink_backups: bool = False
     ) -> None:
         """
         初始化自动备份管理器
@@ -40,12 +49,14 @@ class AutoBackupManager:
             enabled: 是否启用自动备份
             backup_interval_hours: 备份间隔（小时）
             max_backups: 最大备份数量
+            hardlink_backups: 归档格式下各账号的备份硬链接到同一个归档文件，而不是各复制一份
         """
         self.config_path_manager = config_path_manager
         self.snapshot_manager = snapshot_manager
         self.enabled = enabled
         self.backup_interval_hours = backup_interval_hours
         self.max_backups = max_backups
+        self.hardlink_backups = hardlink_backups
         
         # 设置备份目录
         if backup_dir is None:
@@ -56,6 +67,9 @@ class AutoBackupManager:
         # 配置文件路径
         self.config_file = self.backup_dir / "auto_backup_config.json"
         
+        # 最近一次读取的配置清单，按配置路径缓存，下一次备份据此跳过未变化的文件
+        self._manifests: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        
         # 后台线程
         self.backup_thread: Optional[threading.Thread] = None
         self.stop_event = threading.Event()
@@ -76,7 +90,21 @@ class AutoBackupManager:
                     self.enabled = config.get("enabled", True)
                     self.backup_interval_hours = config.get("backup_interval_hours", 24)
                     self.max_backups = config.get("max_backups", 7)
+                    self.hardlink_backups = config.get("hardlink_backups", False)
+                    self.snapshot_manager.sqlite_compact = config.get("sqlite_compact", False)
+                    self.snapshot_manager.restore_journal.max_journals = config.get(
+                        "max_restore_journals", DEFAULT_MAX_JOURNALS
+                    )
+                    if config.get("snapshot_mode") in SNAPSHOT_MODES:
+                        self.snapshot_manager.snapshot_mode = config["snapshot_mode"]
+                    if isinstance(config.get("auth_key_patterns"), dict):
+                        self.snapshot_manager.auth_key_patterns = config["auth_key_patterns"]
                     self.last_backup_time = config.get("last_backup_time")
+                    self._apply_format(
+                        config.get("backup_format", FORMAT_OBJECTS),
+                        config.get("compression", DEFAULT_CODEC),
+                        config.get("compression_level")
+                    )
                     return config
             except Exception as e:
                 print(f"加载自动备份配置失败: {e}")
@@ -94,7 +122,15 @@ class AutoBackupManager:
                 "enabled": self.enabled,
                 "backup_interval_hours": self.backup_interval_hours,
                 "max_backups": self.max_backups,
-                "last_backup_time": self.last_backup_time
+                "hardlink_backups": self.hardlink_backups,
+                "sqlite_compact": self.snapshot_manager.sqlite_compact,
+                "max_restore_journals": self.snapshot_manager.restore_journal.max_journals,
+                "snapshot_mode": self.snapshot_manager.snapshot_mode,
+                "auth_key_patterns": self.snapshot_manager.auth_key_patterns,
+                "last_backup_time": self.last_backup_time,
+                "backup_format": self.snapshot_manager.backup_format,
+                "compression": self.snapshot_manager.compression,
+                "compression_level": self.snapshot_manager.compression_level
             }
             with self.config_file.open("w", encoding="utf-8") as f:
                 json.dump(config, f, ensure_ascii=False, indent=2)
@@ -113,8 +149,60 @@ class AutoBackupManager:
         except Exception:
             return True
     
-    def create_backup(self, account_id: str, account_email: str) -> bool:
-        """为指定账号创建备份"""
+    def _apply_format(self, backup_format: str, compression: str, compression_level: Optional[int]) -> None:
+        """设置快照和备份共用的存储格式"""
+        self.snapshot_manager.backup_format = backup_format if backup_format in BACKUP_FORMATS else FORMAT_OBJECTS
+        self.snapshot_manager.compression = resolve_codec(compression)
+        self.snapshot_manager.compression_level = compression_level
+    
+    def set_backup_format(
+        self,
+        backup_format: str,
+        compression: Optional[str] = None,
+        compression_level: Optional[int] = None
+    ) -> None:
+        """
+        设置备份格式
+        
+        Args:
+            backup_format: "objects"（对象存储，默认）或 "archive"（压缩归档）
+            compression: 压缩算法 zstd/lzma/gzip，zstandard 未安装时回退到 lzma
+            compression_level: 压缩级别，为空时使用算法的默认级别
+        """
+        self._apply_format(backup_format, compression or self.snapshot_manager.compression, compression_level)
+        self.save_config()
+
+    def set_snapshot_mode(self, snapshot_mode: str, auth_key_patterns: Optional[Dict[str, List[str]]] = None) -> None:
+        """
+        设置账号快照模式（自动备份始终保存完整的配置文件）
+
+        Args:
+            snapshot_mode: "files"（完整配置文件，默认）或 "auth"（只记录登录相关的键）
+            auth_key_patterns: 按键模式下各文件记录的键的通配符模式，为空时保持不变
+        """
+        if snapshot_mode in SNAPSHOT_MODES:
+            self.snapshot_manager.snapshot_mode = snapshot_mode
+        if auth_key_patterns is not None:
+            self.snapshot_manager.auth_key_patterns = auth_key_patterns
+        self.save_config()
+
+    def create_backup(
+        self,
+        account_id: str,
+        account_email: str,
+        objects: Optional[Dict[str, Dict[str, Any]]] = None,
+        archive: Optional[Path] = None
+    ) -> bool:
+        """
+        为指定账号创建备份
+        
+        Args:
+            account_id: 账号ID
+            account_email: 账号邮箱
+            objects: 已存入对象存储的配置文件清单；批量备份时复用同一份，避免重复读取
+            archive: 已写好的压缩归档（归档格式下批量备份时使用），复制到本备份中
+        """
+        store = self.snapshot_manager.blob_store
         try:
             # 获取活动配置路径
             active_path = self.config_path_manager.get_active_path()
@@ -130,30 +218,57 @@ class AutoBackupManager:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_name = f"{account_email}_{timestamp}"
             backup_path = self.backup_dir / account_id / backup_name
+            suffix = 1
+            while backup_path.exists():
+                # 同一秒内的多次备份不能覆盖已有清单，否则其对象引用会丢失
+                backup_path = self.backup_dir / account_id / f"{backup_name}_{suffix}"
+                suffix += 1
+            backup_name = backup_path.name
             backup_path.mkdir(parents=True, exist_ok=True)
             
-            # 复制配置文件
-            for config_file in self.snapshot_manager.config_files:
-                src_file = active_path / config_file
-                if src_file.exists():
-                    # 对于嵌套路径，需要确保目标目录存在
-                    dst_file = backup_path / config_file
-                    dst_file.parent.mkdir(parents=True, exist_ok=True)
-                    shutil.copy2(src_file, dst_file)
-            
             # 创建备份元数据
             metadata = {
                 "account_id": account_id,
                 "account_email": account_email,
                 "created_at": datetime.now().isoformat(),
                 "config_path": str(active_path),
-                "os_type": self.snapshot_manager.get_os_type(),
-                "files": [f for f in self.snapshot_manager.config_files if (active_path / f).exists()]
+                "os_type": self.snapshot_manager.get_os_type()
             }
             
-            metadata_file = backup_path / "metadata.json"
-            with metadata_file.open("w", encoding="utf-8") as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
+            if self.snapshot_manager.backup_format == FORMAT_ARCHIVE or archive is not None:
+                # 配置文件写入压缩归档
+                objects = {}
+                archive_path = backup_path / ARCHIVE_NAME
+                if archive is None:
+                    index = self.snapshot_manager.write_archive(archive_path, active_path, metadata)
+                else:
+                    # 归档写入后不再修改，可以安全地硬链接
+                    fast_copy(archive, archive_path, allow_hardlink=self.hardlink_backups)
+                    index = read_index(archive_path)
+                metadata.update({
+                    "files": list(index["files"]),
+                    "format": FORMAT_ARCHIVE,
+                    "archive": ARCHIVE_NAME,
+                    "compression": index["codec"]
+                })
+            else:
+                # 配置文件存入对象存储，备份只保存清单；未变化的文件沿用上一次备份的对象
+                if objects is None:
+                    objects = capture_files(
+                        store, active_path, self.snapshot_manager.config_files,
+                        self._previous_manifest([account_id], active_path),
+                        self.snapshot_manager.copy_engine, self.snapshot_manager.sqlite_compact
+                    )
+                    self._manifests[str(active_path)] = objects
+                else:
+                    store.incref(manifest_digests(objects))
+                metadata.update({"files": list(objects), "hash": HASH_NAME, "objects": objects})
+            
+            try:
+                write_metadata(backup_path / "metadata.json", metadata)
+            except Exception:
+                store.decref(manifest_digests(objects))
+                raise
             
             # 清理旧备份
             self.cleanup_old_backups(account_id)
@@ -187,23 +302,12 @@ class AutoBackupManager:
                 print(f"备份不存在: {backup_name}")
                 return False
             
-            # 先备份当前配置
-            current_backup_dir = active_path.parent / f"Windsurf_auto_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            if active_path.exists():
-                shutil.copytree(active_path, current_backup_dir)
-                print(f"当前配置已备份到: {current_backup_dir}")
-            
-            # 确保目标目录存在
-            active_path.mkdir(parents=True, exist_ok=True)
-            
-            # 恢复配置文件
-            for config_file in self.snapshot_manager.config_files:
-                src_file = backup_path / config_file
-                if src_file.exists():
-                    dst_file = active_path / config_file
-                    # 对于嵌套路径，需要确保目标目录存在
-                    dst_file.parent.mkdir(parents=True, exist_ok=True)
-                    shutil.copy2(src_file, dst_file)
+            # 恢复配置文件，恢复前记录即将被覆盖的文件
+            metadata = self.snapshot_manager.read_source_metadata(backup_path)
+            if metadata is None:
+                print(f"备份元数据和归档索引都不存在，无法恢复: {backup_name}")
+                return False
+            self.snapshot_manager.run_restore(backup_path, metadata, [active_path], f"backup:{account_id}/{backup_name}")
             
             print(f"已恢复账号 {account_id} 的备份: {backup_name}")
             return True
@@ -223,34 +327,39 @@ class AutoBackupManager:
             if not backup_dir.is_dir():
                 continue
                 
-            metadata_file = backup_dir / "metadata.json"
-            if metadata_file.exists():
-                try:
-                    with metadata_file.open("r", encoding="utf-8") as f:
-                        metadata = json.load(f)
-                    # 添加备份名称和路径
-                    metadata["backup_name"] = backup_dir.name
-                    metadata["path"] = str(backup_dir)
-                    metadata["id"] = f"{account_id}_{backup_dir.name}"  # 用于UI中的唯一标识
-                    backups.append(metadata)
-                except Exception as e:
-                    print(f"读取备份元数据失败: {e}")
+            archive_file = backup_dir / ARCHIVE_NAME
+            try:
+                # 元数据丢失时从归档索引中恢复
+                metadata = self.snapshot_manager.read_source_metadata(backup_dir)
+                if metadata is None:
+                    continue
+                metadata.setdefault("account_id", account_id)
+                if metadata.get("format") == FORMAT_ARCHIVE and archive_file.exists():
+                    metadata["archive_size"] = archive_file.stat().st_size
+                # 添加备份名称和路径
+                metadata["backup_name"] = backup_dir.name
+                metadata["path"] = str(backup_dir)
+                metadata["id"] = f"{account_id}_{backup_dir.name}"  # 用于UI中的唯一标识
+                backups.append(metadata)
+            except Exception as e:
+                print(f"读取备份元数据失败: {e}")
         
         # 按创建时间排序（最新的在前）
         backups.sort(key=lambda x: x.get("created_at", ""), reverse=True)
         return backups
     
-    def list_all_backups(self) -> List[Dict[str, Any]]:
-        """列出所有账号的所有备份"""
+    def list_all_backups(self, account_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """列出所有账号的所有备份，account_ids 为空时从存储加载账号列表"""
         all_backups = []
         
         # 获取所有账号
-        try:
-            accounts = load_accounts()
-            account_ids = [account.id for account in accounts]
-        except Exception as e:
-            print(f"获取账号列表失败: {e}")
-            return all_backups
+        if account_ids is None:
+            try:
+                accounts = load_accounts()
+                account_ids = [account.id for account in accounts]
+            except Exception as e:
+                print(f"获取账号列表失败: {e}")
+                return all_backups
         
         # 获取每个账号的备份
         for account_id in account_ids:
@@ -268,26 +377,64 @@ class AutoBackupManager:
         if len(backups) <= self.max_backups:
             return
         
-        # 删除多余的备份
-        for backup in backups[self.max_backups:]:
-            backup_name = backup.get("backup_name")
-            if backup_name:
-                backup_path = self.backup_dir / account_id / backup_name
-                try:
-                    shutil.rmtree(backup_path)
-                    print(f"已删除旧备份: {backup_name}")
-                except Exception as e:
-                    print(f"删除旧备份失败: {e}")
+        # 删除多余的备份，释放的引用计数一次写入
+        with self.snapshot_manager.blob_store.batch():
+            for backup in backups[self.max_backups:]:
+                backup_name = backup.get("backup_name")
+                if backup_name:
+                    backup_path = self.backup_dir / account_id / backup_name
+                    try:
+                        self._remove_backup_dir(backup_path)
+                        print(f"已删除旧备份: {backup_name}")
+                    except Exception as e:
+                        print(f"删除旧备份失败: {e}")
     
     def backup_all_accounts(self) -> None:
-        """为所有有快照的账号创建备份"""
+        """
+        为所有有快照的账号创建备份
+        
+        所有账号备份的是同一个活动配置目录，只读取并存储一次，各账号的备份引用相同的对象；
+        归档格式下只压缩一次，各账号的备份复制同一个归档
+        """
+        store = self.snapshot_manager.blob_store
+        objects: Optional[Dict[str, Dict[str, Any]]] = None
+        shared_archive: Optional[Path] = None
         try:
-            accounts = load_accounts()
-            for account in accounts:
-                if account.has_snapshot:
+            accounts = [account for account in load_accounts() if account.has_snapshot]
+            active_path = self.config_path_manager.get_active_path()
+            if not accounts or not active_path:
+                for account in accounts:
                     self.create_backup(account.id, account.email)
+                return
+            
+            active_path = Path(active_path)
+            if self.snapshot_manager.backup_format == FORMAT_ARCHIVE:
+                shared_archive = self.backup_dir / f"sweep_{uuid4().hex}{Path(ARCHIVE_NAME).suffix}"
+                self.snapshot_manager.write_archive(shared_archive, active_path, {
+                    "created_at": datetime.now().isoformat(),
+                    "config_path": str(active_path),
+                    "os_type": self.snapshot_manager.get_os_type()
+                })
+                for account in accounts:
+                    self.create_backup(account.id, account.email, archive=shared_archive)
+                return
+            
+            objects = capture_files(
+                store, active_path, self.snapshot_manager.config_files,
+                self._previous_manifest([account.id for account in accounts], active_path),
+                self.snapshot_manager.copy_engine, self.snapshot_manager.sqlite_compact
+            )
+            self._manifests[str(active_path)] = objects
+            for account in accounts:
+                self.create_backup(account.id, account.email, objects)
         except Exception as e:
             print(f"为所有账号创建备份失败: {e}")
+        finally:
+            # 释放本轮读取时持有的引用，对象由各备份的清单继续引用
+            if objects is not None:
+                store.decref(manifest_digests(objects))
+            if shared_archive is not None:
+                shared_archive.unlink(missing_ok=True)
     
     def backup_worker(self) -> None:
         """后台备份工作线程"""
@@ -350,13 +497,45 @@ class AutoBackupManager:
             return True
         
         try:
-            shutil.rmtree(backup_path)
+            self._remove_backup_dir(backup_path)
             print(f"已删除备份: {backup_name}")
             return True
         except Exception as e:
             print(f"删除备份失败: {e}")
             return False
     
+    def _previous_manifest(self, account_ids: List[str], active_path: Path) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        获取同一配置路径上一次备份的清单，优先使用内存中的缓存，
+        否则读取这些账号中第一个有备份的账号的最新备份
+        """
+        cached = self._manifests.get(str(active_path))
+        if cached is not None:
+            return cached
+        for account_id in account_ids:
+            for backup in self.list_backups(account_id):
+                if "objects" in backup and backup.get("config_path") == str(active_path):
+                    return backup["objects"]
+        return None
+    
+    def _read_metadata(self, backup_path: Path) -> Optional[Dict[str, Any]]:
+        """读取备份元数据，不存在或损坏时返回 None"""
+        metadata_file = backup_path / "metadata.json"
+        if not metadata_file.exists():
+            return None
+        try:
+            with metadata_file.open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"读取备份元数据失败: {e}")
+            return None
+    
+    def _remove_backup_dir(self, backup_path: Path) -> None:
+        """删除备份目录，并释放其清单引用的对象"""
+        metadata = self._read_metadata(backup_path) or {}
+        shutil.rmtree(backup_path)
+        self.snapshot_manager.blob_store.decref(manifest_digests(metadata.get("objects", {})))
+    
     def get_config(self) -> Dict[str, Any]:
         """获取当前配置"""
         return {
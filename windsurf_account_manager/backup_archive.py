@@ -0,0 +1,318 @@
+"""
+压缩备份归档
+每个备份的配置文件写入一个流式压缩的归档文件，文件逐个独立压缩后顺序拼接，
+末尾附带 JSON 索引（各文件的偏移、长度、大小、哈希），读取单个文件时只需解压对应的片段
+
+归档结构:
+    MAGIC | 文件1压缩数据 | 文件2压缩数据 | ... | 索引 JSON | 尾部 (索引偏移, 索引长度, END_MAGIC)
+"""
+from __future__ import annotations
+
+import concurrent.futures
+import json
+import lzma
+import os
+import shutil
+import struct
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # zstandard 为可选依赖，缺失时回退到 gzip
+    zstandard = None
+
+from .blob_store import COPY_BUFFER_SIZE, HASH_NAME, new_hasher
+from .copy_engine import CopyTask
+from .sqlite_capture import STRATEGY_SQLITE_BACKUP, capture_to_temp, is_sqlite_path, restore_database, source_key
+
+# 备份格式：对象存储清单（默认）或压缩归档
+FORMAT_OBJECTS = "objects"
+FORMAT_ARCHIVE = "archive"
+BACKUP_FORMATS = (FORMAT_OBJECTS, FORMAT_ARCHIVE)
+
+ARCHIVE_NAME = "files.wsbak"
+MAGIC = b"WSBAK\x00\x01\x00"
+END_MAGIC = b"WSBAKEND"
+FOOTER = struct.Struct("<QQ8s")
+
+CODECS = ("zstd", "lzma", "gzip")
+DEFAULT_CODEC = "zstd"
+# zstandard 未安装或压缩算法未知时使用标准库中最快的 gzip
+FALLBACK_CODEC = "gzip"
+DEFAULT_LEVELS = {"zstd": 3, "lzma": 6, "gzip": 6}
+
+# 单个文件压缩结果在内存中缓冲的上限，超过后落到临时文件
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+
+def available_codecs() -> List[str]:
+    return [codec for codec in CODECS if codec != "zstd" or zstandard is not None]
+
+
+_fallback_reported = set()
+
+
+def resolve_codec(codec: Optional[str]) -> str:
+    """未知或不可用的压缩算法回退到 gzip，每种算法只提示一次"""
+    if codec in available_codecs():
+        return codec
+    if codec not in _fallback_reported:
+        _fallback_reported.add(codec)
+        if codec == "zstd":
+            print("未安装 zstandard，备份归档改用 gzip 压缩（pip install zstandard 后使用 zstd）")
+        else:
+            print(f"未知的压缩算法 {codec}，备份归档改用 gzip 压缩")
+    return FALLBACK_CODEC
+
+
+def _compressor(codec: str, level: int) -> Any:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=level).compressobj()
+    if codec == "lzma":
+        return lzma.LZMACompressor(format=lzma.FORMAT_XZ, preset=level)
+    return zlib.compressobj(level, zlib.DEFLATED, 31)
+
+
+def _decompressor(codec: str) -> Any:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("解压该备份需要安装 zstandard: pip install zstandard")
+        return zstandard.ZstdDecompressor().decompressobj()
+    if codec == "lzma":
+        return lzma.LZMADecompressor()
+    return zlib.decompressobj(31)
+
+
+def _compress_member(src: Path, codec: str, level: int, compact_sqlite: bool = False) -> Tuple[Any, Dict[str, Any]]:
+    """
+    压缩单个文件，返回 (压缩数据的临时缓冲, 索引条目)；在压缩线程池中执行
+
+    SQLite 数据库先通过在线备份 API 一致地读取到临时文件，再压缩该副本
+    """
+    if is_sqlite_path(src.name):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            captured = Path(temp_dir) / src.name
+            key = source_key(src)
+            if capture_to_temp(src, captured, compact_sqlite):
+                spool, entry = _compress_stream(captured, codec, level)
+                st = src.stat()
+                entry.update({"mtime_ns": st.st_mtime_ns, "mode": st.st_mode, "source": key})
+                return spool, entry
+    return _compress_stream(src, codec, level)
+
+
+def _compress_stream(src: Path, codec: str, level: int) -> Tuple[Any, Dict[str, Any]]:
+    st = src.stat()
+    hasher = new_hasher()
+    size = 0
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    try:
+        compressor = _compressor(codec, level)
+        with src.open("rb") as f:
+            while True:
+                chunk = f.read(COPY_BUFFER_SIZE)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                size += len(chunk)
+                spool.write(compressor.compress(chunk))
+        spool.write(compressor.flush())
+    except BaseException:
+        spool.close()
+        raise
+    return spool, {
+        "digest": hasher.hexdigest(),
+        "size": size,
+        "mtime_ns": st.st_mtime_ns,
+        "mode": st.st_mode,
+    }
+
+
+def write_archive(
+    path: Path,
+    base: Path,
+    relpaths: Iterable[str],
+    metadata: Optional[Dict[str, Any]] = None,
+    codec: str = DEFAULT_CODEC,
+    level: Optional[int] = None,
+    executor: Optional[concurrent.futures.Executor] = None,
+    compact_sqlite: bool = False
+) -> Dict[str, Any]:
+    """
+    把 base 下存在的文件写入归档，返回索引
+
+    提供 executor 时各文件在线程池中并行压缩（zlib/lzma/zstd 压缩时释放 GIL），
+    当前线程按顺序把压缩结果写入归档；归档先写入临时文件，完成后原子替换
+    """
+    codec = resolve_codec(codec)
+    if level is None:
+        level = DEFAULT_LEVELS[codec]
+    sources = [relpath for relpath in relpaths if (base / relpath).is_file()]
+    if executor is not None:
+        pending = [
+            executor.submit(_compress_member, base / relpath, codec, level, compact_sqlite)
+            for relpath in sources
+        ]
+    else:
+        pending = []
+
+    files: Dict[str, Dict[str, Any]] = {}
+    temp_path = path.with_name(path.name + ".tmp")
+    consumed = 0
+    try:
+        with temp_path.open("wb") as out:
+            out.write(MAGIC)
+            for position, relpath in enumerate(sources):
+                consumed = position + 1
+                if pending:
+                    spool, entry = pending[position].result()
+                else:
+                    spool, entry = _compress_member(base / relpath, codec, level, compact_sqlite)
+                try:
+                    spool.seek(0)
+                    entry["offset"] = out.tell()
+                    shutil.copyfileobj(spool, out, COPY_BUFFER_SIZE)
+                    entry["length"] = out.tell() - entry["offset"]
+                finally:
+                    spool.close()
+                files[relpath] = entry
+
+            index = {
+                "version": 1,
+                "codec": codec,
+                "level": level,
+                "hash": HASH_NAME,
+                "metadata": metadata or {},
+                "files": files,
+            }
+            data = json.dumps(index, ensure_ascii=False).encode("utf-8")
+            offset = out.tell()
+            out.write(data)
+            out.write(FOOTER.pack(offset, len(data), END_MAGIC))
+        os.replace(temp_path, path)
+        return index
+    except BaseException:
+        # 尚未写入的压缩结果：取消未开始的，正在压缩的完成后关闭其临时缓冲
+        for future in pending[consumed:]:
+            if not future.cancel():
+                future.add_done_callback(_close_spool)
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+def _close_spool(future: "concurrent.futures.Future[Tuple[Any, Dict[str, Any]]]") -> None:
+    if not future.cancelled() and future.exception() is None:
+        future.result()[0].close()
+
+
+def read_index(path: Path) -> Dict[str, Any]:
+    """读取归档末尾的索引，格式不正确时抛出 ValueError"""
+    with path.open("rb") as f:
+        return _read_index(f)
+
+
+def _read_index(f: Any) -> Dict[str, Any]:
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("不是有效的备份归档")
+    f.seek(-FOOTER.size, os.SEEK_END)
+    offset, length, end_magic = FOOTER.unpack(f.read(FOOTER.size))
+    if end_magic != END_MAGIC:
+        raise ValueError("备份归档不完整")
+    f.seek(offset)
+    return json.loads(f.read(length).decode("utf-8"))
+
+
+def _iter_member(f: Any, codec: str, entry: Dict[str, Any]) -> Iterator[bytes]:
+    """解压单个文件，按块产出内容并校验大小和哈希"""
+    decompressor = _decompressor(codec)
+    hasher = new_hasher()
+    size = 0
+    f.seek(entry["offset"])
+    remaining = entry["length"]
+    while remaining > 0:
+        chunk = f.read(min(COPY_BUFFER_SIZE, remaining))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+        data = decompressor.decompress(chunk)
+        if data:
+            hasher.update(data)
+            size += len(data)
+            yield data
+    if codec == "gzip":
+        data = decompressor.flush()
+        if data:
+            hasher.update(data)
+            size += len(data)
+            yield data
+    if remaining or size != entry["size"] or hasher.hexdigest() != entry["digest"]:
+        raise ValueError("备份归档中的文件已损坏")
+
+
+def read_member(path: Path, relpath: str) -> bytes:
+    """读取归档中的单个文件"""
+    with path.open("rb") as f:
+        index = _read_index(f)
+        entry = index["files"][relpath]
+        return b"".join(_iter_member(f, index["codec"], entry))
+
+
+def _extract_member(path: Path, codec: str, entry: Dict[str, Any], dst: Path) -> Tuple[int, str]:
+    """
+    解压单个文件到 dst 并恢复修改时间和权限，返回 (字节数, 方式)；每次调用单独打开归档，可并发执行
+
+    通过 SQLite 读取的数据库先解压到临时文件，再用在线备份 API 写入目标数据库
+    """
+    if "source" in entry:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            extracted = Path(temp_dir) / dst.name
+            _extract_member(path, codec, {key: value for key, value in entry.items() if key != "source"}, extracted)
+            restore_database(extracted, dst)
+        return entry["size"], STRATEGY_SQLITE_BACKUP
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("rb") as f, dst.open("wb") as out:
+        for data in _iter_member(f, codec, entry):
+            out.write(data)
+    os.chmod(dst, entry["mode"] & 0o7777)
+    os.utime(dst, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+    return entry["size"], "decompress"
+
+
+def extract_tasks(
+    path: Path,
+    target: Path,
+    relpaths: Optional[Iterable[str]] = None,
+    stage: Optional[Callable[[Path], Path]] = None
+) -> List[Tuple[str, CopyTask]]:
+    """
+    返回把归档中的文件解压到 target 目录的任务 [(相对路径, 任务)]
+
+    Args:
+        relpaths: 只解压这些文件，为空时解压全部
+        stage: 把目标路径映射为实际写入的暂存路径；数据库始终通过在线备份 API 直接写入目标
+    """
+    index = read_index(path)
+    files = index["files"]
+    wanted = list(files) if relpaths is None else [relpath for relpath in relpaths if relpath in files]
+
+    def destination(relpath: str) -> Path:
+        if stage is None or "source" in files[relpath]:
+            return target / relpath
+        return stage(target / relpath)
+
+    return [
+        (relpath, lambda entry=files[relpath], dst=destination(relpath): _extract_member(path, index["codec"], entry, dst))
+        for relpath in wanted
+    ]
+
+
+def extract_files(path: Path, target: Path, relpaths: Optional[Iterable[str]] = None) -> List[str]:
+    """把归档中的文件解压到 target 目录，并恢复修改时间和权限，返回解压的相对路径"""
+    extracted = []
+    for relpath, task in extract_tasks(path, target, relpaths):
+        task()
+        extracted.append(relpath)
+    return extracted
@@ -0,0 +1,389 @@
+"""
+内容寻址的对象存储
+配置快照和自动备份中的文件按内容哈希（BLAKE2b-256）存放一次，
+快照和备份只保存引用这些对象的清单，对象按引用计数删除
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import stat as stat_module
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from uuid import uuid4
+
+from .copy_engine import CopyEngine, CopyTask
+from .copy_strategies import STRATEGY_REFLINK, fast_copy, fsync_dir, may_reflink
+from .sqlite_capture import (
+    STRATEGY_SQLITE_BACKUP, capture_to_temp, is_sqlite_file, is_sqlite_path, restore_database, source_key
+)
+
+HASH_NAME = "blake2b"
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def new_hasher() -> "hashlib._Hash":
+    return hashlib.blake2b(digest_size=32)
+
+
+def hash_file(path: Path) -> Tuple[str, int]:
+    """计算文件的内容哈希，返回 (十六进制摘要, 字节数)"""
+    hasher = new_hasher()
+    size = 0
+    with path.open("rb") as f:
+        while True:
+            chunk = f.read(COPY_BUFFER_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+            size += len(chunk)
+    return hasher.hexdigest(), size
+
+
+class BlobStore:
+    """
+    对象存储目录结构:
+        objects/ab/cdef...   对象内容，文件名为摘要去掉前两位
+        objects/tmp/         写入中的临时文件
+        objects/refs.json    各对象的引用计数
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.tmp_dir = root / "tmp"
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        self.refs_file = root / "refs.json"
+        self._lock = threading.RLock()
+        self._refs: Dict[str, int] = self._load_refs()
+        # batch() 嵌套层数；批量期间引用计数只在内存中修改，结束时写入一次
+        self._batch_depth = 0
+        self._refs_dirty = False
+
+    def _load_refs(self) -> Dict[str, int]:
+        if not self.refs_file.exists():
+            return {}
+        try:
+            with self.refs_file.open("r", encoding="utf-8") as f:
+                return {k: int(v) for k, v in json.load(f).items()}
+        except Exception as e:
+            print(f"读取对象引用计数失败: {e}")
+            return {}
+
+    def _save_refs(self) -> None:
+        """在锁内调用；批量期间只标记需要写入"""
+        self._refs_dirty = True
+        if self._batch_depth == 0:
+            self._write_refs()
+
+    def _write_refs(self) -> None:
+        """原子地写入引用计数并 fsync，恢复日志依赖引用计数在崩溃后仍然有效"""
+        temp_path = self.refs_file.with_name(self.refs_file.name + ".tmp")
+        with temp_path.open("w", encoding="utf-8") as f:
+            json.dump(self._refs, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.refs_file)
+        fsync_dir(self.root)
+        self._refs_dirty = False
+
+    @contextmanager
+    def batch(self) -> Iterator["BlobStore"]:
+        """
+        批量修改引用计数：期间的存入、引用和释放只修改内存中的计数，最外层结束时写入一次 refs.json
+
+        调用方应在批量结束后再写入引用这些对象的清单；崩溃时未写入的只可能是多出的引用（对象不会被提前删除）
+        或尚未被任何清单引用的新对象
+        """
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and self._refs_dirty:
+                    self._write_refs()
+
+    # 对象读写
+
+    def path_for(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:]
+
+    def exists(self, digest: str) -> bool:
+        return self.path_for(digest).exists()
+
+    def put_file(self, src: Path) -> Tuple[str, int]:
+        """
+        存入文件并增加一次引用，返回 (摘要, 字节数)
+
+        边读边计算哈希并写入临时文件，源文件在复制过程中被修改也能得到一致的对象；
+        相同内容的对象已存在时丢弃临时文件。放置对象和增加引用在同一把锁内完成，
+        避免对象在被引用前被并发的 decref 删除。
+        文件系统支持 reflink 时先以写时复制方式克隆到临时文件（不写入数据），再对克隆计算哈希
+        """
+        if may_reflink(self.tmp_dir):
+            temp_path = self.tmp_dir / uuid4().hex
+            try:
+                fast_copy(src, temp_path, strategies=(STRATEGY_REFLINK,), copy_metadata=False)
+            except OSError:
+                temp_path.unlink(missing_ok=True)
+            else:
+                return self.adopt(temp_path)
+
+        hasher = new_hasher()
+        size = 0
+        temp_path = self.tmp_dir / uuid4().hex
+        try:
+            with src.open("rb") as fsrc, temp_path.open("wb") as fdst:
+                while True:
+                    chunk = fsrc.read(COPY_BUFFER_SIZE)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+                    fdst.write(chunk)
+                    size += len(chunk)
+            digest = hasher.hexdigest()
+            self._place(temp_path, digest)
+            return digest, size
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+
+    def put_sqlite(self, src: Path, compact: bool = False) -> Optional[Tuple[str, int]]:
+        """
+        通过 SQLite 在线备份一致地读取数据库并存入，返回 (摘要, 字节数)；
+        src 不是 SQLite 数据库时返回 None，由调用方按普通文件存入
+        """
+        temp_path = self.tmp_dir / uuid4().hex
+        if not capture_to_temp(src, temp_path, compact):
+            return None
+        return self.adopt(temp_path)
+
+    def adopt(self, temp_path: Path) -> Tuple[str, int]:
+        """把 tmp 目录中已写好的文件作为对象存入并增加一次引用，返回 (摘要, 字节数)"""
+        try:
+            digest, size = hash_file(temp_path)
+            self._place(temp_path, digest)
+            return digest, size
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+
+    def put_bytes(self, data: bytes) -> str:
+        """存入字节内容并增加一次引用，返回摘要"""
+        hasher = new_hasher()
+        hasher.update(data)
+        digest = hasher.hexdigest()
+        temp_path = self.tmp_dir / uuid4().hex
+        temp_path.write_bytes(data)
+        self._place(temp_path, digest)
+        return digest
+
+    def _place(self, temp_path: Path, digest: str) -> None:
+        target = self.path_for(digest)
+        with self._lock:
+            if target.exists():
+                temp_path.unlink()
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(temp_path, target)
+            self._refs[digest] = self._refs.get(digest, 0) + 1
+            self._save_refs()
+
+    def read_bytes(self, digest: str) -> bytes:
+        return self.path_for(digest).read_bytes()
+
+    def copy_to(self, digest: str, dst: Path, mtime_ns: Optional[int] = None, mode: Optional[int] = None) -> str:
+        """
+        把对象复制到目标路径，并按清单恢复修改时间和权限（与 copy2 一致），返回使用的复制策略
+
+        目标是会被修改的配置文件，不能使用硬链接
+        """
+        _, strategy = fast_copy(self.path_for(digest), dst, COPY_BUFFER_SIZE, copy_metadata=False)
+        if mode is not None:
+            os.chmod(dst, mode & 0o7777)
+        if mtime_ns is not None:
+            os.utime(dst, ns=(mtime_ns, mtime_ns))
+        return strategy
+
+    # 引用计数
+
+    def incref(self, digests: Iterable[str]) -> None:
+        with self._lock:
+            for digest in digests:
+                self._refs[digest] = self._refs.get(digest, 0) + 1
+            self._save_refs()
+
+    def claim(self, digests: Iterable[str]) -> Set[str]:
+        """
+        为已存在的对象各增加一次引用（同一摘要出现多次则增加多次），返回成功引用的摘要；
+        对象已被删除的摘要不增加引用，调用方需重新存入
+        """
+        claimed: Set[str] = set()
+        with self._lock:
+            for digest in digests:
+                if digest in claimed or self.exists(digest):
+                    self._refs[digest] = self._refs.get(digest, 0) + 1
+                    claimed.add(digest)
+            if claimed:
+                self._save_refs()
+        return claimed
+
+    def decref(self, digests: Iterable[str]) -> int:
+        """减少引用计数，删除不再被引用的对象，返回删除的对象数量"""
+        removed = 0
+        with self._lock:
+            for digest in digests:
+                count = self._refs.get(digest, 0) - 1
+                if count > 0:
+                    self._refs[digest] = count
+                    continue
+                self._refs.pop(digest, None)
+                try:
+                    self.path_for(digest).unlink()
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+            self._save_refs()
+        return removed
+
+    def refcount(self, digest: str) -> int:
+        return self._refs.get(digest, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        """对象数量和占用字节数"""
+        count = 0
+        total = 0
+        with self._lock:
+            for digest in self._refs:
+                path = self.path_for(digest)
+                if path.exists():
+                    count += 1
+                    total += path.stat().st_size
+        return {"objects": count, "bytes": total}
+
+
+def capture_files(
+    store: BlobStore,
+    base: Path,
+    relpaths: Iterable[str],
+    previous: Optional[Dict[str, Dict[str, Any]]] = None,
+    engine: Optional[CopyEngine] = None,
+    compact_sqlite: bool = False
+) -> Dict[str, Dict[str, Any]]:
+    """
+    把 base 下存在的文件存入对象存储（每个文件增加一次引用），返回清单
+    {相对路径: {"digest", "size", "mtime_ns", "mode"}}
+
+    提供上一次的清单时按增量方式读取：大小和修改时间都未变化的文件直接引用原对象，
+    不读取内容；只有 stat 信息变化的文件才计算哈希，内容未变时同样引用原对象。
+    提供 engine 时需要读取的文件在复制线程池中并发处理。
+    SQLite 数据库（*.vscdb）通过在线备份 API 读取，包含 -wal 中的修改；
+    判断是否变化时同时比较 -wal 文件，compact_sqlite 时使用 VACUUM INTO 写出压缩后的副本。
+    所有引用计数的修改在返回前一次写入
+    """
+    # 整次读取只写入一次引用计数
+    with store.batch():
+        previous = previous or {}
+        entries: Dict[str, Dict[str, Any]] = {}
+        stats: Dict[str, os.stat_result] = {}
+        unchanged: Dict[str, Dict[str, Any]] = {}
+        for relpath in relpaths:
+            try:
+                st = (base / relpath).stat()
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            if not stat_module.S_ISREG(st.st_mode):
+                continue
+            stats[relpath] = st
+            old = previous.get(relpath)
+            if not old:
+                continue
+            if "source" in old:
+                # 上次通过 SQLite 读取的数据库
+                if old["source"] == source_key(base / relpath):
+                    unchanged[relpath] = old
+            elif old.get("size") == st.st_size and old.get("mtime_ns") == st.st_mtime_ns:
+                unchanged[relpath] = old
+
+        # 未变化的文件一次性增加引用
+        claimed = store.claim(old["digest"] for old in unchanged.values()) if unchanged else set()
+
+        def store_file(relpath: str) -> Dict[str, Any]:
+            src = base / relpath
+            st = stats[relpath]
+            if is_sqlite_path(relpath):
+                key = source_key(src)
+                stored = store.put_sqlite(src, compact_sqlite)
+                if stored is not None:
+                    entry = _entry(stored[0], stored[1], st)
+                    entry["source"] = key
+                    return entry
+            if relpath in previous:
+                # 只是修改时间变化时内容往往相同，先计算哈希，命中已有对象就不再复制
+                digest, size = hash_file(src)
+                if digest in store.claim([digest]):
+                    return _entry(digest, size, st)
+            digest, size = store.put_file(src)
+            return _entry(digest, size, st)
+
+        pending = []
+        for relpath, st in stats.items():
+            old = unchanged.get(relpath)
+            if old is not None and old["digest"] in claimed:
+                entries[relpath] = dict(old, mode=st.st_mode)
+            else:
+                pending.append(relpath)
+        if engine is not None:
+            stored = engine.map(store_file, pending)
+        else:
+            stored = [store_file(relpath) for relpath in pending]
+        entries.update(zip(pending, stored))
+        # 清单按传入的文件顺序排列
+        return {relpath: entries[relpath] for relpath in stats}
+
+
+def _entry(digest: str, size: int, st: os.stat_result) -> Dict[str, Any]:
+    return {
+        "digest": digest,
+        "size": size,
+        "mtime_ns": st.st_mtime_ns,
+        "mode": st.st_mode,
+    }
+
+
+def restore_tasks(
+    store: BlobStore,
+    entries: Dict[str, Dict[str, Any]],
+    target: Path,
+    stage: Optional[Callable[[Path], Path]] = None
+) -> List[CopyTask]:
+    """
+    按清单把对象恢复到 target 目录的复制任务
+
+    Args:
+        stage: 把目标路径映射为实际写入的暂存路径，由调用方在所有任务完成后替换到目标路径；
+            数据库始终通过在线备份 API 直接写入目标
+    """
+    def task(relpath: str, entry: Dict[str, Any]) -> Tuple[int, str]:
+        if "source" in entry and is_sqlite_file(store.path_for(entry["digest"])):
+            # 通过在线备份 API 写入数据库，正在运行的 Windsurf 不会读到写了一半的文件
+            return restore_database(store.path_for(entry["digest"]), target / relpath), STRATEGY_SQLITE_BACKUP
+        dst = target / relpath if stage is None else stage(target / relpath)
+        strategy = store.copy_to(entry["digest"], dst, entry.get("mtime_ns"), entry.get("mode"))
+        return entry.get("size", 0), strategy
+
+    return [lambda relpath=relpath, entry=entry: task(relpath, entry) for relpath, entry in entries.items()]
+
+
+def restore_files(store: BlobStore, entries: Dict[str, Dict[str, Any]], target: Path) -> None:
+    """按清单把对象恢复到 target 目录"""
+    for task in restore_tasks(store, entries, target):
+        task()
+
+
+def manifest_digests(entries: Dict[str, Dict[str, Any]]) -> List[str]:
+    return [entry["digest"] for entry in entries.values()]
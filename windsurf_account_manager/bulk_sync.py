@@ -0,0 +1,188 @@
+"""
+批量同步模块
+以有限并发对多个账号执行 Firebase → GetOneTimeAuthToken → GetCurrentUser 登录流程
+"""
+from __future__ import annotations
+
+import itertools
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, List, Optional
+
+from .api_client import ApiClient
+from .models import Account
+from . import storage
+
+
+@dataclass
+class SyncResult:
+    """单个账号的同步结果"""
+    account_id: str
+    email: str
+    success: bool
+    error: Optional[str] = None
+    elapsed_seconds: float = 0.0
+
+
+class _SyncJob:
+    """流水线中单个账号的状态"""
+
+    __slots__ = ("account", "started", "firebase_id_token", "auth_token", "used_cached_auth")
+
+    def __init__(self, account: Account) -> None:
+        self.account = account
+        self.started = time.perf_counter()
+        self.firebase_id_token: Optional[str] = None
+        self.auth_token: Optional[str] = None
+        self.used_cached_auth = False
+
+
+class BulkSyncEngine:
+    """
+    批量同步引擎
+
+    三个登录阶段被拆成独立任务放入同一个优先队列，越靠后的阶段优先级越高，
+    因此不同账号的各阶段可以在固定数量的工作线程上交错执行，
+    已经走到最后阶段的账号会先完成并立即返回结果。
+    令牌缓存中Auth Token仍有效的账号直接从最后阶段开始。
+    """
+
+    # 阶段编号，越大越接近完成
+    STAGE_FIREBASE = 0
+    STAGE_AUTH_TOKEN = 1
+    STAGE_CURRENT_USER = 2
+
+    def __init__(self, client: Optional[ApiClient] = None, max_workers: int = 16) -> None:
+        """
+        初始化批量同步引擎
+
+        Args:
+            client: 共享的API客户端，未提供时新建
+            max_workers: 最大并发请求数
+        """
+        self.client = client or ApiClient()
+        self.max_workers = max(1, max_workers)
+        self._cancel_event = threading.Event()
+
+    def cancel(self) -> None:
+        """取消正在进行的同步，尚未开始的账号会以失败结果返回"""
+        self._cancel_event.set()
+
+    def _run_stage(self, job: _SyncJob, stage: int) -> Any:
+        """执行单个阶段，返回下一阶段编号或最终结果"""
+        account = job.account
+        if stage == self.STAGE_FIREBASE:
+            job.firebase_id_token = self.client.get_cached_firebase_id_token(account)
+            if not job.firebase_id_token:
+                return "Firebase登录失败"
+            return self.STAGE_AUTH_TOKEN
+        if stage == self.STAGE_AUTH_TOKEN:
+            job.auth_token = self.client.get_auth_token_for_account(account, job.firebase_id_token or "")
+            if not job.auth_token:
+                return "获取Auth Token失败"
+            return self.STAGE_CURRENT_USER
+
+        user_data = self.client.get_current_user(job.auth_token or "")
+        if not user_data:
+            self.client.token_cache.invalidate_auth_token(account.id)
+            if job.used_cached_auth:
+                # 缓存的Auth Token被拒绝，从头走一遍登录流程
+                job.used_cached_auth = False
+                return self.STAGE_FIREBASE
+            return "获取用户信息失败"
+        if not self.client.apply_user_data(account, user_data):
+            return "更新账号信息失败"
+        return None
+
+    def iter_sync(self, accounts: List[Account]) -> Iterator[SyncResult]:
+        """同步账号，并按完成顺序逐个返回结果"""
+        self._cancel_event.clear()
+        results: "queue.Queue[SyncResult]" = queue.Queue()
+        tasks: "queue.PriorityQueue[Any]" = queue.PriorityQueue()
+        counter = itertools.count()
+
+        def finish(job: _SyncJob, error: Optional[str]) -> None:
+            results.put(SyncResult(
+                account_id=job.account.id,
+                email=job.account.email,
+                success=error is None,
+                error=error,
+                elapsed_seconds=time.perf_counter() - job.started,
+            ))
+
+        def worker() -> None:
+            while True:
+                _priority, _seq, job, stage = tasks.get()
+                if job is None:
+                    return
+                if self._cancel_event.is_set():
+                    finish(job, "已取消")
+                    continue
+                try:
+                    outcome = self._run_stage(job, stage)
+                except Exception as e:
+                    outcome = f"同步出错: {e}"
+                if isinstance(outcome, int):
+                    tasks.put((-outcome, next(counter), job, outcome))
+                else:
+                    finish(job, outcome)
+
+        pending = 0
+        for account in accounts:
+            job = _SyncJob(account)
+            job.auth_token = self.client.get_cached_auth_token(account)
+            if job.auth_token:
+                # 缓存的Auth Token仍有效，直接进入最后阶段
+                job.used_cached_auth = True
+                tasks.put((-self.STAGE_CURRENT_USER, next(counter), job, self.STAGE_CURRENT_USER))
+            elif not account.password:
+                finish(job, "未保存密码")
+            else:
+                tasks.put((-self.STAGE_FIREBASE, next(counter), job, self.STAGE_FIREBASE))
+            pending += 1
+
+        threads = [
+            threading.Thread(target=worker, daemon=True)
+            for _ in range(min(self.max_workers, max(1, pending)))
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            for _ in range(pending):
+                yield results.get()
+        finally:
+            # 哨兵任务的优先级最低，排在所有真实任务之后
+            for _ in threads:
+                tasks.put((float("inf"), next(counter), None, None))
+
+    def sync(
+        self,
+        accounts: List[Account],
+        on_result: Optional[Callable[[SyncResult], None]] = None,
+        save_accounts: Optional[List[Account]] = None,
+    ) -> List[SyncResult]:
+        """
+        同步所有账号
+
+        Args:
+            accounts: 需要同步的账号
+            on_result: 每个账号完成时的回调（在工作线程之外的调用线程中执行）
+            save_accounts: 完成后需要保存的全部账号列表，同步成功的账号在一个事务中写入
+
+        Returns:
+            所有账号的同步结果，按完成顺序排列
+        """
+        collected: List[SyncResult] = []
+        for result in self.iter_sync(accounts):
+            collected.append(result)
+            if on_result is not None:
+                on_result(result)
+
+        if save_accounts is not None:
+            succeeded = {r.account_id for r in collected if r.success}
+            if succeeded:
+                storage.upsert_accounts([a for a in accounts if a.id in succeeded], save_accounts)
+        return collected
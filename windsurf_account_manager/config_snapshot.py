@@ -1,13 +1,37 @@
 from __future__ import annotations
 
+import concurrent.futures
 import json
 import os
 import shutil
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any, Tuple
 
 from .models import Account, AppSettings
+from .blob_store import BlobStore, HASH_NAME, capture_files, manifest_digests, restore_tasks
+from .backup_archive import (
+    ARCHIVE_NAME, DEFAULT_CODEC, FORMAT_ARCHIVE, FORMAT_OBJECTS, extract_tasks, read_index, write_archive
+)
+from .copy_engine import CopyEngine, CopyStats, CopyTask
+from .sqlite_capture import STRATEGY_SQLITE_BACKUP, is_sqlite_file, is_sqlite_path, restore_database
+from .auth_state import (
+    AUTH_STATE_NAME, DEFAULT_AUTH_KEY_PATTERNS, FORMAT_AUTH, apply_auth_state, capture_auth_state
+)
+from .restore_journal import RestoreJournal, StagedFiles
+
+# 快照模式：完整配置文件，或只记录登录相关的键
+SNAPSHOT_MODE_FILES = "files"
+SNAPSHOT_MODE_AUTH = "auth"
+SNAPSHOT_MODES = (SNAPSHOT_MODE_FILES, SNAPSHOT_MODE_AUTH)
+
+
+def write_metadata(path: Path, metadata: Dict[str, Any]) -> None:
+    """原子地写入快照/备份元数据"""
+    temp_path = path.with_name(path.name + ".tmp")
+    with temp_path.open("w", encoding="utf-8") as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
 
 
 class ConfigSnapshot:
@@ -21,6 +45,28 @@ class ConfigSnapshot:
         self.snapshots_dir = self.base_dir / "snapshots"
         self.snapshots_dir.mkdir(parents=True, exist_ok=True)
         
+        # 快照和自动备份共用的对象存储，相同内容只保存一份
+        self.blob_store = BlobStore(self.base_dir / "objects")
+        
+        # 快照和自动备份的存储格式，由自动备份配置设置
+        self.backup_format = FORMAT_OBJECTS
+        self.compression = DEFAULT_CODEC
+        self.compression_level: Optional[int] = None
+        # 是否用 VACUUM INTO 压缩读取的 SQLite 数据库
+        self.sqlite_compact = False
+        # 账号快照模式，按键模式下记录的键（各文件的通配符模式）
+        self.snapshot_mode = SNAPSHOT_MODE_FILES
+        self.auth_key_patterns: Dict[str, List[str]] = {
+            name: list(patterns) for name, patterns in DEFAULT_AUTH_KEY_PATTERNS.items()
+        }
+        
+        # 快照、备份和恢复共用的并行复制引擎，最近一次恢复的统计
+        self.copy_engine = CopyEngine()
+        self.last_copy_stats: Optional[CopyStats] = None
+        
+        # 恢复前只记录即将被覆盖的文件，失败时据此回滚
+        self.restore_journal = RestoreJournal(self.base_dir / "restore_journals", self.blob_store)
+        
         # 默认的Windsurf配置路径（需要根据实际情况调整）
         self.default_windsurf_paths = {
             "windows": [
@@ -114,12 +160,34 @@ class ConfigSnapshot:
         """获取默认的Windsurf配置路径"""
         return self.detect_windsurf_config_path()
     
+    def compression_pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        """压缩归档使用复制引擎的线程池"""
+        return self.copy_engine.executor
+    
+    def write_archive(self, archive_path: Path, config_path: Path, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """按当前压缩设置把配置文件写入归档，返回归档索引"""
+        return write_archive(
+            archive_path, config_path, self.config_files, metadata,
+            self.compression, self.compression_level, self.compression_pool(), self.sqlite_compact
+        )
+    
     def get_account_snapshot_dir(self, account_id: str) -> Path:
         """获取账号快照目录"""
         return self.snapshots_dir / account_id
     
-    def create_snapshot(self, account_id: str, config_path: Optional[Path] = None, snapshot_name: Optional[str] = None) -> bool:
-        """为指定账号创建配置快照"""
+    def create_snapshot(
+        self,
+        account_id: str,
+        config_path: Optional[Path] = None,
+        snapshot_name: Optional[str] = None,
+        auth_key_patterns: Optional[Dict[str, List[str]]] = None
+    ) -> bool:
+        """
+        为指定账号创建配置快照
+        
+        Args:
+            auth_key_patterns: 按键模式下该账号使用的键模式，为空时使用 self.auth_key_patterns
+        """
         try:
             # 如果没有提供配置路径，使用默认路径
             if config_path is None:
@@ -134,13 +202,7 @@ class ConfigSnapshot:
             
             snapshot_dir = self.get_account_snapshot_dir(account_id)
             snapshot_dir.mkdir(parents=True, exist_ok=True)
-            
-            # 备份配置文件
-            for config_file in self.config_files:
-                src_file = config_path / config_file
-                if src_file.exists():
-                    dst_file = snapshot_dir / config_file
-                    shutil.copy2(src_file, dst_file)
+            previous = self._read_metadata(snapshot_dir)
             
             # 创建快照元数据
             metadata = {
@@ -148,7 +210,6 @@ class ConfigSnapshot:
                 "created_at": datetime.now().isoformat(),
                 "config_path": str(config_path),
                 "os_type": self.get_os_type(),
-                "files": [f for f in self.config_files if (config_path / f).exists()],
                 "custom_path": config_path is not None
             }
             
@@ -156,9 +217,50 @@ class ConfigSnapshot:
             if snapshot_name:
                 metadata["name"] = snapshot_name
             
-            metadata_file = snapshot_dir / "metadata.json"
-            with metadata_file.open("w", encoding="utf-8") as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
+            objects: Dict[str, Dict[str, Any]] = {}
+            if self.snapshot_mode == SNAPSHOT_MODE_AUTH:
+                # 只记录登录相关的键
+                state = capture_auth_state(config_path, auth_key_patterns or self.auth_key_patterns)
+                write_metadata(snapshot_dir / AUTH_STATE_NAME, state)
+                metadata.update({
+                    "files": [name for name in state["patterns"] if (config_path / name).exists()],
+                    "format": FORMAT_AUTH,
+                    "auth_state": AUTH_STATE_NAME,
+                    "keys": len(state["item_table"]) + len(state["storage"])
+                })
+            elif self.backup_format == FORMAT_ARCHIVE:
+                # 配置文件写入压缩归档
+                index = self.write_archive(snapshot_dir / ARCHIVE_NAME, config_path, metadata)
+                metadata.update({
+                    "files": list(index["files"]),
+                    "format": FORMAT_ARCHIVE,
+                    "archive": ARCHIVE_NAME,
+                    "compression": index["codec"]
+                })
+            else:
+                # 配置文件存入对象存储，快照只保存清单；未变化的文件沿用上一次快照的对象
+                objects = capture_files(
+                    self.blob_store, config_path, self.config_files,
+                    (previous or {}).get("objects"), self.copy_engine, self.sqlite_compact
+                )
+                metadata.update({"files": list(objects), "hash": HASH_NAME, "objects": objects})
+            
+            try:
+                write_metadata(snapshot_dir / "metadata.json", metadata)
+            except Exception:
+                self.blob_store.decref(manifest_digests(objects))
+                raise
+            
+            # 释放旧快照引用的对象；旧版快照直接保存的文件和不再使用的归档、登录状态一并删除
+            if previous is not None:
+                self.blob_store.decref(manifest_digests(previous.get("objects", {})))
+                if "objects" not in previous and previous.get("format") not in (FORMAT_ARCHIVE, FORMAT_AUTH):
+                    for config_file in self.config_files:
+                        (snapshot_dir / config_file).unlink(missing_ok=True)
+            if metadata.get("format") != FORMAT_ARCHIVE:
+                (snapshot_dir / ARCHIVE_NAME).unlink(missing_ok=True)
+            if metadata.get("format") != FORMAT_AUTH:
+                (snapshot_dir / AUTH_STATE_NAME).unlink(missing_ok=True)
             
             return True
         except Exception as e:
@@ -167,45 +269,137 @@ class ConfigSnapshot:
     
     def restore_snapshot(self, account_id: str, config_path: Optional[Path] = None) -> bool:
         """恢复指定账号的配置快照"""
+        # 如果没有提供配置路径，使用默认路径
+        if config_path is None:
+            config_path = self.detect_windsurf_config_path()
+            if not config_path:
+                print("无法确定Windsurf配置路径")
+                return False
+        return self.restore_snapshot_to_paths(account_id, [config_path])
+    
+    def restore_snapshot_to_paths(self, account_id: str, config_paths: List[Path]) -> bool:
+        """把指定账号的配置快照恢复到一个或多个配置路径，所有路径的文件复制并发执行"""
         try:
-            # 如果没有提供配置路径，使用默认路径
-            if config_path is None:
-                config_path = self.detect_windsurf_config_path()
-                if not config_path:
-                    print("无法确定Windsurf配置路径")
-                    return False
-            
-            # 验证路径
-            if not config_path.exists():
-                # 如果路径不存在，尝试创建
-                config_path.mkdir(parents=True, exist_ok=True)
-            
             snapshot_dir = self.get_account_snapshot_dir(account_id)
             if not snapshot_dir.exists():
                 print(f"账号 {account_id} 的快照不存在")
                 return False
+            metadata = self.read_source_metadata(snapshot_dir)
+            if metadata is None:
+                print(f"账号 {account_id} 的快照元数据和归档索引都不存在，无法恢复")
+                return False
             
-            # 先备份当前配置
-            backup_dir = config_path.parent / f"Windsurf_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            if config_path.exists():
-                shutil.copytree(config_path, backup_dir)
-                print(f"当前配置已备份到: {backup_dir}")
-            
-            # 确保目标目录存在
-            config_path.mkdir(parents=True, exist_ok=True)
-            
-            # 恢复配置文件
-            for config_file in self.config_files:
-                src_file = snapshot_dir / config_file
-                if src_file.exists():
-                    dst_file = config_path / config_file
-                    shutil.copy2(src_file, dst_file)
-            
+            self.run_restore(snapshot_dir, metadata, config_paths, f"snapshot:{account_id}")
             return True
         except Exception as e:
             print(f"恢复快照失败: {e}")
             return False
     
+    def run_restore(
+        self,
+        source_dir: Path,
+        metadata: Dict[str, Any],
+        config_paths: List[Path],
+        source: str
+    ) -> Path:
+        """
+        把快照或备份恢复到各配置路径，所有路径的文件复制并发执行，返回恢复日志目录
+        
+        恢复前在恢复日志中记录即将被覆盖的文件；任一文件恢复失败时按日志回滚后重新抛出异常
+        """
+        relpaths, auth_patterns = self.restore_scope(source_dir, metadata)
+        journal_path = self.restore_journal.begin(
+            source, [(config_path, relpaths) for config_path in config_paths], auth_patterns, self.copy_engine
+        )
+        print(f"当前配置中将被覆盖的内容已记录到恢复日志: {journal_path}")
+        # 普通文件先写入同一目录下的暂存文件，全部成功后再逐个替换，中途失败不会留下两个账号混合的配置
+        staged = StagedFiles(journal_path.name)
+        try:
+            tasks: List[CopyTask] = []
+            for config_path in config_paths:
+                # 确保目标目录存在
+                config_path.mkdir(parents=True, exist_ok=True)
+                tasks.extend(self.restore_tasks(source_dir, metadata, config_path, staged.path_for))
+            self.last_copy_stats = self.copy_engine.run(tasks)
+        except Exception:
+            staged.discard()
+            self.restore_journal.rollback(journal_path, self.copy_engine)
+            raise
+        try:
+            self.restore_journal.commit(journal_path, staged)
+        except Exception:
+            # 已写入提交标记时继续完成替换，否则回滚
+            self.restore_journal.recover_journal(journal_path, self.copy_engine)
+            raise
+        return journal_path
+    
+    def recover_interrupted_restores(self) -> int:
+        """启动时处理上次中断的恢复：已写入提交标记的继续完成，否则回滚到恢复前的状态，返回处理的数量"""
+        try:
+            return self.restore_journal.recover(self.copy_engine)
+        except Exception as e:
+            print(f"处理中断的恢复失败: {e}")
+            return 0
+    
+    def restore_scope(
+        self, source_dir: Path, metadata: Dict[str, Any]
+    ) -> Tuple[List[str], Optional[Dict[str, List[str]]]]:
+        """
+        恢复快照或备份会写入的文件
+        
+        Returns:
+            (相对路径列表, 按键快照记录的键的模式；不是按键快照时为 None)
+        """
+        if metadata.get("format") == FORMAT_AUTH:
+            with (source_dir / metadata.get("auth_state", AUTH_STATE_NAME)).open("r", encoding="utf-8") as f:
+                patterns = json.load(f).get("patterns") or DEFAULT_AUTH_KEY_PATTERNS
+            return list(patterns), patterns
+        if metadata.get("format") == FORMAT_ARCHIVE:
+            return list(read_index(source_dir / metadata.get("archive", ARCHIVE_NAME))["files"]), None
+        if "objects" in metadata:
+            return list(metadata["objects"]), None
+        return [config_file for config_file in self.config_files if (source_dir / config_file).exists()], None
+    
+    def restore_tasks(
+        self,
+        source_dir: Path,
+        metadata: Dict[str, Any],
+        config_path: Path,
+        stage: Optional[Callable[[Path], Path]] = None
+    ) -> List[CopyTask]:
+        """
+        把快照或备份中的配置文件恢复到 config_path 的复制任务
+        
+        按元数据区分按键快照、压缩归档、对象存储清单和直接保存文件的旧版格式。
+        提供 stage 时普通文件写入暂存路径；数据库和按键恢复本身是事务性的，直接写入目标
+        """
+        if metadata.get("format") == FORMAT_AUTH:
+            state_path = source_dir / metadata.get("auth_state", AUTH_STATE_NAME)
+            
+            def apply_state() -> Tuple[int, str]:
+                with state_path.open("r", encoding="utf-8") as f:
+                    apply_auth_state(config_path, json.load(f))
+                return state_path.stat().st_size, FORMAT_AUTH
+            
+            return [apply_state]
+        if metadata.get("format") == FORMAT_ARCHIVE:
+            archive_path = source_dir / metadata.get("archive", ARCHIVE_NAME)
+            return [task for _, task in extract_tasks(archive_path, config_path, stage=stage)]
+        if "objects" in metadata:
+            return restore_tasks(self.blob_store, metadata["objects"], config_path, stage)
+        # 旧版快照直接保存了文件，数据库同样通过在线备份 API 写入
+        tasks: List[CopyTask] = []
+        for config_file in self.config_files:
+            src_file = source_dir / config_file
+            if not src_file.exists():
+                continue
+            dst_file = config_path / config_file
+            if is_sqlite_path(config_file) and is_sqlite_file(src_file):
+                tasks.append(lambda src=src_file, dst=dst_file: (restore_database(src, dst), STRATEGY_SQLITE_BACKUP))
+            else:
+                tasks.extend(self.copy_engine.copy_tasks([(src_file, dst_file if stage is None else stage(dst_file))]))
+        return tasks
+    
     def list_snapshots(self) -> List[Dict[str, Any]]:
         """列出所有快照"""
         snapshots = []
@@ -235,12 +429,48 @@ class ConfigSnapshot:
             return True
         
         try:
+            metadata = self._read_metadata(snapshot_dir) or {}
             shutil.rmtree(snapshot_dir)
+            self.blob_store.decref(manifest_digests(metadata.get("objects", {})))
             return True
         except Exception as e:
             print(f"删除快照失败: {e}")
             return False
     
+    def _read_metadata(self, snapshot_dir: Path) -> Optional[Dict[str, Any]]:
+        """读取快照元数据，不存在或损坏时返回 None"""
+        metadata_file = snapshot_dir / "metadata.json"
+        if not metadata_file.exists():
+            return None
+        try:
+            with metadata_file.open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"读取快照元数据失败: {e}")
+            return None
+    
+    def read_source_metadata(self, source_dir: Path) -> Optional[Dict[str, Any]]:
+        """
+        读取快照或备份的元数据，metadata.json 丢失或损坏时从压缩归档的索引重建
+        
+        两者都不存在时返回 None，此时无法确定要恢复的内容
+        """
+        metadata = self._read_metadata(source_dir)
+        if metadata is not None:
+            return metadata
+        archive_file = source_dir / ARCHIVE_NAME
+        if not archive_file.exists():
+            return None
+        index = read_index(archive_file)
+        metadata = dict(index["metadata"])
+        metadata.update({
+            "files": list(index["files"]),
+            "format": FORMAT_ARCHIVE,
+            "archive": ARCHIVE_NAME,
+            "compression": index["codec"]
+        })
+        return metadata
+    
     def get_snapshot(self, account_id: str) -> Optional[Dict[str, Any]]:
         """获取账号的快照信息"""
         snapshot_dir = self.get_account_snapshot_dir(account_id)
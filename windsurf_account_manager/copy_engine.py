@@ -0,0 +1,138 @@
+"""
+并行文件复制引擎
+快照、自动备份和恢复中的文件复制在线程池中并发执行（文件读写时释放 GIL），
+通过 copy_strategies 优先使用内核快速复制、否则使用大缓冲区逐块复制，
+像 copy2 一样保留元数据，汇总字节数、耗时和各复制策略的使用次数
+"""
+from __future__ import annotations
+
+import concurrent.futures
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+from .copy_strategies import fast_copy
+
+DEFAULT_BUFFER_SIZE = 4 * 1024 * 1024
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# 复制任务，返回 (复制的字节数, 使用的复制策略)
+CopyTask = Callable[[], Tuple[int, str]]
+
+
+class CopyStats:
+    """一批复制任务的统计"""
+
+    def __init__(self) -> None:
+        self.files = 0
+        self.bytes = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.min_seconds: Optional[float] = None
+        self.max_seconds = 0.0
+        self.wall_seconds = 0.0
+        self.strategies: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, size: int, elapsed: float, strategy: str) -> None:
+        """记录一个文件的复制字节数、耗时和使用的复制策略"""
+        with self._lock:
+            self.files += 1
+            self.strategies[strategy] = self.strategies.get(strategy, 0) + 1
+            self.bytes += size
+            self.total_seconds += elapsed
+            if self.min_seconds is None or elapsed < self.min_seconds:
+                self.min_seconds = elapsed
+            if elapsed > self.max_seconds:
+                self.max_seconds = elapsed
+
+    def record_error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典，便于显示或记录日志"""
+        return {
+            "files": self.files,
+            "bytes": self.bytes,
+            "errors": self.errors,
+            "wall_seconds": self.wall_seconds,
+            "avg_seconds": self.total_seconds / self.files if self.files else 0.0,
+            "min_seconds": self.min_seconds or 0.0,
+            "max_seconds": self.max_seconds,
+            "bytes_per_second": self.bytes / self.wall_seconds if self.wall_seconds else 0.0,
+            "strategies": dict(self.strategies),
+        }
+
+
+class CopyEngine:
+    """共享的复制线程池，线程池在首次使用时创建"""
+
+    def __init__(self, max_workers: Optional[int] = None, buffer_size: int = DEFAULT_BUFFER_SIZE) -> None:
+        self.max_workers = max_workers or min(8, (os.cpu_count() or 1) + 4)
+        self.buffer_size = buffer_size
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="copy"
+                )
+            return self._executor
+
+    def close(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def map(self, fn: Callable[[T], R], items: Sequence[T]) -> List[R]:
+        """并发执行 fn 并按输入顺序返回结果；等待全部完成后再抛出第一个异常"""
+        if len(items) <= 1:
+            return [fn(item) for item in items]
+        futures = [self.executor.submit(fn, item) for item in items]
+        concurrent.futures.wait(futures)
+        return [future.result() for future in futures]
+
+    def run(self, tasks: Iterable[CopyTask]) -> CopyStats:
+        """
+        并发执行复制任务并汇总统计
+
+        所有任务结束后才返回，任一任务失败时抛出第一个异常，不会留下仍在写入的任务
+        """
+        stats = CopyStats()
+
+        def timed(task: CopyTask) -> None:
+            start = time.perf_counter()
+            try:
+                size, strategy = task()
+            except BaseException:
+                stats.record_error()
+                raise
+            stats.record(size, time.perf_counter() - start, strategy)
+
+        start = time.perf_counter()
+        try:
+            self.map(timed, list(tasks))
+        finally:
+            stats.wall_seconds = time.perf_counter() - start
+        return stats
+
+    def copy_file(self, src: Path, dst: Path, allow_hardlink: bool = False) -> Tuple[int, str]:
+        """复制文件并保留元数据，返回 (字节数, 使用的复制策略)"""
+        return fast_copy(src, dst, self.buffer_size, allow_hardlink)
+
+    def copy_tasks(self, pairs: Iterable[Tuple[Path, Path]]) -> List[CopyTask]:
+        """把 (源, 目标) 列表转换为复制任务"""
+        return [lambda src=src, dst=dst: self.copy_file(src, dst) for src, dst in pairs]
+
+    def copy_files(self, pairs: Iterable[Tuple[Path, Path]]) -> CopyStats:
+        return self.run(self.copy_tasks(pairs))
@@ -0,0 +1,221 @@
+"""
+文件复制策略
+依次尝试内核提供的快速复制方式，失败时回退到下一种：
+    reflink（FICLONE，btrfs/xfs 等写时复制文件系统上为常数时间）
+    -> os.copy_file_range（内核内复制，部分文件系统可在服务端或块层完成）
+    -> os.sendfile
+    -> 用户态缓冲区复制
+另外提供可选的硬链接方式，只用于内容不再修改的备份文件；复制函数返回实际使用的策略
+"""
+from __future__ import annotations
+
+import errno
+import os
+import shutil
+import sys
+import threading
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Optional, Sequence, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，只能使用缓冲区复制
+    fcntl = None
+
+STRATEGY_HARDLINK = "hardlink"
+STRATEGY_REFLINK = "reflink"
+STRATEGY_COPY_FILE_RANGE = "copy_file_range"
+STRATEGY_SENDFILE = "sendfile"
+STRATEGY_BUFFERED = "buffered"
+
+DEFAULT_STRATEGIES: Tuple[str, ...] = (
+    STRATEGY_REFLINK, STRATEGY_COPY_FILE_RANGE, STRATEGY_SENDFILE, STRATEGY_BUFFERED
+)
+
+# linux/fs.h: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+# 单次内核复制调用的最大字节数
+KERNEL_CHUNK_SIZE = 1024 * 1024 * 1024
+
+# 这些错误表示当前文件系统或平台不支持该策略，应回退而不是报错
+_UNSUPPORTED_ERRNOS = frozenset(
+    code for code in (
+        getattr(errno, name, None)
+        for name in ("EXDEV", "EOPNOTSUPP", "ENOTSUP", "ENOTTY", "EINVAL", "ENOSYS", "EBADF", "EPERM", "EMLINK")
+    )
+    if code is not None
+)
+
+# 已确认不支持的 (策略, 源设备号, 目标设备号)，之后直接跳过，避免每个文件都重复失败的系统调用；
+# copy_file_range 等是否可用同时取决于源和目标所在的文件系统
+_unsupported: Set[Tuple[str, int, int]] = set()
+_unsupported_lock = threading.Lock()
+
+
+class _NoProgress(OSError):
+    """内核复制在文件开头就返回 0（procfs、overlay 或旧内核跨文件系统），只对当前文件回退，不记录为不支持"""
+
+    def __init__(self, strategy: str) -> None:
+        super().__init__(errno.ENOTSUP, f"{strategy} 未复制任何数据")
+
+
+def _reflink(fsrc: BinaryIO, fdst: BinaryIO, buffer_size: int) -> int:
+    if fcntl is None or not sys.platform.startswith("linux"):
+        raise OSError(errno.ENOTSUP, "reflink 不可用")
+    fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    return os.fstat(fdst.fileno()).st_size
+
+
+def _copy_file_range(fsrc: BinaryIO, fdst: BinaryIO, buffer_size: int) -> int:
+    if not hasattr(os, "copy_file_range"):
+        raise OSError(errno.ENOSYS, "copy_file_range 不可用")
+    src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+    offset = 0
+    while True:
+        copied = os.copy_file_range(src_fd, dst_fd, KERNEL_CHUNK_SIZE, offset, offset)
+        if copied == 0:
+            if offset == 0:
+                raise _NoProgress(STRATEGY_COPY_FILE_RANGE)
+            return offset
+        offset += copied
+
+
+def _sendfile(fsrc: BinaryIO, fdst: BinaryIO, buffer_size: int) -> int:
+    if not hasattr(os, "sendfile") or not sys.platform.startswith("linux"):
+        raise OSError(errno.ENOSYS, "sendfile 不可用")
+    src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+    offset = 0
+    while True:
+        sent = os.sendfile(dst_fd, src_fd, offset, KERNEL_CHUNK_SIZE)
+        if sent == 0:
+            if offset == 0:
+                raise _NoProgress(STRATEGY_SENDFILE)
+            return offset
+        offset += sent
+
+
+def _buffered(fsrc: BinaryIO, fdst: BinaryIO, buffer_size: int) -> int:
+    size = 0
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    while True:
+        n = fsrc.readinto(buffer)
+        if not n:
+            return size
+        fdst.write(view[:n])
+        size += n
+
+
+_COPIERS: Dict[str, Callable[[BinaryIO, BinaryIO, int], int]] = {
+    STRATEGY_REFLINK: _reflink,
+    STRATEGY_COPY_FILE_RANGE: _copy_file_range,
+    STRATEGY_SENDFILE: _sendfile,
+    STRATEGY_BUFFERED: _buffered,
+}
+
+
+def _is_unsupported(strategy: str, devices: Tuple[int, int]) -> bool:
+    return (strategy, *devices) in _unsupported
+
+
+def _mark_unsupported(strategy: str, devices: Tuple[int, int]) -> None:
+    with _unsupported_lock:
+        _unsupported.add((strategy, *devices))
+
+
+def copy_data(
+    fsrc: BinaryIO,
+    fdst: BinaryIO,
+    buffer_size: int,
+    strategies: Sequence[str] = DEFAULT_STRATEGIES
+) -> Tuple[int, str]:
+    """
+    在两个已打开的文件之间复制全部内容，返回 (字节数, 使用的策略)
+
+    目标文件应为空；某个策略不被支持时清空目标并尝试下一个，
+    所有策略都不被支持时抛出 OSError(ENOTSUP)。内核复制在文件开头返回 0 时同样回退，
+    与 shutil 的处理一致，空的源文件最终由缓冲区复制完成
+    """
+    devices = (os.fstat(fsrc.fileno()).st_dev, os.fstat(fdst.fileno()).st_dev)
+    for strategy in strategies:
+        if strategy == STRATEGY_BUFFERED:
+            fsrc.seek(0)
+            return _buffered(fsrc, fdst, buffer_size), strategy
+        if _is_unsupported(strategy, devices):
+            continue
+        try:
+            return _COPIERS[strategy](fsrc, fdst, buffer_size), strategy
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+            if not isinstance(e, _NoProgress):
+                _mark_unsupported(strategy, devices)
+            fdst.seek(0)
+            fdst.truncate()
+    raise OSError(errno.ENOTSUP, "没有可用的复制策略")
+
+
+def may_reflink(directory: Path) -> bool:
+    """在 directory 所在的文件系统上创建文件时是否值得尝试 reflink"""
+    if fcntl is None or not sys.platform.startswith("linux"):
+        return False
+    try:
+        device = directory.stat().st_dev
+        # reflink 只能在同一文件系统内进行
+        return not _is_unsupported(STRATEGY_REFLINK, (device, device))
+    except OSError:
+        return False
+
+
+def fast_copy(
+    src: Path,
+    dst: Path,
+    buffer_size: int = 4 * 1024 * 1024,
+    allow_hardlink: bool = False,
+    strategies: Sequence[str] = DEFAULT_STRATEGIES,
+    copy_metadata: bool = True
+) -> Tuple[int, str]:
+    """
+    复制文件，返回 (字节数, 使用的策略)
+
+    Args:
+        allow_hardlink: 优先创建硬链接；只能用于源和目标都不会再被修改的文件（如备份归档）
+        copy_metadata: 是否像 copy2 一样复制修改时间和权限
+    """
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if allow_hardlink:
+        try:
+            dst.unlink(missing_ok=True)
+            os.link(src, dst)
+            return dst.stat().st_size, STRATEGY_HARDLINK
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED_ERRNOS and not isinstance(e, PermissionError):
+                raise
+    with src.open("rb") as fsrc, dst.open("wb") as fdst:
+        size, strategy = copy_data(fsrc, fdst, buffer_size, strategies)
+    if copy_metadata:
+        shutil.copystat(src, dst)
+    return size, strategy
+
+
+def fsync_file(path: Path) -> None:
+    with path.open("rb") as f:
+        os.fsync(f.fileno())
+
+
+def fsync_dir(path: Path) -> None:
+    """把目录项的修改（新建、替换）写入磁盘；Windows 不支持打开目录，由 NTFS 日志保证"""
+    if os.name == "nt":
+        return
+    fd = os.open(str(path), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def reset_unsupported() -> None:
+    """清除已记录的不支持信息（用于测试和基准测试）"""
+    with _unsupported_lock:
+        _unsupported.clear()
@@ -0,0 +1,205 @@
+"""
+HTTP传输层模块
+为ApiClient提供按主机复用的连接池、超时、重试退避以及请求耗时统计
+"""
+from __future__ import annotations
+
+import random
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class LatencyStats:
+    """单个主机的请求耗时统计"""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_seconds = 0.0
+        self.min_seconds: Optional[float] = None
+        self.max_seconds = 0.0
+
+    def record(self, elapsed: float) -> None:
+        """记录一次请求耗时"""
+        self.count += 1
+        self.total_seconds += elapsed
+        if self.min_seconds is None or elapsed < self.min_seconds:
+            self.min_seconds = elapsed
+        if elapsed > self.max_seconds:
+            self.max_seconds = elapsed
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典，便于显示或记录日志"""
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "total_seconds": self.total_seconds,
+            "avg_seconds": self.total_seconds / self.count if self.count else 0.0,
+            "min_seconds": self.min_seconds or 0.0,
+            "max_seconds": self.max_seconds,
+        }
+
+
+class RetryPolicy:
+    """同步和异步客户端共用的重试策略：5xx和连接错误时按带全抖动的指数退避重试"""
+
+    # 需要重试的HTTP状态码
+    RETRY_STATUS_CODES = frozenset(range(500, 600))
+
+    def __init__(self, max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 8.0) -> None:
+        """
+        Args:
+            max_retries: 5xx或连接错误时的最大重试次数
+            backoff_base: 指数退避的基础等待时间（秒）
+            backoff_max: 单次退避的最长等待时间（秒）
+        """
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def should_retry(self, attempt: int, status: Optional[int] = None) -> bool:
+        """第attempt次尝试失败后是否重试；status为None表示连接错误或超时"""
+        if attempt >= self.max_retries:
+            return False
+        return status is None or status in self.RETRY_STATUS_CODES
+
+    def delay(self, attempt: int) -> float:
+        """计算第attempt次重试的等待时间"""
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+
+class HttpTransport:
+    """按主机维护 requests.Session 的共享传输对象"""
+
+    def __init__(
+        self,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 20.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        pool_maxsize: int = 32,
+    ) -> None:
+        """
+        初始化传输层
+
+        Args:
+            connect_timeout: 建立连接超时（秒）
+            read_timeout: 读取响应超时（秒）
+            max_retries: 5xx或连接错误时的最大重试次数
+            backoff_base: 指数退避的基础等待时间（秒）
+            backoff_max: 单次退避的最长等待时间（秒）
+            pool_maxsize: 每个主机连接池的最大连接数
+        """
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retry_policy = RetryPolicy(max_retries, backoff_base, backoff_max)
+        self.pool_maxsize = pool_maxsize
+
+        self._sessions: Dict[str, requests.Session] = {}
+        self._stats: Dict[str, LatencyStats] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        """requests使用的(连接, 读取)超时元组"""
+        return (self.connect_timeout, self.read_timeout)
+
+    @staticmethod
+    def _host_key(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def session_for(self, url: str) -> requests.Session:
+        """获取URL所属主机的Session，不存在时创建"""
+        host = self._host_key(url)
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=self.pool_maxsize,
+                    max_retries=0,
+                )
+                session.mount(host, adapter)
+                self._sessions[host] = session
+                self._stats[host] = LatencyStats()
+            return session
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """
+        发送请求，5xx和连接错误时按指数退避重试
+
+        最后一次尝试仍返回5xx时直接返回该响应，仍出现连接错误时抛出异常
+        """
+        session = self.session_for(url)
+        stats = self._stats[self._host_key(url)]
+        kwargs.setdefault("timeout", self.timeout)
+
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                with self._lock:
+                    stats.record(time.perf_counter() - started)
+                    stats.errors += 1
+                if not self.retry_policy.should_retry(attempt):
+                    raise
+            else:
+                with self._lock:
+                    stats.record(time.perf_counter() - started)
+                if not self.retry_policy.should_retry(attempt, response.status_code):
+                    return response
+                response.close()
+
+            with self._lock:
+                stats.retries += 1
+            time.sleep(self.retry_policy.delay(attempt))
+            attempt += 1
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        """发送POST请求"""
+        return self.request("POST", url, **kwargs)
+
+    def warmup(self, urls: Iterable[str]) -> None:
+        """
+        预先建立到各主机的连接，减少首次登录时的TCP+TLS握手耗时
+
+        预热失败不会抛出异常，真正的请求仍会按需建立连接
+        """
+        for url in urls:
+            host = self._host_key(url)
+            session = self.session_for(url)
+            try:
+                session.head(host, timeout=self.timeout, allow_redirects=False).close()
+            except requests.RequestException as e:
+                print(f"预连接 {host} 失败: {e}")
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取各主机的请求耗时统计"""
+        with self._lock:
+            return {host: stats.to_dict() for host, stats in self._stats.items()}
+
+    def reset_stats(self) -> None:
+        """清空耗时统计"""
+        with self._lock:
+            for host in self._stats:
+                self._stats[host] = LatencyStats()
+
+    def close(self) -> None:
+        """关闭所有Session及其连接池"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+from dataclasses import asdict
 from pathlib import Path
 from typing import List
 
@@ -25,7 +26,7 @@ def load_mcp_config(path: Path) -> List[McpServerConfig]:
 
 
 def save_mcp_config(path: Path, servers: List[McpServerConfig]) -> None:
-    data = [server.__dict__ for server in servers]
+    data = [asdict(server) for server in servers]
     with path.open("w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
@@ -48,6 +49,6 @@ def load_rules(path: Path) -> List[RuleConfig]:
 
 
 def save_rules(path: Path, rules: List[RuleConfig]) -> None:
-    data = [rule.__dict__ for rule in rules]
+    data = [asdict(rule) for rule in rules]
     with path.open("w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
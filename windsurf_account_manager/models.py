@@ -1,10 +1,21 @@
 from __future__ import annotations
 
+import sys
 from dataclasses import dataclass, field
 from typing import Optional, List, Dict
 
+# Python 3.10+ 使用 __slots__，实例不再携带 __dict__
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+def intern_value(value: Optional[str]) -> Optional[str]:
+    """驻留取值较少的字符串字段，相同的计划名称在所有账号间共享同一个对象"""
+    if value is None or type(value) is not str:
+        return value
+    return sys.intern(value)
+
+
+@dataclass(**_SLOTS)
 class Account:
     id: str
     email: str
@@ -21,8 +32,12 @@ class Account:
     has_snapshot: bool = False
     snapshot_created_at: Optional[str] = None
 
+    def __post_init__(self) -> None:
+        self.plan_name = intern_value(self.plan_name)
+        self.plan_tier = intern_value(self.plan_tier)
 
-@dataclass
+
+@dataclass(**_SLOTS)
 class McpServerConfig:
     id: str
     name: str
@@ -32,7 +47,7 @@ class McpServerConfig:
     enabled: bool = True
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class RuleConfig:
     id: str
     prompt: str
@@ -0,0 +1,518 @@
+"""
+从项目自带的 .proto 文件生成 Python 消息类
+自行解析 proto3 语法，不依赖 protoc；生成的类使用 __slots__，字段表按字段号预先建好
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import importlib.util
+import keyword
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import ModuleType
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .storage import BASE_DIR, DATA_DIR
+
+GENERATOR_VERSION = "1"
+
+PROTO_DIR = BASE_DIR / "windsurf-grpc-master" / "proto"
+CACHE_DIR = DATA_DIR / "proto_cache"
+
+SCALAR_TYPES = {
+    "double", "float", "int32", "int64", "uint32", "uint64", "sint32", "sint64",
+    "fixed32", "fixed64", "sfixed32", "sfixed64", "bool", "string", "bytes",
+}
+
+# 仓库中只用到了这两个官方类型，直接内置其定义
+WELL_KNOWN_PROTOS = {
+    "google/protobuf/timestamp.proto": (
+        'syntax = "proto3"; package google.protobuf;'
+        " message Timestamp { int64 seconds = 1; int32 nanos = 2; }"
+    ),
+    "google/protobuf/duration.proto": (
+        'syntax = "proto3"; package google.protobuf;'
+        " message Duration { int64 seconds = 1; int32 nanos = 2; }"
+    ),
+}
+
+# 与 Message 基类方法重名的字段需要改名
+_RESERVED_ATTRS = {"decode", "encode", "to_dict"}
+
+
+class ProtoSyntaxError(ValueError):
+    """proto 文件语法错误"""
+
+
+@dataclass
+class FieldDef:
+    name: str
+    number: int
+    type_name: str
+    label: str = ""  # "" / "repeated" / "optional"
+    map_key: Optional[str] = None
+    oneof: Optional[str] = None
+
+
+@dataclass
+class MessageDef:
+    full_name: str
+    fields: List[FieldDef] = field(default_factory=list)
+
+
+@dataclass
+class EnumDef:
+    full_name: str
+    values: List[Tuple[str, int]] = field(default_factory=list)
+
+
+@dataclass
+class ProtoFile:
+    path: str
+    package: str = ""
+    digest: str = ""
+    imports: List[str] = field(default_factory=list)
+    messages: List[MessageDef] = field(default_factory=list)
+    enums: List[EnumDef] = field(default_factory=list)
+
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<ws>\s+)
+    | (?P<comment>//[^\n]*|/\*.*?\*/)
+    | (?P<str>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+    | (?P<num>-?(?:0[xX][0-9a-fA-F]+|\d+(?:\.\d*)?(?:[eE][+-]?\d+)?))
+    | (?P<ident>\.?[A-Za-z_][\w.]*)
+    | (?P<sym>[{}\[\]()<>=;,:-])
+    """,
+    re.S | re.X,
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """切分 proto 源码，丢弃空白和注释"""
+    tokens: List[str] = []
+    pos = 0
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if not match:
+            line = text.count("\n", 0, pos) + 1
+            raise ProtoSyntaxError(f"第{line}行无法识别的字符: {text[pos]!r}")
+        pos = match.end()
+        if match.lastgroup not in ("ws", "comment"):
+            tokens.append(match.group())
+    return tokens
+
+
+class _Parser:
+    """递归下降解析器，只保留生成代码需要的信息"""
+
+    def __init__(self, text: str, path: str) -> None:
+        self.tokens = tokenize(text)
+        self.pos = 0
+        self.file = ProtoFile(path=path)
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _next(self) -> str:
+        token = self._peek()
+        if token is None:
+            raise ProtoSyntaxError(f"{self.file.path}: 文件意外结束")
+        self.pos += 1
+        return token
+
+    def _expect(self, expected: str) -> None:
+        token = self._next()
+        if token != expected:
+            raise ProtoSyntaxError(f"{self.file.path}: 期望 {expected!r}，实际为 {token!r}")
+
+    def _int(self, token: str) -> int:
+        try:
+            return int(token, 0)
+        except ValueError:
+            raise ProtoSyntaxError(f"{self.file.path}: 期望数字，实际为 {token!r}") from None
+
+    def _skip_statement(self) -> None:
+        """跳过到语句结尾的分号，允许中间出现 {...} 形式的选项值"""
+        depth = 0
+        while True:
+            token = self._next()
+            if token == "{":
+                depth += 1
+            elif token == "}":
+                depth -= 1
+            elif token == ";" and depth == 0:
+                return
+
+    def _skip_block(self) -> None:
+        """跳过 name {...} 形式的整个块（service/extend）"""
+        while self._next() != "{":
+            pass
+        depth = 1
+        while depth:
+            token = self._next()
+            if token == "{":
+                depth += 1
+            elif token == "}":
+                depth -= 1
+
+    def _skip_field_options(self) -> None:
+        if self._peek() != "[":
+            return
+        depth = 0
+        while True:
+            token = self._next()
+            if token == "[":
+                depth += 1
+            elif token == "]":
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def parse(self) -> ProtoFile:
+        while self._peek() is not None:
+            token = self._next()
+            if token == "package":
+                self.file.package = self._next()
+                self._expect(";")
+            elif token == "import":
+                path = self._next()
+                if path in ("public", "weak"):
+                    path = self._next()
+                self.file.imports.append(path[1:-1])
+                self._expect(";")
+            elif token in ("syntax", "option", "edition"):
+                self._skip_statement()
+            elif token == "message":
+                self._parse_message(self.file.package)
+            elif token == "enum":
+                self._parse_enum(self.file.package)
+            elif token in ("service", "extend"):
+                self._skip_block()
+            elif token != ";":
+                raise ProtoSyntaxError(f"{self.file.path}: 无法识别的顶层语句 {token!r}")
+        return self.file
+
+    def _qualify(self, scope: str, name: str) -> str:
+        return f"{scope}.{name}" if scope else name
+
+    def _parse_message(self, scope: str) -> None:
+        message = MessageDef(self._qualify(scope, self._next()))
+        self.file.messages.append(message)
+        self._expect("{")
+        self._parse_message_body(message, oneof=None)
+
+    def _parse_message_body(self, message: MessageDef, oneof: Optional[str]) -> None:
+        while True:
+            token = self._next()
+            if token == "}":
+                return
+            if token == ";":
+                continue
+            if token == "message":
+                self._parse_message(message.full_name)
+            elif token == "enum":
+                self._parse_enum(message.full_name)
+            elif token == "oneof":
+                name = self._next()
+                self._expect("{")
+                self._parse_message_body(message, oneof=name)
+            elif token in ("option", "reserved", "extensions"):
+                self._skip_statement()
+            elif token == "extend":
+                self._skip_block()
+            elif token == "map":
+                self._expect("<")
+                key_type = self._next()
+                self._expect(",")
+                value_type = self._next()
+                self._expect(">")
+                message.fields.append(self._parse_field_tail(value_type, "", oneof, map_key=key_type))
+            elif token == "group":
+                raise ProtoSyntaxError(f"{self.file.path}: 不支持 group 字段")
+            elif token in ("repeated", "optional", "required"):
+                label = "" if token == "required" else token
+                message.fields.append(self._parse_field_tail(self._next(), label, oneof))
+            else:
+                message.fields.append(self._parse_field_tail(token, "", oneof))
+
+    def _parse_field_tail(self, type_name: str, label: str, oneof: Optional[str],
+                          map_key: Optional[str] = None) -> FieldDef:
+        name = self._next()
+        self._expect("=")
+        number = self._int(self._next())
+        self._skip_field_options()
+        self._expect(";")
+        return FieldDef(name, number, type_name, label, map_key, oneof)
+
+    def _parse_enum(self, scope: str) -> None:
+        enum = EnumDef(self._qualify(scope, self._next()))
+        self.file.enums.append(enum)
+        self._expect("{")
+        while True:
+            token = self._next()
+            if token == "}":
+                return
+            if token == ";":
+                continue
+            if token in ("option", "reserved"):
+                self._skip_statement()
+                continue
+            self._expect("=")
+            value = self._next()
+            if value == "-":
+                value = "-" + self._next()
+            enum.values.append((token, self._int(value)))
+            self._skip_field_options()
+            self._expect(";")
+
+
+def parse_proto(text: str, path: str = "<string>") -> ProtoFile:
+    """解析单个 proto 源码"""
+    proto = _Parser(text, path).parse()
+    proto.digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return proto
+
+
+_IMPORT_RE = re.compile(r"""^\s*import\s+(?:public\s+|weak\s+)?["']([^"']+)["']\s*;""", re.M)
+_COMMENT_RE = re.compile(r"//[^\n]*|/\*.*?\*/", re.S)
+
+
+def read_proto_sources(paths: Iterable[Union[str, Path]],
+                       include_dir: Optional[Path] = None) -> Dict[str, str]:
+    """
+    读取给定的 proto 文件及其递归 import 的文件，返回 {import 名: 源码}
+    只扫描 import 语句而不解析，用于在解析前计算缓存键
+    """
+    paths = [Path(p) for p in paths]
+    if include_dir is None:
+        include_dir = paths[0].parent if paths else PROTO_DIR
+
+    def import_name(path: Path) -> str:
+        # 与 import 语句中的写法保持一致，避免同一文件被加载两次
+        try:
+            return path.resolve().relative_to(include_dir.resolve()).as_posix()
+        except ValueError:
+            return str(path)
+
+    sources: Dict[str, str] = {}
+    pending = [import_name(p) for p in paths]
+    while pending:
+        name = pending.pop()
+        if name in sources:
+            continue
+        if name in WELL_KNOWN_PROTOS:
+            text = WELL_KNOWN_PROTOS[name]
+        else:
+            path = Path(name)
+            if not path.is_absolute() and not path.exists():
+                path = include_dir / name
+            text = path.read_text(encoding="utf-8")
+        sources[name] = text
+        pending.extend(_IMPORT_RE.findall(_COMMENT_RE.sub("", text)))
+    return sources
+
+
+def load_proto_files(paths: Iterable[Union[str, Path]],
+                     include_dir: Optional[Path] = None) -> List[ProtoFile]:
+    """解析给定的 proto 文件并递归加载其 import 的文件"""
+    sources = read_proto_sources(paths, include_dir)
+    return [parse_proto(sources[name], name) for name in sorted(sources)]
+
+
+def _resolve(type_name: str, scope: str, known: Dict[str, str]) -> str:
+    """按 protobuf 的作用域规则解析类型名，返回完整名称"""
+    if type_name.startswith("."):
+        if type_name[1:] in known:
+            return type_name[1:]
+        raise ProtoSyntaxError(f"未定义的类型: {type_name}")
+    parts = scope.split(".") if scope else []
+    while True:
+        candidate = ".".join(parts + [type_name])
+        if candidate in known:
+            return candidate
+        if not parts:
+            raise ProtoSyntaxError(f"未定义的类型: {type_name}（作用域 {scope}）")
+        parts.pop()
+
+
+def _python_names(full_names: Sequence[str], packages: Dict[str, str]) -> Dict[str, str]:
+    """为每个类型分配 Python 类名，不同包中的同名类型加包名前缀"""
+    local: Dict[str, str] = {}
+    for full_name in full_names:
+        package = packages[full_name]
+        relative = full_name[len(package) + 1:] if package else full_name
+        local[full_name] = relative.replace(".", "_")
+
+    counts: Dict[str, int] = {}
+    for name in local.values():
+        counts[name] = counts.get(name, 0) + 1
+
+    result: Dict[str, str] = {}
+    for full_name, name in local.items():
+        if counts[name] > 1:
+            prefix = packages[full_name].split(".")[-1]
+            name = f"{prefix}_{name}"
+        result[full_name] = name
+    return result
+
+
+def _attr_name(name: str) -> str:
+    if keyword.iskeyword(name) or name in _RESERVED_ATTRS:
+        return name + "_"
+    return name
+
+
+def generate_source(files: Sequence[ProtoFile]) -> str:
+    """根据解析结果生成 Python 模块源码"""
+    messages: Dict[str, MessageDef] = {}
+    enums: Dict[str, EnumDef] = {}
+    packages: Dict[str, str] = {}
+    for proto in files:
+        for message in proto.messages:
+            messages[message.full_name] = message
+            packages[message.full_name] = proto.package
+        for enum in proto.enums:
+            enums[enum.full_name] = enum
+            packages[enum.full_name] = proto.package
+
+    known = {name: "message" for name in messages}
+    known.update({name: "enum" for name in enums})
+    class_names = _python_names(list(known), packages)
+
+    lines = [
+        "# 由 proto_codegen 自动生成，请勿手动修改",
+        f"# generator version: {GENERATOR_VERSION}",
+        "from windsurf_account_manager.proto_runtime import Message, finalize",
+        "",
+    ]
+
+    for full_name in sorted(enums):
+        enum = enums[full_name]
+        lines += ["", f"class {class_names[full_name]}:", f'    """enum {full_name}"""', "    __slots__ = ()"]
+        for value_name, number in enum.values:
+            lines.append(f"    {_attr_name(value_name)} = {number}")
+        lines.append("")
+
+    def field_kind(type_name: str, scope: str) -> Tuple[str, Optional[str]]:
+        if type_name in SCALAR_TYPES:
+            return type_name, None
+        resolved = _resolve(type_name, scope, known)
+        if known[resolved] == "enum":
+            return "enum", None
+        return "message", class_names[resolved]
+
+    tables: List[str] = []
+    for full_name in sorted(messages):
+        message = messages[full_name]
+        cls = class_names[full_name]
+        attrs = tuple(_attr_name(f.name) for f in message.fields)
+        lines += [
+            "",
+            f"class {cls}(Message):",
+            f'    """message {full_name}"""',
+            f"    __slots__ = {attrs!r}",
+            f"    _FULL_NAME = {full_name!r}",
+            "",
+        ]
+
+        entries = []
+        for f in sorted(message.fields, key=lambda x: x.number):
+            kind, sub = field_kind(f.type_name, full_name)
+            label = f.label
+            if f.oneof and not label:
+                # oneof 成员需要区分"未设置"和默认值
+                label = "optional"
+            if f.map_key is not None:
+                entries.append(f"    ({f.number}, {_attr_name(f.name)!r}, 'map', '', "
+                               f"({f.map_key!r}, {kind!r}, {sub or 'None'})),")
+            else:
+                entries.append(f"    ({f.number}, {_attr_name(f.name)!r}, {kind!r}, {label!r}, {sub or 'None'}),")
+        tables.append(f"finalize({cls}, (")
+        tables += entries
+        tables.append("))")
+
+    lines += ["", "# 字段分派表，所有类定义完成后再安装以支持相互引用"]
+    lines += tables
+    lines += ["", "", "MESSAGES = {"]
+    lines += [f"    {name!r}: {class_names[name]}," for name in sorted(messages)]
+    lines += ["}", "", "ENUMS = {"]
+    lines += [f"    {name!r}: {class_names[name]}," for name in sorted(enums)]
+    lines += ["}", ""]
+    return "\n".join(lines)
+
+
+def _source_hash(sources: Dict[str, str]) -> str:
+    """按源码计算缓存键，与解析后 ProtoFile.digest 的算法一致"""
+    digest = hashlib.sha256(GENERATOR_VERSION.encode())
+    for name in sorted(sources):
+        digest.update(name.encode())
+        digest.update(hashlib.sha256(sources[name].encode("utf-8")).hexdigest().encode())
+    return digest.hexdigest()[:16]
+
+
+def load_proto_module(paths: Iterable[Union[str, Path]],
+                      cache_dir: Optional[Path] = None,
+                      include_dir: Optional[Path] = None) -> ModuleType:
+    """
+    生成并导入消息模块
+    生成结果按源文件哈希缓存到磁盘，proto 未变化时直接导入缓存模块，只有缓存不存在时才解析
+    """
+    paths = [Path(p) for p in paths]
+    cache_dir = cache_dir or CACHE_DIR
+    sources = read_proto_sources(paths, include_dir)
+    source_hash = _source_hash(sources)
+    module_name = f"_wsam_proto_{source_hash}"
+
+    cached = sys.modules.get(module_name)
+    if cached is not None:
+        return cached
+
+    module_path = cache_dir / f"{module_name}.py"
+    if not module_path.exists():
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = module_path.with_suffix(".tmp")
+        files = [parse_proto(sources[name], name) for name in sorted(sources)]
+        temp_path.write_text(generate_source(files), encoding="utf-8")
+        temp_path.replace(module_path)
+
+    spec = importlib.util.spec_from_file_location(module_name, module_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except Exception:
+        sys.modules.pop(module_name, None)
+        raise
+    return module
+
+
+def load_bundled_messages(cache_dir: Optional[Path] = None) -> ModuleType:
+    """加载项目自带的 seat_management / user_analytics 等 proto 定义"""
+    paths = sorted(PROTO_DIR.glob("*.proto"))
+    return load_proto_module(paths, cache_dir=cache_dir, include_dir=PROTO_DIR)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="从 .proto 文件生成 Python 消息类")
+    parser.add_argument("protos", nargs="*", type=Path, help="proto 文件，默认为项目自带的全部文件")
+    parser.add_argument("-o", "--output", type=Path, help="输出文件，默认打印到标准输出")
+    args = parser.parse_args(argv)
+
+    paths = args.protos or sorted(PROTO_DIR.glob("*.proto"))
+    include_dir = paths[0].parent if args.protos else PROTO_DIR
+    source = generate_source(load_proto_files(paths, include_dir))
+    if args.output:
+        args.output.write_text(source, encoding="utf-8")
+        print(f"已生成: {args.output}")
+    else:
+        sys.stdout.write(source)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+"""
+生成的protobuf消息类的运行时支持
+proto_codegen 生成的模块只包含 __slots__ 类定义和字段表，编解码逻辑都在这里
+"""
+from __future__ import annotations
+
+import struct
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import protobuf_wire as pw
+
+# 各标量类型的解码函数，按线类型分组
+_VARINT_DECODERS: Dict[str, Callable[[int], Any]] = {
+    "int32": pw.to_int32,
+    "int64": pw.to_int64,
+    "uint32": lambda v: v & 0xFFFFFFFF,
+    "uint64": lambda v: v,
+    "sint32": pw.zigzag_decode,
+    "sint64": pw.zigzag_decode,
+    "bool": bool,
+    "enum": pw.to_int32,
+}
+_FIXED32_DECODERS: Dict[str, Callable[[int], Any]] = {
+    "fixed32": lambda v: v,
+    "sfixed32": pw.to_int32,
+    "float": pw.decode_float,
+}
+_FIXED64_DECODERS: Dict[str, Callable[[int], Any]] = {
+    "fixed64": lambda v: v,
+    "sfixed64": pw.to_int64,
+    "double": pw.decode_double,
+}
+_LEN_DECODERS: Dict[str, Callable[[memoryview], Any]] = {
+    "string": pw.decode_string,
+    "bytes": bytes,
+}
+
+_SCALAR_DEFAULTS: Dict[str, Any] = {
+    "string": "",
+    "bytes": b"",
+    "bool": False,
+    "float": 0.0,
+    "double": 0.0,
+}
+
+
+def _wire_type_of(kind: str) -> int:
+    if kind in _VARINT_DECODERS:
+        return pw.WIRE_VARINT
+    if kind in _FIXED32_DECODERS:
+        return pw.WIRE_FIXED32
+    if kind in _FIXED64_DECODERS:
+        return pw.WIRE_FIXED64
+    return pw.WIRE_LEN
+
+
+def _scalar_decoder(kind: str) -> Callable[[Any], Any]:
+    for table in (_VARINT_DECODERS, _FIXED32_DECODERS, _FIXED64_DECODERS, _LEN_DECODERS):
+        if kind in table:
+            return table[kind]
+    raise ValueError(f"未知的字段类型: {kind}")
+
+
+def _encode_scalar(kind: str, value: Any) -> bytes:
+    """编码标量值本身（不含标签）"""
+    if kind in ("sint32", "sint64"):
+        return pw.encode_varint(pw.zigzag_encode(value))
+    if kind == "bool":
+        return b"\x01" if value else b"\x00"
+    if kind in _VARINT_DECODERS:
+        return pw.encode_varint(value)
+    if kind == "float":
+        return struct.pack("<f", value)
+    if kind == "double":
+        return struct.pack("<d", value)
+    if kind in _FIXED32_DECODERS:
+        return struct.pack("<I", value & 0xFFFFFFFF)
+    if kind in _FIXED64_DECODERS:
+        return struct.pack("<Q", value & ((1 << 64) - 1))
+    data = value.encode("utf-8") if kind == "string" else bytes(value)
+    return pw.encode_varint(len(data)) + data
+
+
+class FieldSpec:
+    """预先编译好的字段描述，供解码时按字段号直接分派"""
+
+    __slots__ = (
+        "number", "name", "kind", "label", "wire_type", "decoder",
+        "message_cls", "map_key", "map_value", "tag",
+    )
+
+    def __init__(self, number: int, name: str, kind: str, label: str, sub: Any) -> None:
+        self.number = number
+        self.name = name
+        self.kind = kind
+        self.label = label
+        self.message_cls: Optional[type] = None
+        self.map_key: Optional[Tuple[str, Callable[[Any], Any]]] = None
+        self.map_value: Optional[Tuple[str, Any]] = None
+
+        if kind == "message":
+            self.message_cls = sub
+            self.decoder = sub.decode
+        elif kind == "map":
+            key_kind, value_kind, value_cls = sub
+            self.map_key = (key_kind, _scalar_decoder(key_kind))
+            self.map_value = (value_kind, value_cls if value_kind == "message" else _scalar_decoder(value_kind))
+            self.decoder = None
+        else:
+            self.decoder = _scalar_decoder(kind)
+
+        self.wire_type = pw.WIRE_LEN if kind in ("message", "map") else _wire_type_of(kind)
+        self.tag = pw.encode_tag(number, self.wire_type)
+
+    @property
+    def repeated(self) -> bool:
+        return self.label == "repeated"
+
+    def default(self) -> Any:
+        """字段默认值；repeated/map每次返回新的容器"""
+        if self.kind == "map":
+            return {}
+        if self.label == "repeated":
+            return []
+        if self.label == "optional" or self.kind == "message":
+            return None
+        return _SCALAR_DEFAULTS.get(self.kind, 0)
+
+
+class Message:
+    """所有生成消息类的基类"""
+
+    __slots__ = ()
+
+    _FULL_NAME = ""
+    _SPECS: Tuple[FieldSpec, ...] = ()
+    _BY_NUMBER: Dict[int, FieldSpec] = {}
+
+    def __init__(self, **kwargs: Any) -> None:
+        for spec in self._SPECS:
+            name = spec.name
+            if name in kwargs:
+                setattr(self, name, kwargs.pop(name))
+            else:
+                setattr(self, name, spec.default())
+        if kwargs:
+            raise TypeError(f"{type(self).__name__} 没有字段: {', '.join(kwargs)}")
+
+    @classmethod
+    def decode(cls, data: pw.Buffer) -> "Message":
+        """从线格式数据解码消息，未知字段直接跳过"""
+        msg = cls.__new__(cls)
+        for spec in cls._SPECS:
+            setattr(msg, spec.name, spec.default())
+
+        by_number = cls._BY_NUMBER
+        for number, wire_type, value in pw.iter_fields(data):
+            spec = by_number.get(number)
+            if spec is None:
+                continue
+            if spec.kind == "map":
+                key, item = _decode_map_entry(spec, value)
+                getattr(msg, spec.name)[key] = item
+            elif spec.label == "repeated":
+                target: List[Any] = getattr(msg, spec.name)
+                if wire_type == pw.WIRE_LEN and spec.wire_type != pw.WIRE_LEN:
+                    target.extend(spec.decoder(v) for v in _decode_packed(spec.wire_type, value))
+                else:
+                    target.append(spec.decoder(value))
+            elif wire_type == spec.wire_type:
+                setattr(msg, spec.name, spec.decoder(value))
+        return msg
+
+    def encode(self) -> bytes:
+        """编码为线格式，proto3默认值不输出"""
+        out = bytearray()
+        for spec in self._SPECS:
+            value = getattr(self, spec.name)
+            if spec.kind == "map":
+                for key, item in value.items():
+                    entry = _encode_map_entry(spec, key, item)
+                    out += spec.tag + pw.encode_varint(len(entry)) + entry
+            elif spec.label == "repeated":
+                if not value:
+                    continue
+                if spec.wire_type != pw.WIRE_LEN:
+                    payload = b"".join(_encode_scalar(spec.kind, v) for v in value)
+                    out += pw.encode_tag(spec.number, pw.WIRE_LEN) + pw.encode_varint(len(payload)) + payload
+                else:
+                    for item in value:
+                        out += spec.tag + _encode_value(spec.kind, item)
+            elif value is None:
+                continue
+            elif spec.label != "optional" and spec.kind != "message" and not value:
+                continue
+            else:
+                out += spec.tag + _encode_value(spec.kind, value)
+        return bytes(out)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典，嵌套消息递归转换，默认值省略"""
+        result: Dict[str, Any] = {}
+        for spec in self._SPECS:
+            value = getattr(self, spec.name)
+            if value is None or (spec.label != "optional" and not value and spec.kind != "message"):
+                continue
+            if spec.kind == "message":
+                value = [v.to_dict() for v in value] if spec.label == "repeated" else value.to_dict()
+            elif spec.kind == "map" and spec.map_value and spec.map_value[0] == "message":
+                value = {k: v.to_dict() for k, v in value.items()}
+            result[spec.name] = value
+        return result
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, s.name) == getattr(other, s.name) for s in self._SPECS)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+def _encode_value(kind: str, value: Any) -> bytes:
+    if kind == "message":
+        data = value.encode()
+        return pw.encode_varint(len(data)) + data
+    return _encode_scalar(kind, value)
+
+
+def _decode_packed(wire_type: int, value: memoryview) -> List[int]:
+    if wire_type == pw.WIRE_VARINT:
+        return pw.decode_packed_varints(value)
+    if wire_type == pw.WIRE_FIXED32:
+        return pw.decode_packed_fixed32(value)
+    return pw.decode_packed_fixed64(value)
+
+
+def _decode_map_entry(spec: FieldSpec, data: memoryview) -> Tuple[Any, Any]:
+    assert spec.map_key is not None and spec.map_value is not None
+    key_kind, key_decoder = spec.map_key
+    value_kind, value_decoder = spec.map_value
+    key = _SCALAR_DEFAULTS.get(key_kind, 0)
+    item: Any = None if value_kind == "message" else _SCALAR_DEFAULTS.get(value_kind, 0)
+    for number, _wire_type, value in pw.iter_fields(data):
+        if number == 1:
+            key = key_decoder(value)
+        elif number == 2:
+            item = value_decoder.decode(value) if value_kind == "message" else value_decoder(value)
+    return key, item
+
+
+def _encode_map_entry(spec: FieldSpec, key: Any, item: Any) -> bytes:
+    assert spec.map_key is not None and spec.map_value is not None
+    key_kind = spec.map_key[0]
+    value_kind = spec.map_value[0]
+    return (
+        pw.encode_tag(1, _wire_type_of(key_kind)) + _encode_scalar(key_kind, key)
+        + pw.encode_tag(2, pw.WIRE_LEN if value_kind == "message" else _wire_type_of(value_kind))
+        + _encode_value(value_kind, item)
+    )
+
+
+def finalize(cls: type, fields: Tuple[Tuple[int, str, str, str, Any], ...]) -> None:
+    """为生成的消息类安装字段表，在所有类定义完成后调用"""
+    specs = tuple(FieldSpec(*field) for field in fields)
+    cls._SPECS = specs
+    cls._BY_NUMBER = {spec.number: spec for spec in specs}
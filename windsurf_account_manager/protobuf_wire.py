@@ -0,0 +1,557 @@
+"""
+Protobuf 线格式编解码模块
+纯Python实现，用于以 application/proto 调用 Connect 接口，无需 protoc 或 protobuf 库。
+消息字段定义参考 windsurf-grpc-master/proto 下的 seat_management_pb.proto 和 codeium_common_pb.proto
+"""
+from __future__ import annotations
+
+import struct
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+# 线类型
+WIRE_VARINT = 0
+WIRE_FIXED64 = 1
+WIRE_LEN = 2
+WIRE_START_GROUP = 3
+WIRE_END_GROUP = 4
+WIRE_FIXED32 = 5
+
+_MASK_64 = (1 << 64) - 1
+
+_FIXED32 = struct.Struct("<I")
+_FIXED64 = struct.Struct("<Q")
+_FLOAT = struct.Struct("<f")
+_DOUBLE = struct.Struct("<d")
+
+
+class DecodeError(ValueError):
+    """Protobuf 数据格式错误"""
+
+
+# ---------------------------------------------------------------------------
+# 基础编码
+# ---------------------------------------------------------------------------
+
+def encode_varint(value: int) -> bytes:
+    """编码varint，负数按64位补码处理（与int32/int64一致）"""
+    value &= _MASK_64
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def zigzag_encode(value: int) -> int:
+    """sint32/sint64 的zigzag编码"""
+    return (value << 1) ^ (value >> 63) if value < 0 else value << 1
+
+
+def zigzag_decode(value: int) -> int:
+    """sint32/sint64 的zigzag解码"""
+    return (value >> 1) ^ -(value & 1)
+
+
+def encode_tag(field_number: int, wire_type: int) -> bytes:
+    """编码字段标签"""
+    return encode_varint((field_number << 3) | wire_type)
+
+
+def encode_varint_field(field_number: int, value: int) -> bytes:
+    """编码 int32/int64/uint32/uint64/enum 字段，默认值0不输出"""
+    if not value:
+        return b""
+    return encode_tag(field_number, WIRE_VARINT) + encode_varint(value)
+
+
+def encode_sint_field(field_number: int, value: int) -> bytes:
+    """编码 sint32/sint64 字段"""
+    if not value:
+        return b""
+    return encode_tag(field_number, WIRE_VARINT) + encode_varint(zigzag_encode(value))
+
+
+def encode_bool_field(field_number: int, value: bool) -> bytes:
+    """编码 bool 字段，False不输出"""
+    if not value:
+        return b""
+    return encode_tag(field_number, WIRE_VARINT) + b"\x01"
+
+
+def encode_bytes_field(field_number: int, value: bytes) -> bytes:
+    """编码 bytes 或嵌套消息字段"""
+    if not value:
+        return b""
+    return encode_tag(field_number, WIRE_LEN) + encode_varint(len(value)) + value
+
+
+def encode_string_field(field_number: int, value: Optional[str]) -> bytes:
+    """编码 string 字段，空字符串不输出"""
+    if not value:
+        return b""
+    return encode_bytes_field(field_number, value.encode("utf-8"))
+
+
+def encode_fixed32_field(field_number: int, value: int) -> bytes:
+    """编码 fixed32/sfixed32 字段"""
+    if not value:
+        return b""
+    return encode_tag(field_number, WIRE_FIXED32) + _FIXED32.pack(value & 0xFFFFFFFF)
+
+
+def encode_fixed64_field(field_number: int, value: int) -> bytes:
+    """编码 fixed64/sfixed64 字段"""
+    if not value:
+        return b""
+    return encode_tag(field_number, WIRE_FIXED64) + _FIXED64.pack(value & _MASK_64)
+
+
+def encode_float_field(field_number: int, value: float) -> bytes:
+    """编码 float 字段"""
+    if not value:
+        return b""
+    return encode_tag(field_number, WIRE_FIXED32) + _FLOAT.pack(value)
+
+
+def encode_double_field(field_number: int, value: float) -> bytes:
+    """编码 double 字段"""
+    if not value:
+        return b""
+    return encode_tag(field_number, WIRE_FIXED64) + _DOUBLE.pack(value)
+
+
+def encode_packed_varints(field_number: int, values: List[int]) -> bytes:
+    """编码 packed repeated 的varint字段"""
+    if not values:
+        return b""
+    payload = b"".join(encode_varint(v) for v in values)
+    return encode_bytes_field(field_number, payload)
+
+
+def encode_packed_fixed32(field_number: int, values: List[int]) -> bytes:
+    """编码 packed repeated 的fixed32字段"""
+    if not values:
+        return b""
+    payload = struct.pack(f"<{len(values)}I", *(v & 0xFFFFFFFF for v in values))
+    return encode_bytes_field(field_number, payload)
+
+
+def encode_packed_fixed64(field_number: int, values: List[int]) -> bytes:
+    """编码 packed repeated 的fixed64字段"""
+    if not values:
+        return b""
+    payload = struct.pack(f"<{len(values)}Q", *(v & _MASK_64 for v in values))
+    return encode_bytes_field(field_number, payload)
+
+
+# ---------------------------------------------------------------------------
+# 基础解码（基于memoryview，长度分隔字段返回切片视图而不复制）
+# ---------------------------------------------------------------------------
+
+def decode_varint(buf: memoryview, pos: int) -> Tuple[int, int]:
+    """从pos处解码varint，返回(值, 新位置)"""
+    result = 0
+    shift = 0
+    end = len(buf)
+    while True:
+        if pos >= end:
+            raise DecodeError("varint 数据被截断")
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result & _MASK_64, pos
+        shift += 7
+        if shift >= 70:
+            raise DecodeError("varint 过长")
+
+
+def to_int64(value: int) -> int:
+    """将varint解码结果转换为有符号64位整数"""
+    return value - (1 << 64) if value & (1 << 63) else value
+
+
+def to_int32(value: int) -> int:
+    """将varint解码结果转换为有符号32位整数"""
+    value &= 0xFFFFFFFF
+    return value - (1 << 32) if value & (1 << 31) else value
+
+
+def skip_field(buf: memoryview, pos: int, wire_type: int) -> int:
+    """跳过一个字段的值，返回下一个字段的位置"""
+    if wire_type == WIRE_VARINT:
+        _, pos = decode_varint(buf, pos)
+    elif wire_type == WIRE_FIXED64:
+        pos += 8
+    elif wire_type == WIRE_LEN:
+        length, pos = decode_varint(buf, pos)
+        pos += length
+    elif wire_type == WIRE_FIXED32:
+        pos += 4
+    else:
+        raise DecodeError(f"不支持的线类型: {wire_type}")
+    if pos > len(buf):
+        raise DecodeError("字段数据被截断")
+    return pos
+
+
+def iter_fields(data: Buffer) -> Iterator[Tuple[int, int, Union[int, memoryview]]]:
+    """
+    逐个遍历消息中的字段
+
+    Yields:
+        (字段号, 线类型, 值)。varint/fixed字段的值为无符号整数，
+        长度分隔字段的值为原缓冲区的memoryview切片
+    """
+    buf = data if isinstance(data, memoryview) else memoryview(data)
+    pos = 0
+    end = len(buf)
+    while pos < end:
+        key, pos = decode_varint(buf, pos)
+        field_number = key >> 3
+        wire_type = key & 0x07
+        if field_number == 0:
+            raise DecodeError("无效的字段号 0")
+        if wire_type == WIRE_VARINT:
+            value, pos = decode_varint(buf, pos)
+            yield field_number, wire_type, value
+        elif wire_type == WIRE_LEN:
+            length, pos = decode_varint(buf, pos)
+            if pos + length > end:
+                raise DecodeError("长度分隔字段被截断")
+            yield field_number, wire_type, buf[pos:pos + length]
+            pos += length
+        elif wire_type == WIRE_FIXED32:
+            if pos + 4 > end:
+                raise DecodeError("fixed32 字段被截断")
+            yield field_number, wire_type, _FIXED32.unpack_from(buf, pos)[0]
+            pos += 4
+        elif wire_type == WIRE_FIXED64:
+            if pos + 8 > end:
+                raise DecodeError("fixed64 字段被截断")
+            yield field_number, wire_type, _FIXED64.unpack_from(buf, pos)[0]
+            pos += 8
+        else:
+            raise DecodeError(f"不支持的线类型: {wire_type}")
+
+
+def decode_packed_varints(buf: memoryview) -> List[int]:
+    """解码 packed repeated 的varint字段"""
+    values = []
+    pos = 0
+    end = len(buf)
+    while pos < end:
+        value, pos = decode_varint(buf, pos)
+        values.append(value)
+    return values
+
+
+def decode_packed_fixed32(buf: memoryview) -> List[int]:
+    """解码 packed repeated 的fixed32字段"""
+    if len(buf) % 4:
+        raise DecodeError("packed fixed32 长度错误")
+    return list(struct.unpack_from(f"<{len(buf) // 4}I", buf))
+
+
+def decode_packed_fixed64(buf: memoryview) -> List[int]:
+    """解码 packed repeated 的fixed64字段"""
+    if len(buf) % 8:
+        raise DecodeError("packed fixed64 长度错误")
+    return list(struct.unpack_from(f"<{len(buf) // 8}Q", buf))
+
+
+def decode_string(buf: memoryview) -> str:
+    """解码 string 字段"""
+    return str(buf, "utf-8")
+
+
+def decode_float(value: int) -> float:
+    """将fixed32位模式转换为float"""
+    return _FLOAT.unpack(_FIXED32.pack(value))[0]
+
+
+def decode_double(value: int) -> float:
+    """将fixed64位模式转换为double"""
+    return _DOUBLE.unpack(_FIXED64.pack(value))[0]
+
+
+def decode_timestamp(buf: memoryview) -> Optional[str]:
+    """解码 google.protobuf.Timestamp，返回ISO格式的UTC时间字符串"""
+    seconds = 0
+    nanos = 0
+    for field_number, wire_type, value in iter_fields(buf):
+        if field_number == 1 and wire_type == WIRE_VARINT:
+            seconds = to_int64(value)
+        elif field_number == 2 and wire_type == WIRE_VARINT:
+            nanos = to_int32(value)
+    try:
+        moment = datetime.fromtimestamp(seconds + nanos / 1e9, tz=timezone.utc)
+    except (OverflowError, OSError, ValueError):
+        return None
+    return moment.isoformat()
+
+
+# ---------------------------------------------------------------------------
+# SeatManagementService 消息
+# ---------------------------------------------------------------------------
+
+def encode_get_one_time_auth_token_request(firebase_id_token: str) -> bytes:
+    """编码 GetOneTimeAuthTokenRequest"""
+    return encode_string_field(1, firebase_id_token)
+
+
+def decode_get_one_time_auth_token_response(data: Buffer) -> Dict[str, Any]:
+    """解码 GetOneTimeAuthTokenResponse"""
+    result: Dict[str, Any] = {}
+    for field_number, wire_type, value in iter_fields(data):
+        if field_number == 1 and wire_type == WIRE_LEN:
+            result["auth_token"] = decode_string(value)
+    return result
+
+
+def encode_get_current_user_request(
+    auth_token: str,
+    generate_profile_picture_url: bool = True,
+    create_if_not_exist: bool = True,
+    include_subscription: bool = True,
+    sso_token: str = "",
+    saml_provider_id: str = "",
+) -> bytes:
+    """编码 GetCurrentUserRequest"""
+    return b"".join((
+        encode_string_field(1, auth_token),
+        encode_bool_field(2, generate_profile_picture_url),
+        encode_bool_field(3, create_if_not_exist),
+        encode_bool_field(4, include_subscription),
+        encode_string_field(5, sso_token),
+        encode_string_field(6, saml_provider_id),
+    ))
+
+
+# ---------------------------------------------------------------------------
+# 惰性消息视图
+# ---------------------------------------------------------------------------
+
+_NO_DEFAULT = object()
+
+
+def index_fields(data: Buffer) -> Dict[int, List[Tuple[int, int, int]]]:
+    """
+    一次遍历记录所有字段的位置，不创建切片也不解码
+
+    Returns:
+        字段号 -> [(线类型, 起始偏移, 结束偏移或整数值), ...]
+    """
+    buf = data if isinstance(data, memoryview) else memoryview(data)
+    index: Dict[int, List[Tuple[int, int, int]]] = {}
+    pos = 0
+    end = len(buf)
+    while pos < end:
+        key, pos = decode_varint(buf, pos)
+        field_number = key >> 3
+        wire_type = key & 0x07
+        if field_number == 0:
+            raise DecodeError("无效的字段号 0")
+        if wire_type == WIRE_VARINT:
+            value, pos = decode_varint(buf, pos)
+            entry = (wire_type, pos, value)
+        elif wire_type == WIRE_LEN:
+            length, pos = decode_varint(buf, pos)
+            if pos + length > end:
+                raise DecodeError("长度分隔字段被截断")
+            entry = (wire_type, pos, pos + length)
+            pos += length
+        else:
+            start = pos
+            pos = skip_field(buf, pos, wire_type)
+            value = (_FIXED32 if wire_type == WIRE_FIXED32 else _FIXED64).unpack_from(buf, start)[0]
+            entry = (wire_type, start, value)
+        entries = index.get(field_number)
+        if entries is None:
+            index[field_number] = [entry]
+        else:
+            entries.append(entry)
+    return index
+
+
+class LazyMessage(Mapping):
+    """
+    按需解码的只读消息视图
+
+    构造时只记录字段偏移，访问某个字段时才解码并缓存结果，
+    未访问的子消息（例如团队信息、权限列表）始终不会被解析。
+    schema 为 字段名 -> (字段号, 线类型, 解码函数, 是否repeated, 默认值)。
+    """
+
+    __slots__ = ("_buf", "_index", "_schema", "_cache")
+
+    def __init__(self, data: Buffer, schema: Dict[str, Tuple[int, int, Any, bool, Any]]) -> None:
+        self._buf = data if isinstance(data, memoryview) else memoryview(data)
+        self._index = index_fields(self._buf)
+        self._schema = schema
+        self._cache: Dict[str, Any] = {}
+
+    def _entries(self, name: str) -> List[Tuple[int, int, int]]:
+        number, wire_type = self._schema[name][:2]
+        return [e for e in self._index.get(number, ()) if e[0] == wire_type]
+
+    def __getitem__(self, name: str) -> Any:
+        cache = self._cache
+        if name in cache:
+            return cache[name]
+        if name not in self._schema:
+            raise KeyError(name)
+        _number, wire_type, decoder, repeated, default = self._schema[name]
+        entries = self._entries(name)
+        if not entries:
+            if default is _NO_DEFAULT:
+                raise KeyError(name)
+            value = default
+        elif wire_type == WIRE_LEN:
+            buf = self._buf
+            if repeated:
+                value = [decoder(buf[start:stop]) for _wt, start, stop in entries]
+            else:
+                _wt, start, stop = entries[-1]
+                value = decoder(buf[start:stop])
+        elif repeated:
+            value = [decoder(e[2]) for e in entries]
+        else:
+            value = decoder(entries[-1][2])
+        cache[name] = value
+        return value
+
+    def __contains__(self, name: object) -> bool:
+        if name not in self._schema:
+            return False
+        return self._schema[name][4] is not _NO_DEFAULT or bool(self._entries(name))
+
+    def __iter__(self) -> Iterator[str]:
+        return (name for name in self._schema if name in self)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"LazyMessage({sorted(self)!r})"
+
+
+def materialize(value: Any) -> Any:
+    """将惰性视图递归转换为普通字典"""
+    if isinstance(value, LazyMessage):
+        return {name: materialize(item) for name, item in value.items()}
+    if isinstance(value, list):
+        return [materialize(item) for item in value]
+    return value
+
+
+def _field(number: int, wire_type: int, decoder: Any, repeated: bool = False,
+           default: Any = _NO_DEFAULT) -> Tuple[int, int, Any, bool, Any]:
+    return (number, wire_type, decoder, repeated, default)
+
+
+def _bool(value: int) -> bool:
+    return bool(value)
+
+
+# seat_management_pb.User 中账号管理需要的字段
+# proto3 不输出默认值，额度字段缺失即为0
+USER_FIELDS = {
+    "api_key": _field(1, WIRE_LEN, decode_string),
+    "name": _field(2, WIRE_LEN, decode_string),
+    "email": _field(3, WIRE_LEN, decode_string),
+    "id": _field(6, WIRE_LEN, decode_string),
+    "team_id": _field(7, WIRE_LEN, decode_string),
+    "pro": _field(13, WIRE_VARINT, _bool),
+    "used_trial": _field(25, WIRE_VARINT, _bool),
+    "windsurf_pro_trial_end_time": _field(27, WIRE_LEN, decode_timestamp),
+    "used_prompt_credits": _field(28, WIRE_VARINT, to_int64, default=0),
+    "used_flow_credits": _field(29, WIRE_VARINT, to_int64, default=0),
+}
+
+# codeium_common_pb.PlanInfo 中的计划名称和额度字段
+PLAN_INFO_FIELDS = {
+    "teams_tier": _field(1, WIRE_VARINT, to_int32),
+    "plan_name": _field(2, WIRE_LEN, decode_string),
+    "monthly_prompt_credits": _field(12, WIRE_VARINT, to_int32),
+    "monthly_flow_credits": _field(13, WIRE_VARINT, to_int32),
+    "is_enterprise": _field(16, WIRE_VARINT, _bool),
+    "is_teams": _field(17, WIRE_VARINT, _bool),
+}
+
+# codeium_common_pb.PlanStatus，额度字段缺失即为0
+PLAN_STATUS_FIELDS = {
+    "plan_info": _field(1, WIRE_LEN, lambda v: LazyMessage(v, PLAN_INFO_FIELDS)),
+    "plan_start": _field(2, WIRE_LEN, decode_timestamp),
+    "plan_end": _field(3, WIRE_LEN, decode_timestamp),
+    "available_flex_credits": _field(4, WIRE_VARINT, to_int32, default=0),
+    "used_flow_credits": _field(5, WIRE_VARINT, to_int32, default=0),
+    "used_prompt_credits": _field(6, WIRE_VARINT, to_int32, default=0),
+    "used_flex_credits": _field(7, WIRE_VARINT, to_int32, default=0),
+    "available_prompt_credits": _field(8, WIRE_VARINT, to_int32, default=0),
+    "available_flow_credits": _field(9, WIRE_VARINT, to_int32, default=0),
+}
+
+# seat_management_pb.GetCurrentUserResponse，团队、订阅、权限等字段不在表中，直接跳过
+GET_CURRENT_USER_RESPONSE_FIELDS = {
+    "user": _field(1, WIRE_LEN, lambda v: LazyMessage(v, USER_FIELDS)),
+    "roles": _field(2, WIRE_LEN, decode_string, repeated=True),
+    "plan_info": _field(6, WIRE_LEN, lambda v: LazyMessage(v, PLAN_INFO_FIELDS)),
+}
+
+
+def view_get_current_user_response(data: Buffer) -> LazyMessage:
+    """
+    惰性解码 GetCurrentUserResponse
+
+    返回与JSON接口结构相同的只读映射（user / plan_info / roles），
+    只有被访问到的子消息才会解码
+    """
+    return LazyMessage(data, GET_CURRENT_USER_RESPONSE_FIELDS)
+
+
+def decode_user(data: Buffer) -> Dict[str, Any]:
+    """解码 seat_management_pb.User 中账号管理需要的字段"""
+    return materialize(LazyMessage(data, USER_FIELDS))
+
+
+def decode_plan_info(data: Buffer) -> Dict[str, Any]:
+    """解码 codeium_common_pb.PlanInfo 中的计划名称和额度字段"""
+    return materialize(LazyMessage(data, PLAN_INFO_FIELDS))
+
+
+def decode_plan_status(data: Buffer) -> Dict[str, Any]:
+    """解码 codeium_common_pb.PlanStatus"""
+    return materialize(LazyMessage(data, PLAN_STATUS_FIELDS))
+
+
+def encode_get_plan_status_request(auth_token: str) -> bytes:
+    """编码 GetPlanStatusRequest"""
+    return encode_string_field(1, auth_token)
+
+
+def decode_get_plan_status_response(data: Buffer) -> Dict[str, Any]:
+    """
+    解码 GetPlanStatusResponse
+
+    返回与JSON接口相同结构的字典 {"plan_status": {...}}，响应中没有计划状态时返回空字典
+    """
+    result: Dict[str, Any] = {}
+    for field_number, wire_type, value in iter_fields(data):
+        if field_number == 1 and wire_type == WIRE_LEN:
+            result["plan_status"] = decode_plan_status(value)
+    return result
+
+
+def decode_get_current_user_response(data: Buffer) -> Dict[str, Any]:
+    """
+    完整解码 GetCurrentUserResponse 为普通字典
+
+    返回与JSON接口相同结构的字典（user / plan_info / roles），其余字段按长度前缀跳过
+    """
+    return materialize(view_get_current_user_response(data))
@@ -0,0 +1,285 @@
+"""
+恢复日志
+恢复快照或备份前只记录即将被覆盖的文件（存入共享的对象存储，未变化的文件直接引用上一份日志的对象），
+以及恢复前不存在、恢复后需要删除的文件；按键恢复时只记录当前的登录状态。
+恢复失败时按日志回滚，成功后保留最近若干份日志供手动撤销，多余的自动清理。
+
+普通文件先写入目标旁边的暂存文件（同一文件系统），全部写完并 fsync 后在日志中写入提交标记，
+再逐个 os.replace 到目标并 fsync 所在目录。程序在恢复过程中退出时，下次启动按日志处理：
+已写入提交标记的继续完成替换，否则删除暂存文件并回滚
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import uuid4
+
+from .auth_state import apply_auth_state, capture_auth_state
+from .blob_store import BlobStore, capture_files, manifest_digests, restore_tasks
+from .copy_engine import CopyEngine, CopyTask
+from .copy_strategies import fsync_dir, fsync_file
+from .sqlite_capture import is_sqlite_path, remove_with_sidecars
+
+JOURNAL_NAME = "journal.json"
+
+# 日志状态：已记录但恢复尚未完成、已写入提交标记正在替换文件、恢复成功、已回滚
+STATE_PREPARED = "prepared"
+STATE_COMMITTING = "committing"
+STATE_COMMITTED = "committed"
+STATE_ROLLED_BACK = "rolled_back"
+
+DEFAULT_MAX_JOURNALS = 10
+
+STAGED_SUFFIX = ".restore"
+
+
+def _write_journal(path: Path, journal: Dict[str, Any]) -> None:
+    temp_path = path.with_name(path.name + ".tmp")
+    with temp_path.open("w", encoding="utf-8") as f:
+        json.dump(journal, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    temp_path.replace(path)
+    fsync_dir(path.parent)
+
+
+def staged_path(dst: Path, txid: str) -> Path:
+    """目标文件的暂存路径，与目标在同一目录，保证 os.replace 是原子的"""
+    return dst.with_name(f".{dst.name}.{txid}{STAGED_SUFFIX}")
+
+
+def replace_staged(pairs: Iterable[Tuple[str, str]]) -> int:
+    """把暂存文件逐个替换到目标路径并 fsync 所在目录，已经替换过的跳过，返回替换的数量"""
+    replaced = 0
+    directories = set()
+    for dst, staged in pairs:
+        if not os.path.exists(staged):
+            continue
+        os.replace(staged, dst)
+        directories.add(Path(dst).parent)
+        replaced += 1
+    for directory in directories:
+        fsync_dir(directory)
+    return replaced
+
+
+class StagedFiles:
+    """一次恢复中写入的暂存文件，可在复制线程池中并发登记"""
+
+    def __init__(self, txid: str) -> None:
+        self.txid = txid
+        self.pairs: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def path_for(self, dst: Path) -> Path:
+        """登记目标文件，返回实际写入的暂存路径"""
+        staged = staged_path(dst, self.txid)
+        with self._lock:
+            self.pairs[str(dst)] = str(staged)
+        return staged
+
+    def sync(self) -> None:
+        """提交前把所有暂存文件写入磁盘"""
+        for staged in self.pairs.values():
+            fsync_file(Path(staged))
+
+    def discard(self) -> None:
+        for staged in self.pairs.values():
+            Path(staged).unlink(missing_ok=True)
+
+
+class RestoreJournal:
+    """恢复日志管理类"""
+
+    def __init__(self, root: Path, blob_store: BlobStore, max_journals: int = DEFAULT_MAX_JOURNALS) -> None:
+        """
+        Args:
+            root: 日志目录，每次恢复一个子目录
+            blob_store: 保存被覆盖文件的对象存储
+            max_journals: 保留的已完成日志数量
+        """
+        self.root = root
+        self.blob_store = blob_store
+        self.max_journals = max_journals
+
+    def begin(
+        self,
+        source: str,
+        targets: List[Tuple[Path, List[str]]],
+        auth_patterns: Optional[Dict[str, List[str]]] = None,
+        engine: Optional[CopyEngine] = None
+    ) -> Path:
+        """
+        在恢复前记录各配置路径中即将被覆盖的文件，返回日志目录
+
+        Args:
+            source: 恢复来源的描述（快照或备份）
+            targets: [(配置路径, 即将写入的相对路径)]
+            auth_patterns: 按键恢复时记录的键的模式，此时只记录登录状态
+        """
+        previous = self._latest_manifests()
+        records = []
+        try:
+            for config_path, relpaths in targets:
+                record: Dict[str, Any] = {"config_path": str(config_path)}
+                if auth_patterns is not None:
+                    record["auth_state"] = capture_auth_state(config_path, auth_patterns)
+                else:
+                    manifest = capture_files(
+                        self.blob_store, config_path, relpaths, previous.get(str(config_path)), engine
+                    )
+                    record["objects"] = manifest
+                    record["absent"] = [relpath for relpath in relpaths if relpath not in manifest]
+                records.append(record)
+        except Exception:
+            for record in records:
+                self.blob_store.decref(manifest_digests(record.get("objects", {})))
+            raise
+
+        journal_path = self.root / f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{uuid4().hex[:8]}"
+        journal_path.mkdir(parents=True)
+        _write_journal(journal_path / JOURNAL_NAME, {
+            "source": source,
+            "created_at": datetime.now().isoformat(),
+            "state": STATE_PREPARED,
+            "targets": records,
+        })
+        return journal_path
+
+    def commit(self, journal_path: Path, staged: Optional[StagedFiles] = None) -> None:
+        """
+        提交恢复：暂存文件 fsync 后写入提交标记，替换到目标路径，再标记恢复成功，并按保留数量清理旧日志
+        """
+        if staged is not None and staged.pairs:
+            staged.sync()
+            journal = self.read(journal_path)
+            if journal is None:
+                raise ValueError(f"恢复日志不存在或已损坏: {journal_path}")
+            journal["state"] = STATE_COMMITTING
+            journal["staged"] = sorted(staged.pairs.items())
+            _write_journal(journal_path / JOURNAL_NAME, journal)
+            replace_staged(journal["staged"])
+        self._set_state(journal_path, STATE_COMMITTED)
+        self.prune()
+
+    def recover(self, engine: Optional[CopyEngine] = None) -> int:
+        """处理所有未完成的恢复（程序在恢复过程中退出），返回处理的数量，之后按保留数量清理旧日志"""
+        recovered = 0
+        for journal in self.list_journals():
+            if journal.get("state") in (STATE_PREPARED, STATE_COMMITTING):
+                self.recover_journal(self.root / journal["journal_name"], engine)
+                recovered += 1
+        if recovered:
+            self.prune()
+        return recovered
+
+    def recover_journal(self, journal_path: Path, engine: Optional[CopyEngine] = None) -> None:
+        """
+        处理一次未完成的恢复：已写入提交标记时暂存文件都已写入磁盘，继续完成替换；
+        否则删除暂存文件，并把可能已经写入的数据库和登录状态回滚到恢复前
+        """
+        journal = self.read(journal_path)
+        if journal is None:
+            return
+        if journal.get("state") == STATE_COMMITTING:
+            replace_staged(journal["staged"])
+            self._set_state(journal_path, STATE_COMMITTED)
+            print(f"已完成中断的恢复: {journal_path.name}")
+        elif journal.get("state") == STATE_PREPARED:
+            for record in journal["targets"]:
+                config_path = Path(record["config_path"])
+                for relpath in list(record.get("objects", {})) + record.get("absent", []):
+                    staged_path(config_path / relpath, journal_path.name).unlink(missing_ok=True)
+            self.rollback(journal_path, engine)
+
+    def rollback(self, journal_path: Path, engine: Optional[CopyEngine] = None) -> None:
+        """按日志把配置路径还原到恢复前的状态，并按保留数量清理旧日志"""
+        journal = self.read(journal_path)
+        if journal is None:
+            raise ValueError(f"恢复日志不存在或已损坏: {journal_path}")
+        tasks: List[CopyTask] = []
+        for record in journal["targets"]:
+            config_path = Path(record["config_path"])
+            if "auth_state" in record:
+                tasks.append(lambda config_path=config_path, state=record["auth_state"]: (
+                    sum(apply_auth_state(config_path, state).values()), "auth"
+                ))
+                continue
+            tasks.extend(restore_tasks(self.blob_store, record["objects"], config_path))
+            for relpath in record["absent"]:
+                # 恢复前不存在的文件
+                if is_sqlite_path(relpath):
+                    remove_with_sidecars(config_path / relpath)
+                else:
+                    (config_path / relpath).unlink(missing_ok=True)
+        if engine is not None:
+            engine.run(tasks)
+        else:
+            for task in tasks:
+                task()
+        self._set_state(journal_path, STATE_ROLLED_BACK)
+        print(f"已按恢复日志回滚: {journal_path.name}")
+        self.prune()
+
+    def read(self, journal_path: Path) -> Optional[Dict[str, Any]]:
+        """读取日志，不存在或损坏时返回 None"""
+        try:
+            with (journal_path / JOURNAL_NAME).open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def list_journals(self) -> List[Dict[str, Any]]:
+        """列出所有日志（新的在前），每项包含 journal_name"""
+        journals = []
+        if not self.root.exists():
+            return journals
+        for journal_path in sorted(self.root.iterdir(), reverse=True):
+            journal = self.read(journal_path) if journal_path.is_dir() else None
+            if journal is not None:
+                journal["journal_name"] = journal_path.name
+                journals.append(journal)
+        return journals
+
+    def prune(self) -> None:
+        """只保留最近 max_journals 份已完成的日志，未完成的日志不清理"""
+        finished = [
+            journal for journal in self.list_journals()
+            if journal.get("state") in (STATE_COMMITTED, STATE_ROLLED_BACK)
+        ]
+        with self.blob_store.batch():
+            for journal in finished[max(0, self.max_journals):]:
+                try:
+                    self._remove(self.root / journal["journal_name"], journal)
+                except Exception as e:
+                    print(f"清理恢复日志失败: {e}")
+
+    def _remove(self, journal_path: Path, journal: Dict[str, Any]) -> None:
+        shutil.rmtree(journal_path)
+        for record in journal["targets"]:
+            self.blob_store.decref(manifest_digests(record.get("objects", {})))
+
+    def _set_state(self, journal_path: Path, state: str) -> None:
+        journal = self.read(journal_path)
+        if journal is None:
+            return
+        journal["state"] = state
+        _write_journal(journal_path / JOURNAL_NAME, journal)
+
+    def _latest_manifests(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        各配置路径最近一份日志的清单，用于增量记录
+
+        已回滚的日志同样作为基准：回滚后配置路径中的文件正是该日志记录的内容
+        """
+        manifests: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for journal in self.list_journals():
+            for record in journal["targets"]:
+                if "objects" in record:
+                    manifests.setdefault(record["config_path"], record["objects"])
+        return manifests
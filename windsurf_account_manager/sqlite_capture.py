@@ -0,0 +1,171 @@
+"""
+SQLite 数据库的一致性读取和恢复
+state.vscdb 是 Windsurf 运行时持续写入的 SQLite 数据库（通常为 WAL 模式），直接复制文件可能得到
+写到一半的页面，也会丢失仍在 -wal 中的修改。这里通过 sqlite3 的在线备份 API 读取：
+按页分批复制，每批之间让出时间，不会长时间阻塞正在写入的 Windsurf；
+可选 VACUUM INTO 压缩模式；恢复时同样通过备份 API 写入目标数据库
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, List, Optional
+
+SQLITE_SUFFIXES = (".vscdb",)
+SQLITE_HEADER = b"SQLite format 3\x00"
+
+# 每批复制的页数和批次之间的停顿
+PAGES_PER_STEP = 256
+STEP_PAUSE_SECONDS = 0.001
+# 数据库在分批复制过程中被反复修改时，备份会从头开始；超过次数后改为一次性复制
+MAX_RESTARTS = 3
+BUSY_TIMEOUT_SECONDS = 30.0
+
+STRATEGY_SQLITE_BACKUP = "sqlite_backup"
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def is_sqlite_path(relpath: str) -> bool:
+    """按文件名判断是否为需要通过 SQLite 读取的数据库"""
+    return relpath.endswith(SQLITE_SUFFIXES)
+
+
+def is_sqlite_file(path: Path) -> bool:
+    """检查文件头，非 SQLite 文件按普通文件处理"""
+    try:
+        with path.open("rb") as f:
+            return f.read(len(SQLITE_HEADER)) == SQLITE_HEADER
+    except OSError:
+        return False
+
+
+def source_key(path: Path) -> List[Optional[int]]:
+    """
+    数据库及其 -wal 文件的大小和修改时间，用于增量备份判断是否变化；
+    WAL 模式下修改先写入 -wal，主文件的修改时间不变
+    """
+    st = path.stat()
+    try:
+        wal = Path(str(path) + "-wal").stat()
+        return [st.st_size, st.st_mtime_ns, wal.st_size, wal.st_mtime_ns]
+    except FileNotFoundError:
+        return [st.st_size, st.st_mtime_ns, None, None]
+
+
+def _connect_readonly(path: Path, immutable: bool = False) -> sqlite3.Connection:
+    uri = path.resolve().as_uri() + ("?mode=ro&immutable=1" if immutable else "?mode=ro")
+    return sqlite3.connect(uri, uri=True, timeout=BUSY_TIMEOUT_SECONDS)
+
+
+def _stepped_backup(source: sqlite3.Connection, target: sqlite3.Connection, pages: int, pause: float) -> None:
+    """分批复制页面；备份因源数据库被修改而反复重启时，改为一次性复制"""
+    state = {"done": -1, "restarts": 0}
+
+    def progress(status: int, remaining: int, total: int) -> None:
+        done = total - remaining
+        if done < state["done"]:
+            state["restarts"] += 1
+            if state["restarts"] > MAX_RESTARTS:
+                raise _TooManyRestarts()
+        state["done"] = done
+        if pause:
+            time.sleep(pause)
+
+    try:
+        source.backup(target, pages=pages, progress=progress)
+    except _TooManyRestarts:
+        source.backup(target, pages=-1)
+
+
+def capture_database(
+    src: Path,
+    dst: Path,
+    compact: bool = False,
+    pages: int = PAGES_PER_STEP,
+    pause: float = STEP_PAUSE_SECONDS
+) -> int:
+    """
+    把数据库一致地复制到 dst（dst 不应存在），返回 dst 的字节数
+
+    Args:
+        compact: 使用 VACUUM INTO 写出压缩后的副本，去掉空闲页，体积更小但需要一次完整的读事务
+    """
+    source = _connect_readonly(src)
+    try:
+        if compact:
+            source.execute("VACUUM INTO ?", (str(dst),))
+        else:
+            target = sqlite3.connect(str(dst))
+            try:
+                _stepped_backup(source, target, pages, pause)
+                # 副本使用回滚日志模式，保存为单个自包含的文件
+                target.execute("PRAGMA journal_mode=DELETE")
+            finally:
+                target.close()
+    finally:
+        source.close()
+    return dst.stat().st_size
+
+
+def restore_database(
+    src: Path,
+    dst: Path,
+    pages: int = PAGES_PER_STEP,
+    pause: float = STEP_PAUSE_SECONDS
+) -> int:
+    """
+    通过备份 API 把 src 的内容写入 dst 数据库，返回 src 的字节数
+
+    目标数据库处于 WAL 模式或正被其他进程打开时，写入经过 SQLite 的锁和日志，不会产生损坏的文件
+    """
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if dst.exists() and not is_sqlite_file(dst):
+        # 目标已损坏或不是数据库，无法作为备份目标打开
+        remove_with_sidecars(dst)
+    source = _connect_readonly(src, immutable=True)
+    try:
+        target = sqlite3.connect(str(dst), timeout=BUSY_TIMEOUT_SECONDS)
+        try:
+            source.backup(target, pages=pages, progress=_pause_progress(pause))
+        finally:
+            target.close()
+    finally:
+        source.close()
+    return src.stat().st_size
+
+
+def _pause_progress(pause: float) -> Any:
+    def progress(status: int, remaining: int, total: int) -> None:
+        if pause:
+            time.sleep(pause)
+    return progress
+
+
+def capture_to_temp(src: Path, temp_path: Path, compact: bool = False) -> bool:
+    """
+    src 是 SQLite 数据库时一致地复制到 temp_path 并返回 True；
+    不是数据库或无法读取时清理临时文件并返回 False，由调用方按普通文件复制
+    """
+    if not is_sqlite_file(src):
+        return False
+    try:
+        capture_database(src, temp_path, compact)
+        return True
+    except sqlite3.Error as e:
+        print(f"通过 SQLite 读取 {src.name} 失败，改为直接复制: {e}")
+        remove_with_sidecars(temp_path)
+        return False
+
+
+def remove_with_sidecars(path: Path) -> None:
+    """删除数据库文件及其 -journal/-wal/-shm 文件"""
+    for suffix in ("", "-journal", "-wal", "-shm"):
+        try:
+            os.remove(str(path) + suffix)
+        except FileNotFoundError:
+            pass
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 import json
-from dataclasses import asdict
+import os
+import threading
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional
 
 from .models import Account
+from .account_store import AccountStore
+from .account_repository import AccountRepository
+from . import account_io, accounts_cache
 
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -13,13 +17,59 @@ DATA_DIR = BASE_DIR / "data"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 ACCOUNTS_PATH = DATA_DIR / "accounts.json"
+ACCOUNTS_DB_PATH = DATA_DIR / "accounts.db"
+
+# 账号存储后端：默认 sqlite，设置 WINDSURF_ACCOUNT_BACKEND=json 可继续使用 accounts.json
+BACKEND = os.environ.get("WINDSURF_ACCOUNT_BACKEND", "sqlite").lower()
+
+_store: Optional[AccountStore] = None
+_store_lock = threading.Lock()
+
+
+def open_account_store(db_path: Optional[Path] = None, json_path: Optional[Path] = None) -> AccountStore:
+    """打开 SQLite 账号存储，首次打开时自动从 accounts.json 迁移"""
+    db_path = db_path or ACCOUNTS_DB_PATH
+    json_path = json_path or ACCOUNTS_PATH
+    store = AccountStore(db_path)
+    if store.get_meta("migrated_from") is None and json_path.exists():
+        if store.count():
+            # 数据库已有账号（未经迁移创建，或在记录迁移来源之前迁移过），不再解析 accounts.json
+            store.migrate_from([], str(json_path))
+        elif store.migrate_from(_load_accounts_json(json_path, use_cache=False), str(json_path)):
+            print(f"已将 {json_path.name} 中的账号迁移到 {db_path.name}")
+    return store
+
+
+def get_account_store() -> AccountStore:
+    """获取全局账号存储"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = open_account_store()
+        return _store
+
+
+def _use_sqlite() -> bool:
+    return BACKEND != "json"
 
 
 def load_accounts() -> List[Account]:
-    if not ACCOUNTS_PATH.exists():
+    if _use_sqlite():
+        return get_account_store().load_all()
+    return _load_accounts_json(ACCOUNTS_PATH)
+
+
+def _load_accounts_json(path: Path, use_cache: bool = True) -> List[Account]:
+    if not path.exists():
         return []
-    with ACCOUNTS_PATH.open("r", encoding="utf-8") as f:
-        raw = json.load(f)
+    if use_cache:
+        # 二进制缓存与 accounts.json 一致时跳过 JSON 解析（只有 json 后端会走到这里）
+        return accounts_cache.load_accounts_cached(path, _parse_accounts_json)[0]
+    return _parse_accounts_json(path.read_bytes())
+
+
+def _parse_accounts_json(data: bytes) -> List[Account]:
+    raw = json.loads(data)
     accounts: List[Account] = []
     for item in raw:
         if not isinstance(item, dict):
@@ -49,11 +99,39 @@ def load_accounts() -> List[Account]:
 
 
 def save_accounts(accounts: List[Account]) -> None:
+    """保存完整账号列表；sqlite 后端只写入有变化的行"""
+    if _use_sqlite():
+        get_account_store().replace_all(accounts)
+        return
     data = [_account_to_dict(a) for a in accounts]
     with ACCOUNTS_PATH.open("w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
 
+def upsert_accounts(changed: Iterable[Account], accounts: List[Account]) -> None:
+    """
+    保存有变化的账号
+    sqlite 后端只写入 changed 中的行；json 后端仍需整体重写 accounts
+    """
+    if _use_sqlite():
+        get_account_store().upsert_many(changed)
+    else:
+        save_accounts(accounts)
+
+
+def save_account(account: Account, accounts: List[Account]) -> None:
+    """保存单个账号（如修改备注、登录结果）"""
+    upsert_accounts([account], accounts)
+
+
+def delete_accounts(account_ids: Iterable[str], accounts: List[Account]) -> None:
+    """删除账号，accounts 为删除后剩余的账号列表"""
+    if _use_sqlite():
+        get_account_store().delete(account_ids)
+    else:
+        save_accounts(accounts)
+
+
 def _account_to_dict(account: Account) -> Dict[str, Any]:
     """将Account对象转换为字典"""
     return {
@@ -74,27 +152,11 @@ def _account_to_dict(account: Account) -> Dict[str, Any]:
     }
 
 
-def import_from_windsurf_json(path: Path, existing: List[Account]) -> List[Account]:
-    if not path.exists():
-        return existing
-    with path.open("r", encoding="utf-8") as f:
-        raw = json.load(f)
-    by_email = {a.email: a for a in existing}
-    from uuid import uuid4
-    if isinstance(raw, list):
-        for item in raw:
-            if not isinstance(item, dict):
-                continue
-            email = item.get("email")
-            if not email or email in by_email:
-                continue
-            password = item.get("password", "")
-            acc = Account(id=str(uuid4()), email=email, password=password)
-            by_email[email] = acc
-    return list(by_email.values())
+def import_from_windsurf_json(path: Path, repository: AccountRepository) -> List[Account]:
+    """导入 windsurf.json 中的账号，已存在的邮箱跳过，返回新增的账号"""
+    return account_io.import_accounts([path], repository).added
 
 
 def export_accounts(path: Path, accounts: List[Account]) -> None:
-    data = [asdict(a) for a in accounts]
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
\ No newline at end of file
+    """导出账号，格式由扩展名决定（.json / .jsonl / .csv）"""
+    account_io.export_accounts(path, accounts)
@@ -0,0 +1,166 @@
+"""
+令牌缓存模块
+按账号缓存Firebase ID Token、Refresh Token和Windsurf Auth Token及其过期时间，
+重新同步时可以跳过重复的登录请求
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+
+@dataclass
+class TokenEntry:
+    """单个账号的令牌缓存条目"""
+    account_id: str
+    email: str
+    id_token: Optional[str] = None
+    refresh_token: Optional[str] = None
+    # 过期时间为Unix时间戳（秒）
+    id_token_expires_at: float = 0.0
+    auth_token: Optional[str] = None
+    auth_token_expires_at: float = 0.0
+
+
+class TokenCache:
+    """内存令牌缓存，可选持久化到磁盘"""
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        skew_seconds: float = 60.0,
+        auth_token_ttl: float = 1800.0,
+    ) -> None:
+        """
+        初始化令牌缓存
+
+        Args:
+            path: 磁盘缓存文件路径，为None时仅缓存在内存中
+            skew_seconds: 提前判定过期的秒数，避免令牌在请求途中过期
+            auth_token_ttl: Auth Token的缓存时长（秒）
+        """
+        self.path = path
+        self.skew_seconds = skew_seconds
+        self.auth_token_ttl = auth_token_ttl
+        self._entries: Dict[str, TokenEntry] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        if self.path is not None:
+            self.load()
+
+    def load(self) -> None:
+        """从磁盘加载缓存"""
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except Exception as e:
+            print(f"加载令牌缓存失败: {e}")
+            return
+
+        entries: Dict[str, TokenEntry] = {}
+        for item in raw if isinstance(raw, list) else []:
+            try:
+                entry = TokenEntry(**item)
+            except TypeError:
+                continue
+            entries[entry.account_id] = entry
+        with self._lock:
+            self._entries = entries
+            self._dirty = False
+
+    def save(self) -> None:
+        """有改动时将缓存写入磁盘"""
+        if self.path is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = [asdict(entry) for entry in self._entries.values()]
+            self._dirty = False
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"保存令牌缓存失败: {e}")
+
+    def get(self, account_id: str, email: str) -> Optional[TokenEntry]:
+        """获取账号的缓存条目，邮箱不匹配（账号被替换）时视为不存在"""
+        with self._lock:
+            entry = self._entries.get(account_id)
+        if entry is None or entry.email != email:
+            return None
+        return entry
+
+    def _entry_for_update(self, account_id: str, email: str) -> TokenEntry:
+        entry = self._entries.get(account_id)
+        if entry is None or entry.email != email:
+            entry = TokenEntry(account_id=account_id, email=email)
+            self._entries[account_id] = entry
+        return entry
+
+    def store_firebase_tokens(
+        self,
+        account_id: str,
+        email: str,
+        id_token: str,
+        refresh_token: Optional[str],
+        expires_in: float,
+    ) -> None:
+        """记录Firebase登录或刷新得到的令牌"""
+        with self._lock:
+            entry = self._entry_for_update(account_id, email)
+            entry.id_token = id_token
+            if refresh_token:
+                entry.refresh_token = refresh_token
+            entry.id_token_expires_at = time.time() + expires_in
+            self._dirty = True
+
+    def store_auth_token(self, account_id: str, email: str, auth_token: str) -> None:
+        """记录Windsurf Auth Token"""
+        with self._lock:
+            entry = self._entry_for_update(account_id, email)
+            entry.auth_token = auth_token
+            entry.auth_token_expires_at = time.time() + self.auth_token_ttl
+            self._dirty = True
+
+    def valid_id_token(self, entry: Optional[TokenEntry]) -> Optional[str]:
+        """返回仍在有效期内的ID Token"""
+        if entry is None or not entry.id_token:
+            return None
+        if entry.id_token_expires_at - self.skew_seconds <= time.time():
+            return None
+        return entry.id_token
+
+    def valid_auth_token(self, entry: Optional[TokenEntry]) -> Optional[str]:
+        """返回仍在有效期内的Auth Token"""
+        if entry is None or not entry.auth_token:
+            return None
+        if entry.auth_token_expires_at - self.skew_seconds <= time.time():
+            return None
+        return entry.auth_token
+
+    def invalidate_auth_token(self, account_id: str) -> None:
+        """Auth Token被服务器拒绝时清除"""
+        with self._lock:
+            entry = self._entries.get(account_id)
+            if entry is not None and entry.auth_token:
+                entry.auth_token = None
+                entry.auth_token_expires_at = 0.0
+                self._dirty = True
+
+    def invalidate(self, account_id: str) -> None:
+        """清除账号的全部缓存（例如密码变更或刷新失败）"""
+        with self._lock:
+            if self._entries.pop(account_id, None) is not None:
+                self._dirty = True
@@ -0,0 +1,94 @@
+"""
+Treeview 按 key 增量刷新
+对比模型行与当前已显示的行，只发出必要的插入、更新、移动和删除调用，
+删除与重排各合并为一次 Tcl 调用
+"""
+from __future__ import annotations
+
+import tkinter as tk
+from dataclasses import dataclass, field
+from tkinter import ttk
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+# 行数据: (iid, values, tags)
+Row = Tuple[str, Sequence[Any], Sequence[str]]
+RowState = Tuple[Tuple[Any, ...], Tuple[str, ...]]
+
+
+@dataclass
+class ReconcilePlan:
+    deletes: List[str] = field(default_factory=list)
+    updates: List[Tuple[str, RowState]] = field(default_factory=list)
+    inserts: List[Tuple[str, RowState]] = field(default_factory=list)
+    # 刷新后的子项顺序
+    order: List[str] = field(default_factory=list)
+    # 新行追加到末尾后顺序仍不一致时，需要整体重排
+    reorder: bool = False
+
+    def is_empty(self) -> bool:
+        return not (self.deletes or self.updates or self.inserts or self.reorder)
+
+
+def diff_rows(current_order: Sequence[str], current_state: Dict[str, RowState], rows: Iterable[Row]) -> ReconcilePlan:
+    """
+    计算从当前显示状态到目标行的最少操作
+
+    Args:
+        current_order: 当前子项的 iid 顺序
+        current_state: 当前各行的 (values, tags)
+        rows: 目标行，iid 重复时只保留第一次出现
+    """
+    plan = ReconcilePlan()
+    desired = plan.order
+    states: Dict[str, RowState] = {}
+    for iid, values, tags in rows:
+        if iid in states:
+            continue
+        state = (tuple(values), tuple(tags))
+        states[iid] = state
+        desired.append(iid)
+        old = current_state.get(iid)
+        if old is None:
+            plan.inserts.append((iid, state))
+        elif old != state:
+            plan.updates.append((iid, state))
+
+    plan.deletes = [iid for iid in current_order if iid not in states]
+    # 新行统一追加到末尾，只有与目标顺序不一致时才整体重排
+    natural = [iid for iid in current_order if iid in states]
+    natural.extend(iid for iid, _state in plan.inserts)
+    plan.reorder = natural != desired
+    return plan
+
+
+class TreeReconciler:
+    """
+    维护某个 Treeview 父节点下已显示行的状态，按 key 增量刷新
+
+    直接调用 ttk.Treeview 的方法，VirtualTreeview 等重写了这些方法的子类
+    也可以用它管理真实存在的行。
+    """
+
+    def __init__(self, tree: ttk.Treeview, parent: str = "") -> None:
+        self.tree = tree
+        self.parent = parent
+        self.order: List[str] = []
+        self.state: Dict[str, RowState] = {}
+
+    def apply(self, rows: Iterable[Row]) -> ReconcilePlan:
+        plan = diff_rows(self.order, self.state, rows)
+        tree = self.tree
+        if plan.deletes:
+            ttk.Treeview.delete(tree, *plan.deletes)
+            for iid in plan.deletes:
+                del self.state[iid]
+        for iid, (values, tags) in plan.updates:
+            ttk.Treeview.item(tree, iid, values=values, tags=tags)
+            self.state[iid] = (values, tags)
+        for iid, (values, tags) in plan.inserts:
+            ttk.Treeview.insert(tree, self.parent, tk.END, iid=iid, values=values, tags=tags)
+            self.state[iid] = (values, tags)
+        if plan.reorder:
+            ttk.Treeview.set_children(tree, self.parent, *plan.order)
+        self.order = plan.order
+        return plan
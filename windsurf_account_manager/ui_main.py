@@ -3,13 +3,19 @@ from __future__ import annotations
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from uuid import uuid4
 from datetime import datetime
 
 from .models import Account, McpServerConfig, RuleConfig
-from . import storage, mcp_rules, api_client, config_snapshot, config_path_manager, auto_backup
+from .account_repository import AccountRepository, EVENT_REMOVED, EVENT_RESET
+from .virtual_tree import VirtualTreeview
+from .tree_reconciler import TreeReconciler
+from .account_sort import SortKeyCache
+from . import storage, account_io, mcp_rules, api_client, async_api_client, bulk_sync, token_cache, config_snapshot, config_path_manager, auto_backup
 
+# 搜索时账号列表最多显示的匹配数量
+SEARCH_RESULT_LIMIT = 1000
 
 class App:
     def __init__(self, root: tk.Tk) -> None:
@@ -17,8 +23,13 @@ class App:
         self.root.title("Windsurf Account Manager")
         self.root.geometry("900x600")
 
-        self.accounts: List[Account] = storage.load_accounts()
+        # 账号仓库维护 id/email 索引，变更通过订阅写入存储
+        self.account_repo = AccountRepository(storage.load_accounts())
+        self.account_repo.subscribe(self._persist_account_changes)
         self.active_account_id = None
+        # 排序键随账号变化缓存，点击列标题排序时不再重复解析日期
+        self.sort_keys = SortKeyCache(self.account_repo)
+        self.sort_spec: List[Tuple[str, bool]] = []
         
         # 初始化配置快照管理器
         self.snapshot_manager = config_snapshot.ConfigSnapshot()
@@ -31,6 +42,20 @@ class App:
             config_path_manager=self.path_manager,
             snapshot_manager=self.snapshot_manager
         )
+        # 上次退出时未完成的恢复：继续完成或回滚，避免留下两个账号混合的配置
+        self.snapshot_manager.recover_interrupted_restores()
+
+        # 共享的API客户端；设置 WINDSURF_API_WARMUP=1 时启动后在后台预先建立连接，默认在首次请求时连接
+        self.token_cache = token_cache.TokenCache(storage.DATA_DIR / "token_cache.json")
+        self.api_client = api_client.ApiClient(token_cache=self.token_cache)
+        import threading
+        if api_client.WARMUP_ON_START:
+            threading.Thread(target=self.api_client.warmup, daemon=True).start()
+        # 搜索索引同样在后台预先建立，避免首次输入时卡顿
+        threading.Thread(target=self.account_repo.build_search_index, daemon=True).start()
+        # 异步客户端及其事件循环线程在首次批量登录时创建
+        self.async_loop: Optional[async_api_client.EventLoopThread] = None
+        self.async_client: Optional[async_api_client.AsyncApiClient] = None
 
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill=tk.BOTH, expand=True)
@@ -50,12 +75,25 @@ class App:
         
         # 绑定标签页切换事件
         self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        # 关闭窗口时释放连接和后台事件循环
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def on_close(self) -> None:
+        """关闭窗口：关闭异步客户端及其事件循环线程和同步客户端的连接，保存令牌缓存"""
+        if self.async_loop is not None:
+            cleanups = [self.async_client.close()] if self.async_client is not None else []
+            self.async_loop.close(*cleanups)
+            self.async_loop = None
+            self.async_client = None
+        self.api_client.close()
+        self.token_cache.save()
+        self.root.destroy()
 
     def _build_accounts_tab(self) -> None:
         toolbar = ttk.Frame(self.accounts_frame)
         toolbar.pack(side=tk.TOP, fill=tk.X, padx=8, pady=4)
 
-        btn_import = ttk.Button(toolbar, text="从 windsuf.json 导入", command=self.on_import_windsurf_json)
+        btn_import = ttk.Button(toolbar, text="导入账号", command=self.on_import_windsurf_json)
         btn_export = ttk.Button(toolbar, text="导出账号", command=self.on_export_accounts)
         btn_delete = ttk.Button(toolbar, text="批量删除", command=self.on_delete_selected)
         btn_refresh = ttk.Button(toolbar, text="刷新列表", command=self.refresh_accounts_view)
@@ -79,14 +117,30 @@ class App:
         btn_snapshot.pack(side=tk.LEFT, padx=4)
         btn_restore.pack(side=tk.LEFT, padx=4)
 
-        columns = ("email", "note", "plan_name", "plan_end", "snapshot")
-        self.tree = ttk.Treeview(self.accounts_frame, columns=columns, show="headings", selectmode="extended")
+        # 搜索栏：每次输入即时过滤账号列表
+        search_bar = ttk.Frame(self.accounts_frame)
+        search_bar.pack(side=tk.TOP, fill=tk.X, padx=8, pady=(0, 4))
+        ttk.Label(search_bar, text="搜索:").pack(side=tk.LEFT, padx=4)
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(search_bar, textvariable=self.search_var, width=40)
+        search_entry.pack(side=tk.LEFT, padx=4)
+        self.search_status_var = tk.StringVar()
+        ttk.Label(search_bar, textvariable=self.search_status_var).pack(side=tk.LEFT, padx=8)
+        self.search_var.trace_add("write", lambda *_: self.refresh_accounts_view())
 
-        self.tree.heading("email", text="邮箱")
-        self.tree.heading("note", text="备注")
-        self.tree.heading("plan_name", text="计划")
-        self.tree.heading("plan_end", text="到期时间")
-        self.tree.heading("snapshot", text="配置快照")
+        columns = ("email", "note", "plan_name", "plan_end", "snapshot")
+        # 虚拟列表：只创建可见范围内的行，账号数量再多滚动也保持流畅
+        self.tree = VirtualTreeview(self.accounts_frame, columns=columns, show="headings", selectmode="extended")
+
+        self.account_headings = {
+            "email": "邮箱",
+            "note": "备注",
+            "plan_name": "计划",
+            "plan_end": "到期时间",
+            "snapshot": "配置快照",
+        }
+        for column, text in self.account_headings.items():
+            self.tree.heading(column, text=text, command=lambda c=column: self.on_sort_column(c))
 
         self.tree.column("email", width=220)
         self.tree.column("note", width=150)
@@ -170,6 +224,7 @@ class App:
         mcp_vsb.pack(side=tk.LEFT, fill=tk.Y, pady=(4, 0))
 
         self.tree_mcp.bind("<Double-1>", self.on_tree_mcp_double_click)
+        self.mcp_reconciler = TreeReconciler(self.tree_mcp)
 
         # Rules 区域
         frame_rules = ttk.Frame(self.mcp_rules_frame)
@@ -204,6 +259,7 @@ class App:
         rules_vsb.pack(side=tk.LEFT, fill=tk.Y, pady=(4, 0))
 
         self.tree_rules.bind("<Double-1>", self.on_tree_rules_double_click)
+        self.rules_reconciler = TreeReconciler(self.tree_rules)
     
     def on_tab_changed(self, event) -> None:
         """标签页切换事件处理"""
@@ -212,6 +268,7 @@ class App:
             self.refresh_auto_backup_view()
             self.update_backup_status()
 
+        # 按 key 增量刷新，列表未变化时不会产生任何 Tcl 调用
         self.refresh_mcp_view()
         self.refresh_rules_view()
     
@@ -251,6 +308,7 @@ class App:
         self.tree_paths.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
         
         self.tree_paths.tag_configure("active_path", background="#d0f0ff")
+        self.paths_reconciler = TreeReconciler(self.tree_paths)
         
         self.tree_paths.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(8, 0), pady=4)
         vsb.pack(side=tk.LEFT, fill=tk.Y, pady=4)
@@ -260,30 +318,27 @@ class App:
     
     def refresh_config_paths_view(self) -> None:
         """刷新配置路径视图"""
-        for item in self.tree_paths.get_children():
-            self.tree_paths.delete(item)
-        
         paths = self.path_manager.get_paths()
         active_path = self.path_manager.get_active_path()
         active_path_str = str(active_path) if active_path else ""
         
+        rows = []
         for path_info in paths:
             path = path_info.get("path", "")
             is_active = (path == active_path_str)
             tags = ("active_path",) if is_active else ()
             
-            self.tree_paths.insert(
-                "",
-                tk.END,
-                iid=str(path_info.get("id")),
-                values=(
+            rows.append((
+                str(path_info.get("id")),
+                (
                     path_info.get("name", ""),
                     path_info.get("path", ""),
                     "是" if path_info.get("has_config") else "否",
                     "是" if is_active else "否"
                 ),
-                tags=tags
-            )
+                tags
+            ))
+        self.paths_reconciler.apply(rows)
     
     def on_auto_detect_paths(self) -> None:
         """自动检测配置路径"""
@@ -538,7 +593,7 @@ class App:
         list_frame.pack(fill=tk.BOTH, expand=True, padx=8, pady=4)
         
         columns = ("account", "created_at", "path")
-        self.tree_backups = ttk.Treeview(list_frame, columns=columns, show="headings", selectmode="extended")
+        self.tree_backups = VirtualTreeview(list_frame, columns=columns, show="headings", selectmode="extended")
         
         self.tree_backups.heading("account", text="账号")
         self.tree_backups.heading("created_at", text="创建时间")
@@ -561,50 +616,143 @@ class App:
         self.refresh_auto_backup_view()
         self.update_backup_status()
 
+    def _persist_account_changes(self, event: str, accounts: List[Account]) -> None:
+        """账号仓库变更时只写入受影响的账号"""
+        if event == EVENT_REMOVED:
+            storage.delete_accounts([a.id for a in accounts], self.account_repo.all())
+        elif event == EVENT_RESET:
+            storage.save_accounts(accounts)
+        else:
+            storage.upsert_accounts(accounts, self.account_repo.all())
+
     def refresh_accounts_view(self) -> None:
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        for acc in self.accounts:
+        query = self.search_var.get().strip()
+        if query:
+            accounts = self.account_repo.search(query, SEARCH_RESULT_LIMIT)
+            if len(accounts) >= SEARCH_RESULT_LIMIT:
+                self.search_status_var.set(f"显示前 {SEARCH_RESULT_LIMIT} 个匹配")
+            else:
+                self.search_status_var.set(f"匹配 {len(accounts)} 个账号")
+        else:
+            accounts = self.account_repo.all()
+            self.search_status_var.set("")
+        if self.sort_spec:
+            accounts = self.sort_keys.sort(accounts, self.sort_spec)
+
+        rows = []
+        for acc in accounts:
             tags = ("active_account",) if acc.id == self.active_account_id else ()
             # 显示快照状态
             snapshot_status = "无"
             if acc.has_snapshot and acc.snapshot_created_at:
                 snapshot_status = acc.snapshot_created_at[:10]  # 只显示日期部分
-            
-            self.tree.insert(
-                "",
-                tk.END,
-                iid=acc.id,
-                values=(acc.email, acc.note, acc.plan_name or "", acc.plan_end or "", snapshot_status),
-                tags=tags,
-            )
+            rows.append((
+                acc.id,
+                (acc.email, acc.note, acc.plan_name or "", acc.plan_end or "", snapshot_status),
+                tags,
+            ))
+        self.tree.set_rows(rows)
+
+    def on_sort_column(self, column: str) -> None:
+        """点击列标题排序：再次点击切换升降序，之前的主排序列保留为次排序列"""
+        if self.sort_spec and self.sort_spec[0][0] == column:
+            self.sort_spec[0] = (column, not self.sort_spec[0][1])
+        else:
+            previous = [spec for spec in self.sort_spec if spec[0] != column][:1]
+            self.sort_spec = [(column, False)] + previous
+        primary, descending = self.sort_spec[0]
+        for name, text in self.account_headings.items():
+            if name == primary:
+                text += " ▼" if descending else " ▲"
+            self.tree.heading(name, text=text)
+        self.refresh_accounts_view()
 
     def on_import_windsurf_json(self) -> None:
-        path_str = filedialog.askopenfilename(
-            title="选择 windsuf.json",
-            filetypes=(("JSON 文件", "*.json"), ("所有文件", "*.*")),
+        path_strs = filedialog.askopenfilenames(
+            title="选择要导入的账号文件",
+            filetypes=(
+                ("账号文件", "*.json *.jsonl *.ndjson *.csv"),
+                ("JSON 文件", "*.json"),
+                ("JSON Lines 文件", "*.jsonl *.ndjson"),
+                ("CSV 文件", "*.csv"),
+                ("所有文件", "*.*"),
+            ),
         )
-        if not path_str:
+        if not path_strs:
             return
-        path = Path(path_str)
-        try:
-            self.accounts = storage.import_from_windsurf_json(path, self.accounts)
-            storage.save_accounts(self.accounts)
-            self.refresh_accounts_view()
-        except Exception as exc:
-            messagebox.showerror("导入失败", f"导入 windsuf.json 失败: {exc}")
+        paths = [Path(p) for p in path_strs]
+
+        progress_win = tk.Toplevel(self.root)
+        progress_win.title("导入中...")
+        progress_win.geometry("360x110")
+        progress_win.transient(self.root)
+        progress_win.grab_set()
+
+        status_var = tk.StringVar(value="正在读取文件...")
+        ttk.Label(progress_win, textvariable=status_var).pack(pady=10)
+        progress_bar = ttk.Progressbar(progress_win, mode="determinate", maximum=1000)
+        progress_bar.pack(fill=tk.X, padx=20, pady=6)
+
+        last_update = {"time": 0.0}
+
+        def update_progress(index: int, count: int, done: int, total: int, added: int) -> None:
+            status_var.set(f"文件 {index + 1}/{count}，已新增 {added} 个账号")
+            fraction = (index + (done / total if total else 1)) / count
+            progress_bar["value"] = int(fraction * 1000)
+
+        def on_progress(index: int, count: int, done: int, total: int, added: int) -> None:
+            # 限制刷新频率，避免大量 after 回调堆积
+            import time
+            now = time.monotonic()
+            if now - last_update["time"] < 0.1 and done < total:
+                return
+            last_update["time"] = now
+            self.root.after(0, update_progress, index, count, done, total, added)
+
+        def import_thread():
+            try:
+                result = account_io.import_accounts(paths, self.account_repo, on_progress=on_progress)
+                self.root.after(0, lambda: self._import_complete(result, progress_win))
+            except Exception as exc:
+                error = str(exc)
+                self.root.after(0, lambda: self._import_error(error, progress_win))
+
+        import threading
+        thread = threading.Thread(target=import_thread)
+        thread.daemon = True
+        thread.start()
+
+    def _import_complete(self, result: "account_io.ImportResult", progress_win: tk.Toplevel) -> None:
+        progress_win.destroy()
+        self.refresh_accounts_view()
+        messagebox.showinfo(
+            "导入完成",
+            f"已处理 {result.files} 个文件，新增 {len(result.added)} 个账号。\n\n"
+            f"重复邮箱: {result.duplicates}\n"
+            f"无效记录: {result.invalid}",
+        )
+
+    def _import_error(self, error_msg: str, progress_win: tk.Toplevel) -> None:
+        progress_win.destroy()
+        self.refresh_accounts_view()
+        messagebox.showerror("导入失败", f"导入账号失败: {error_msg}")
 
     def on_export_accounts(self) -> None:
         path_str = filedialog.asksaveasfilename(
             title="导出账号",
             defaultextension=".json",
-            filetypes=(("JSON 文件", "*.json"), ("所有文件", "*.*")),
+            filetypes=(
+                ("JSON 文件", "*.json"),
+                ("JSON Lines 文件", "*.jsonl"),
+                ("CSV 文件", "*.csv"),
+                ("所有文件", "*.*"),
+            ),
         )
         if not path_str:
             return
         path = Path(path_str)
         try:
-            storage.export_accounts(path, self.accounts)
+            storage.export_accounts(path, self.account_repo.all())
         except Exception as exc:
             messagebox.showerror("导出失败", f"导出账号失败: {exc}")
 
@@ -614,11 +762,9 @@ class App:
             return
         if not messagebox.askyesno("确认删除", f"确定要删除选中的 {len(selected)} 个账号吗？"):
             return
-        remaining = [a for a in self.accounts if a.id not in selected]
-        self.accounts = remaining
+        self.account_repo.remove(selected)
         if self.active_account_id in selected:
             self.active_account_id = None
-        storage.save_accounts(self.accounts)
         self.refresh_accounts_view()
 
     def on_select_all(self) -> None:
@@ -647,7 +793,7 @@ class App:
         self._edit_account(item_id)
 
     def _edit_account(self, acc_id: str) -> None:
-        acc = next((a for a in self.accounts if a.id == acc_id), None)
+        acc = self.account_repo.get(acc_id)
         if acc is None:
             return
 
@@ -674,7 +820,7 @@ class App:
 
         def on_ok() -> None:
             acc.note = note_var.get()
-            storage.save_accounts(self.accounts)
+            self.account_repo.update(acc)
             self.refresh_accounts_view()
             win.destroy()
 
@@ -699,7 +845,7 @@ class App:
             return
 
         acc_id = selected[0]
-        acc = next((a for a in self.accounts if a.id == acc_id), None)
+        acc = self.account_repo.get(acc_id)
         if acc is None:
             return
 
@@ -717,11 +863,12 @@ class App:
             messagebox.showinfo("登录账号", "请先选择一个要登录的账号。")
             return
         if len(selected) > 1:
-            messagebox.showinfo("登录账号", "一次仅支持登录一个账号，请只选择一个账号。")
+            accounts = self.account_repo.get_many(selected)
+            self._login_accounts_bulk(accounts)
             return
 
         acc_id = selected[0]
-        acc = next((a for a in self.accounts if a.id == acc_id), None)
+        acc = self.account_repo.get(acc_id)
         if acc is None:
             return
 
@@ -746,8 +893,7 @@ class App:
 
         def login_thread():
             try:
-                client = api_client.ApiClient()
-                success = client.login_and_update_account(acc)
+                success = self.api_client.login_and_update_account(acc)
                 
                 # 在主线程中更新UI
                 self.root.after(0, lambda: self._login_complete(acc, success, progress_win))
@@ -762,9 +908,10 @@ class App:
 
     def _login_complete(self, account: Account, success: bool, progress_win: tk.Toplevel) -> None:
         progress_win.destroy()
+        self.token_cache.save()
         
         if success:
-            storage.save_accounts(self.accounts)
+            self.account_repo.update(account)
             self.refresh_accounts_view()
             messagebox.showinfo(
                 "登录成功",
@@ -781,6 +928,94 @@ class App:
         progress_win.destroy()
         messagebox.showerror("登录错误", f"登录过程中发生错误：{error_msg}")
 
+    def _login_accounts_bulk(self, accounts: List[Account]) -> None:
+        """批量登录多个账号，结果逐个更新到进度窗口，完成后统一保存"""
+        if not accounts:
+            return
+
+        progress_win = tk.Toplevel(self.root)
+        progress_win.title("批量登录中...")
+        progress_win.geometry("360x130")
+        progress_win.transient(self.root)
+        progress_win.grab_set()
+
+        progress_frame = ttk.Frame(progress_win)
+        progress_frame.pack(fill=tk.BOTH, expand=True, padx=12, pady=12)
+
+        status_var = tk.StringVar(value=f"正在登录 0/{len(accounts)} ...")
+        ttk.Label(progress_frame, textvariable=status_var).pack(pady=6)
+        progress_bar = ttk.Progressbar(progress_frame, mode="determinate", maximum=len(accounts))
+        progress_bar.pack(fill=tk.X, pady=6)
+
+        done = {"count": 0}
+
+        def on_result(_result: bulk_sync.SyncResult) -> None:
+            done["count"] += 1
+            status_var.set(f"正在登录 {done['count']}/{len(accounts)} ...")
+            progress_bar["value"] = done["count"]
+
+        if async_api_client.is_available():
+            # 所有登录流程在同一个后台事件循环线程上并发执行
+            import threading
+            cancel_event = threading.Event()
+            ttk.Button(progress_frame, text="取消", command=cancel_event.set).pack()
+
+            if self.async_loop is None:
+                self.async_loop = async_api_client.EventLoopThread()
+                self.async_client = async_api_client.AsyncApiClient(token_cache=self.token_cache)
+            future = self.async_loop.submit(self.async_client.sync_accounts(
+                accounts,
+                on_result=lambda r: self.root.after(0, on_result, r),
+                cancel_event=cancel_event,
+            ))
+
+            def on_done(f) -> None:
+                try:
+                    results = f.result()
+                except Exception as e:
+                    self.root.after(0, lambda: self._login_error(str(e), progress_win))
+                    return
+                self.root.after(0, lambda: self._bulk_login_complete(results, progress_win))
+
+            future.add_done_callback(on_done)
+            return
+
+        engine = bulk_sync.BulkSyncEngine(self.api_client)
+        ttk.Button(progress_frame, text="取消", command=engine.cancel).pack()
+
+        def bulk_thread():
+            try:
+                results = engine.sync(
+                    accounts,
+                    on_result=lambda r: self.root.after(0, on_result, r),
+                )
+                self.root.after(0, lambda: self._bulk_login_complete(results, progress_win))
+            except Exception as e:
+                self.root.after(0, lambda: self._login_error(str(e), progress_win))
+
+        import threading
+        thread = threading.Thread(target=bulk_thread)
+        thread.daemon = True
+        thread.start()
+
+    def _bulk_login_complete(self, results: List["bulk_sync.SyncResult"], progress_win: tk.Toplevel) -> None:
+        progress_win.destroy()
+        self.token_cache.save()
+
+        success_count = sum(1 for r in results if r.success)
+        if success_count:
+            self.account_repo.update_many(self.account_repo.get_many(r.account_id for r in results if r.success))
+            self.refresh_accounts_view()
+
+        failed = [r for r in results if not r.success]
+        msg = f"成功登录 {success_count}/{len(results)} 个账号。"
+        if failed:
+            msg += "\n\n失败账号:\n"
+            msg += "\n".join(f"{r.email}: {r.error}" for r in failed[:10])
+            if len(failed) > 10:
+                msg += f"\n... 以及另外 {len(failed) - 10} 个账号"
+        messagebox.showinfo("批量登录完成", msg)
+
     def on_create_snapshot(self) -> None:
         selected = list(self.tree.selection())
         if not selected:
@@ -791,7 +1026,7 @@ class App:
             return
 
         acc_id = selected[0]
-        acc = next((a for a in self.accounts if a.id == acc_id), None)
+        acc = self.account_repo.get(acc_id)
         if acc is None:
             return
 
@@ -834,7 +1069,7 @@ class App:
             # 更新账号信息
             acc.has_snapshot = True
             acc.snapshot_created_at = datetime.now().isoformat()
-            storage.save_accounts(self.accounts)
+            self.account_repo.update(acc)
             self.refresh_accounts_view()
             
             messagebox.showinfo(
@@ -855,7 +1090,7 @@ class App:
             return
 
         acc_id = selected[0]
-        acc = next((a for a in self.accounts if a.id == acc_id), None)
+        acc = self.account_repo.get(acc_id)
         if acc is None:
             return
 
@@ -920,7 +1155,7 @@ class App:
             return
 
         acc_id = selected[0]
-        acc = next((a for a in self.accounts if a.id == acc_id), None)
+        acc = self.account_repo.get(acc_id)
         if acc is None:
             return
 
@@ -966,7 +1201,7 @@ class App:
             # 更新账号信息
             acc.has_snapshot = False
             acc.snapshot_created_at = None
-            storage.save_accounts(self.accounts)
+            self.account_repo.update(acc)
             self.refresh_accounts_view()
             messagebox.showinfo("删除快照成功", f"已删除账号 {acc.email} 的配置快照。")
         else:
@@ -977,32 +1212,22 @@ class App:
     def refresh_mcp_view(self) -> None:
         if not hasattr(self, "tree_mcp"):
             return
-        for item in self.tree_mcp.get_children():
-            self.tree_mcp.delete(item)
+        rows = []
         for server in self.mcp_servers:
             enabled_text = "是" if server.enabled else "否"
-            self.tree_mcp.insert(
-                "",
-                tk.END,
-                iid=server.id,
-                values=(server.id, server.name, server.command, enabled_text),
-            )
+            rows.append((server.id, (server.id, server.name, server.command, enabled_text), ()))
+        self.mcp_reconciler.apply(rows)
 
     def refresh_rules_view(self) -> None:
         if not hasattr(self, "tree_rules"):
             return
-        for item in self.tree_rules.get_children():
-            self.tree_rules.delete(item)
+        rows = []
         for rule in self.rules:
             prompt_display = rule.prompt.replace("\n", " ")
             if len(prompt_display) > 60:
                 prompt_display = prompt_display[:57] + "..."
-            self.tree_rules.insert(
-                "",
-                tk.END,
-                iid=rule.id,
-                values=(rule.id, prompt_display),
-            )
+            rows.append((rule.id, (rule.id, prompt_display), ()))
+        self.rules_reconciler.apply(rows)
 
     def on_open_mcp_file(self) -> None:
         path_str = filedialog.askopenfilename(
@@ -1354,7 +1579,7 @@ class App:
             messagebox.showerror("启用失败", "请先设置活动配置路径。")
             return
             
-        if not self.accounts:
+        if not self.account_repo:
             messagebox.showerror("启用失败", "请先添加账号。")
             return
             
@@ -1374,7 +1599,7 @@ class App:
             messagebox.showerror("备份失败", "请先设置活动配置路径。")
             return
             
-        if not self.accounts:
+        if not self.account_repo:
             messagebox.showerror("备份失败", "没有可备份的账号。")
             return
         
@@ -1394,11 +1619,12 @@ class App:
         def backup_thread():
             try:
                 success_count = 0
-                for account in self.accounts:
+                accounts = self.account_repo.all()
+                for account in accounts:
                     if self.auto_backup_manager.create_backup(account.id, account.email):
                         success_count += 1
                 
-                progress.after(0, lambda: self._backup_complete(progress, success_count, len(self.accounts)))
+                progress.after(0, lambda: self._backup_complete(progress, success_count, len(accounts)))
             except Exception as e:
                 progress.after(0, lambda: self._backup_error(progress, str(e)))
         
@@ -1439,7 +1665,7 @@ class App:
         
         account_id = backup.get("account_id")
         backup_name = backup.get("backup_name")
-        account = next((a for a in self.accounts if a.id == account_id), None)
+        account = self.account_repo.get(account_id)
         
         if not account:
             messagebox.showerror("恢复失败", "找不到对应的账号。")
@@ -1525,25 +1751,22 @@ class App:
     
     def refresh_auto_backup_view(self) -> None:
         """刷新自动备份视图"""
-        for item in self.tree_backups.get_children():
-            self.tree_backups.delete(item)
-        
-        backups = self.auto_backup_manager.list_all_backups()
+        rows = []
+        backups = self.auto_backup_manager.list_all_backups(self.account_repo.ids())
         for backup in backups:
             account_id = backup.get("account_id", "")
-            account = next((a for a in self.accounts if a.id == account_id), None)
+            account = self.account_repo.get(account_id)
             account_email = backup.get("account_email", account.email if account else "未知账号")
-            
-            self.tree_backups.insert(
-                "",
-                tk.END,
-                iid=backup.get("id", ""),
-                values=(
+            rows.append((
+                backup.get("id", ""),
+                (
                     account_email,
                     backup.get("created_at", ""),
                     backup.get("path", "")
-                )
-            )
+                ),
+                (),
+            ))
+        self.tree_backups.set_rows(rows)
     
     def update_backup_status(self) -> None:
         """更新备份状态显示"""
@@ -1558,6 +1781,8 @@ class App:
         status_text = f"自动备份状态: {'启用' if is_enabled else '禁用'}\n"
         status_text += f"备份间隔: {interval} 小时\n"
         status_text += f"最大备份数: {max_backups} 个/账号"
+        if self.snapshot_manager.backup_format == "archive":
+            status_text += f"\n备份格式: 压缩归档 ({self.snapshot_manager.compression})"
         
         if last_backup_time:
             status_text += f"\n上次备份: {last_backup_time}"
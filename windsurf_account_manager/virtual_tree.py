@@ -0,0 +1,290 @@
+"""
+虚拟列表模式的 Treeview
+只有视口内（加上少量预加载行）的数据才会作为真实的 Treeview 项存在，
+滚动时按需换入，刷新成本与账号总数无关
+"""
+from __future__ import annotations
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .tree_reconciler import Row, TreeReconciler
+
+_SHIFT_MASK = 0x0001
+_CONTROL_MASK = 0x0004
+
+
+class ViewportModel:
+    """虚拟列表的视口计算，与 Tk 无关"""
+
+    def __init__(self, overscan: int = 10) -> None:
+        self.overscan = overscan
+        self.rows: List[Row] = []
+        self.positions: Dict[str, int] = {}
+        self.offset = 0
+        self.visible = 20
+
+    def set_rows(self, rows: Iterable[Row]) -> None:
+        self.rows = list(rows)
+        self.positions = {row[0]: index for index, row in enumerate(self.rows)}
+        self.offset = self.clamp(self.offset)
+
+    def clamp(self, offset: int) -> int:
+        return max(0, min(offset, len(self.rows) - self.visible))
+
+    def set_visible(self, visible: int) -> None:
+        self.visible = max(1, visible)
+        self.offset = self.clamp(self.offset)
+
+    def window(self) -> Tuple[int, int]:
+        """需要实际创建的行范围 [start, end)"""
+        start = max(0, self.offset - self.overscan)
+        end = min(len(self.rows), self.offset + self.visible + self.overscan)
+        return start, end
+
+    def fractions(self) -> Tuple[float, float]:
+        """滚动条位置"""
+        total = len(self.rows)
+        if total <= self.visible:
+            return 0.0, 1.0
+        return self.offset / total, min(1.0, (self.offset + self.visible) / total)
+
+    def scroll_to_fraction(self, fraction: float) -> None:
+        self.offset = self.clamp(int(round(fraction * len(self.rows))))
+
+    def scroll_by(self, rows: int) -> None:
+        self.offset = self.clamp(self.offset + rows)
+
+    def range_ids(self, first: str, last: str) -> List[str]:
+        """两行之间（含两端）的全部行，按逻辑行号计算，不限于已创建的行"""
+        a, b = self.positions[first], self.positions[last]
+        if a > b:
+            a, b = b, a
+        return [row[0] for row in self.rows[a:b + 1]]
+
+    def ensure_visible(self, index: int) -> None:
+        if index < self.offset:
+            self.offset = self.clamp(index)
+        elif index >= self.offset + self.visible:
+            self.offset = self.clamp(index - self.visible + 1)
+
+
+class VirtualTreeview(ttk.Treeview):
+    """
+    虚拟列表 Treeview
+
+    通过 set_rows 提供全部行数据；selection / get_children / see 等方法
+    按全部行工作，与普通 Treeview 的用法保持一致。
+    """
+
+    def __init__(self, master: Optional[tk.Misc] = None, overscan: int = 10, **kw: Any) -> None:
+        self._yscrollcommand = kw.pop("yscrollcommand", None)
+        super().__init__(master, **kw)
+        self._model = ViewportModel(overscan)
+        self._reconciler = TreeReconciler(self)
+        self._materialized: List[str] = []
+        self._selected: Set[str] = set()
+        self._replace_selection = False
+        # Shift 范围选择的起点
+        self._anchor: Optional[str] = None
+
+        self.bind("<<TreeviewSelect>>", self._on_native_select, add="+")
+        self.bind("<ButtonPress-1>", self._on_button_press, add="+")
+        self.bind("<Configure>", self._on_configure, add="+")
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.bind(sequence, self._on_wheel)
+        for sequence in ("<Up>", "<Down>", "<Prior>", "<Next>", "<Home>", "<End>"):
+            self.bind(sequence, self._on_key)
+
+    # 数据
+
+    def set_rows(self, rows: Iterable[Row]) -> None:
+        """替换全部行数据，只重建视口内的行"""
+        self._model.set_rows(rows)
+        positions = self._model.positions
+        self._selected = {iid for iid in self._selected if iid in positions}
+        self._render()
+
+    def row_count(self) -> int:
+        return len(self._model.rows)
+
+    # 与 Treeview 兼容的接口
+
+    def configure(self, cnf: Optional[Dict[str, Any]] = None, **kw: Any) -> Any:
+        if cnf:
+            kw = {**cnf, **kw}
+        if "yscrollcommand" in kw:
+            self._yscrollcommand = kw.pop("yscrollcommand")
+            self._update_scrollbar()
+        return super().configure(**kw) if kw else None
+
+    config = configure
+
+    def yview(self, *args: Any) -> Any:
+        """供滚动条调用，按全部行滚动"""
+        if not args:
+            return self._model.fractions()
+        if args[0] == "moveto":
+            self._model.scroll_to_fraction(float(args[1]))
+        elif args[0] == "scroll":
+            count = int(args[1])
+            self._model.scroll_by(count * self._model.visible if args[2] == "pages" else count)
+        self._render()
+        return None
+
+    def get_children(self, item: Optional[str] = None) -> Tuple[str, ...]:
+        if item:
+            return super().get_children(item)
+        return tuple(row[0] for row in self._model.rows)
+
+    def exists(self, item: str) -> bool:
+        return item in self._model.positions
+
+    def see(self, item: str) -> None:
+        index = self._model.positions.get(item)
+        if index is None:
+            return
+        self._model.ensure_visible(index)
+        self._render()
+
+    def delete(self, *items: str) -> None:
+        removed = set(items)
+        self._model.set_rows(row for row in self._model.rows if row[0] not in removed)
+        self._selected -= removed
+        self._render()
+
+    def selection(self) -> Tuple[str, ...]:
+        positions = self._model.positions
+        return tuple(sorted(self._selected, key=positions.__getitem__))
+
+    def selection_set(self, *items: Any) -> None:
+        self._selected = set(self._flatten(items))
+        self._sync_native_selection()
+
+    def selection_add(self, *items: Any) -> None:
+        self._selected |= set(self._flatten(items))
+        self._sync_native_selection()
+
+    def selection_remove(self, *items: Any) -> None:
+        self._selected -= set(self._flatten(items))
+        self._sync_native_selection()
+
+    def selection_toggle(self, *items: Any) -> None:
+        self._selected ^= set(self._flatten(items))
+        self._sync_native_selection()
+
+    # 内部实现
+
+    def _flatten(self, items: Sequence[Any]) -> List[str]:
+        if len(items) == 1 and isinstance(items[0], (list, tuple)):
+            items = items[0]
+        positions = self._model.positions
+        return [iid for iid in items if iid in positions]
+
+    def _sync_native_selection(self) -> None:
+        visible = [iid for iid in self._materialized if iid in self._selected]
+        super().selection_set(visible)
+
+    def _render(self) -> None:
+        model = self._model
+        start, end = model.window()
+        self._reconciler.apply(model.rows[start:end])
+        self._materialized = self._reconciler.order
+        # 重建后的原生选择只是逻辑选择的子集，不能再用来替换逻辑选择
+        self._replace_selection = False
+        self._sync_native_selection()
+        if self._materialized:
+            super().yview_moveto((model.offset - start) / len(self._materialized))
+        self._update_scrollbar()
+
+    def _update_scrollbar(self) -> None:
+        if self._yscrollcommand is not None:
+            self._yscrollcommand(*self._model.fractions())
+
+    def _on_configure(self, _event: tk.Event) -> None:
+        try:
+            row_height = int(ttk.Style(self).lookup("Treeview", "rowheight") or 20)
+        except (tk.TclError, ValueError):
+            row_height = 20
+        heading = 0
+        if self._materialized:
+            bbox = super().bbox(self._materialized[0])
+            if bbox:
+                row_height = bbox[3] or row_height
+        if "headings" in str(self.cget("show")):
+            heading = 25
+        visible = max(1, (self.winfo_height() - heading) // max(1, row_height))
+        if visible != self._model.visible:
+            self._model.set_visible(visible)
+            self._render()
+
+    def _on_wheel(self, event: tk.Event) -> str:
+        if getattr(event, "num", None) == 4:
+            step = -3
+        elif getattr(event, "num", None) == 5:
+            step = 3
+        else:
+            step = -3 if event.delta > 0 else 3
+        self._model.scroll_by(step)
+        self._render()
+        return "break"
+
+    def _on_key(self, event: tk.Event) -> str:
+        rows = self._model.rows
+        if not rows:
+            return "break"
+        focus = super().focus()
+        index = self._model.positions.get(focus, self._model.offset)
+        page = self._model.visible
+        target = {
+            "Up": index - 1,
+            "Down": index + 1,
+            "Prior": index - page,
+            "Next": index + page,
+            "Home": 0,
+            "End": len(rows) - 1,
+        }.get(event.keysym, index)
+        target = max(0, min(target, len(rows) - 1))
+        iid = rows[target][0]
+        if event.state & _SHIFT_MASK:
+            anchor = self._anchor if self._anchor in self._model.positions else focus
+            if anchor not in self._model.positions:
+                anchor = iid
+            self._selected = set(self._model.range_ids(anchor, iid))
+        else:
+            self._selected = {iid}
+            self._anchor = iid
+        self._model.ensure_visible(target)
+        self._render()
+        super().focus(iid)
+        self.event_generate("<<TreeviewSelect>>")
+        return "break"
+
+    def _on_button_press(self, event: tk.Event) -> Optional[str]:
+        # 只处理点击在行上的情况，点击表头或空白处不改变选择
+        self._replace_selection = False
+        if self.identify_region(event.x, event.y) not in ("cell", "tree"):
+            return None
+        iid = super().identify_row(event.y)
+        if not iid or iid not in self._model.positions:
+            return None
+        if event.state & _SHIFT_MASK and self._anchor in self._model.positions:
+            # 范围按逻辑行号计算，包括视口外的行
+            self._selected = set(self._model.range_ids(self._anchor, iid))
+            super().focus(iid)
+            self._sync_native_selection()
+            self.event_generate("<<TreeviewSelect>>")
+            return "break"
+        self._anchor = iid
+        # 不带修饰键的单击会替换全部选择，包括视口外已选中的行
+        self._replace_selection = not (event.state & _CONTROL_MASK)
+        return None
+
+    def _on_native_select(self, _event: tk.Event) -> None:
+        native = set(super().selection())
+        if self._replace_selection:
+            self._selected = native
+            self._replace_selection = False
+        else:
+            self._selected = (self._selected - set(self._materialized)) | native